@@ -3,12 +3,28 @@ Aplicação Flask - Backend do Classificador de Transações Bancárias
 """
 
 import os
+import gc
+import io
 import json
+import orjson
 import pandas as pd
-from flask import Flask, render_template, request, jsonify, send_file
+import pyarrow as pa
+import pyarrow.feather as feather
+from flask import Flask, Response, render_template, request, send_file
+from werkzeug.http import http_date
 from werkzeug.utils import secure_filename
 from pathlib import Path
+from urllib.parse import unquote
 import shutil
+import hashlib
+import pickle
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.parser import ParseFailedException
+from streaming_form_data.targets import BaseTarget
 
 # Importa as camadas de processamento
 from src.layers.raw_layer import RawLayer
@@ -24,14 +40,43 @@ app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max
 app.config['UPLOAD_FOLDER'] = './uploads'
 app.config['OUTPUT_FOLDER'] = './output'
-app.config['ALLOWED_EXTENSIONS'] = {'ofx'}
-
-# Variável global para armazenar o DataFrame atual
-current_df = None
-current_categories = []
-# Cache do último relatório gerado para a página (/api/relatorio)
-# Usado para gerar o PDF sem reexecutar a IA
-cached_report = None
+app.config['ALLOWED_EXTENSIONS'] = ALLOWED_EXTENSIONS = frozenset({'ofx'})
+# Tamanho dos blocos lidos do corpo da requisição durante o upload
+app.config['UPLOAD_CHUNK_SIZE'] = 64 * 1024  # 64KB
+
+# DataFrame atual persistido em Arrow IPC (compartilhado entre workers via mmap)
+CURRENT_DF_PATH = os.path.join(app.config['OUTPUT_FOLDER'], 'current_df.arrow')
+
+# Carrega categorias estruturadas do arquivo catetegorias.json uma única vez
+with open('./src/prompts/catetegorias.json', 'r', encoding='utf-8') as f:
+    _CATEGORIES_DATA = json.load(f)
+# Todas as subcontas para o dropdown, no formato "codigo - descricao", ordenadas
+ALL_CATEGORIES = tuple(sorted(
+    f"{subconta['codigo']} - {subconta['descricao']}"
+    for grupo in _CATEGORIES_DATA['grupos']
+    for subconta in grupo['subcontas']
+))
+
+# Visão local do DataFrame atual, válida enquanto o mtime do arquivo não mudar
+_current_df_cache = {'mtime': None, 'df': None}
+current_categories = ALL_CATEGORIES
+# Corpo JSON já serializado de /api/results (invalidado quando o DataFrame muda)
+cached_results_json = None
+# Relatórios gerados para a página (/api/relatorio), indexados pelo fingerprint
+# do DataFrame. Usados para gerar o PDF sem reexecutar a IA. Ficam em disco
+# (REPORT_CACHE_DIR), visíveis a todos os workers; REPORT_CACHE é só a cópia
+# local já carregada por este worker
+REPORT_CACHE = {}
+REPORT_CACHE_MAX_ENTRIES = 8
+REPORT_CACHE_DIR = os.path.join(app.config['OUTPUT_FOLDER'], 'report_cache')
+# Geração de PDF em background. O estado dos jobs fica em arquivos na pasta de
+# saída (.pending/.error/.pdf), então qualquer worker responde à consulta
+EXECUTOR = ThreadPoolExecutor(max_workers=2)
+# Arquivos de jobs mais antigos que isso (PDFs não baixados, jobs interrompidos) são apagados
+PDF_JOB_MAX_AGE = 60 * 60  # 1 hora
+# Remoção das pastas de upload já processadas, separada do EXECUTOR para não
+# esperar atrás de PDFs (nem atrasá-los)
+CLEANUP_EXECUTOR = ThreadPoolExecutor(max_workers=1)
 
 # Garante que as pastas existem
 Path(app.config['UPLOAD_FOLDER']).mkdir(parents=True, exist_ok=True)
@@ -40,16 +85,137 @@ Path(app.config['OUTPUT_FOLDER']).mkdir(parents=True, exist_ok=True)
 
 def allowed_file(filename):
     """Verifica se o arquivo tem extensão permitida"""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
+    ext = os.path.splitext(filename)[1][1:].lower()
+    return ext in ALLOWED_EXTENSIONS
+
+
 
 
-def cleanup_folders():
-    """Limpa as pastas de upload e output"""
-    for folder in [app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER']]:
-        if Path(folder).exists():
-            shutil.rmtree(folder)
-        Path(folder).mkdir(parents=True, exist_ok=True)
+def store_current_df(df):
+    """
+    Persiste o DataFrame atual em Arrow IPC e atualiza a visão local
+    
+    A escrita é feita em arquivo temporário + rename para que outros workers
+    nunca leiam um arquivo pela metade.
+    """
+    tmp_path = CURRENT_DF_PATH + '.tmp'
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, CURRENT_DF_PATH)
+    
+    _current_df_cache['mtime'] = os.path.getmtime(CURRENT_DF_PATH)
+    _current_df_cache['df'] = df
+
+
+def get_current_df():
+    """
+    Retorna o DataFrame atual ou None se nada foi processado
+    
+    Reabre o arquivo Arrow via memory map só quando ele foi reescrito
+    (por este ou outro worker); caso contrário devolve a visão local.
+    """
+    global cached_results_json
+    
+    try:
+        mtime = os.path.getmtime(CURRENT_DF_PATH)
+    except FileNotFoundError:
+        return None
+    
+    if _current_df_cache['mtime'] != mtime:
+        source = pa.memory_map(CURRENT_DF_PATH)
+        table = pa.ipc.open_file(source).read_all()
+        _current_df_cache['df'] = table.to_pandas()
+        _current_df_cache['mtime'] = mtime
+        cached_results_json = None
+    
+    return _current_df_cache['df']
+
+
+def _json_default(value):
+    """Serializa para o orjson os tipos que ele não conhece (ex: pd.Timestamp)"""
+    if isinstance(value, pd.Timestamp):
+        return http_date(value.to_pydatetime())
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def ojsonify(obj, status=200):
+    """
+    Equivalente ao jsonify do Flask usando orjson
+    
+    Serializa escalares numpy direto e aceita chaves não-string nos dicionários.
+    
+    Args:
+        obj: Objeto a ser serializado
+        status: Código HTTP da resposta
+        
+    Returns:
+        Response com o JSON
+    """
+    body = orjson.dumps(
+        obj,
+        default=_json_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+    return Response(body, status=status, mimetype='application/json')
+
+
+class OFXUploadTarget(BaseTarget):
+    """
+    Target do streaming-form-data que grava cada arquivo enviado no campo
+    direto em disco, bloco a bloco, sem bufferizar o upload em memória
+    """
+    
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.file_paths = []
+        self.rejected = []
+        self.received = 0
+        self._fd = None
+    
+    def on_start(self):
+        self.received += 1
+        filename = self.multipart_filename or ''
+        
+        # Arquivo vazio (nenhum selecionado) ou extensão não permitida: descarta os dados
+        if not filename or not allowed_file(filename):
+            if filename:
+                self.rejected.append(filename)
+            self._fd = None
+            return
+        
+        filepath = os.path.join(self.directory, secure_filename(filename))
+        self._fd = open(filepath, 'wb')
+        self.file_paths.append(filepath)
+    
+    def on_data_received(self, chunk: bytes):
+        if self._fd is not None:
+            self._fd.write(chunk)
+    
+    def on_finish(self):
+        if self._fd is not None:
+            self._fd.close()
+            self._fd = None
+
+
+def create_upload_dir():
+    """
+    Cria uma pasta exclusiva para os arquivos de uma requisição de upload
+    
+    Cada requisição grava em sua própria pasta, então uploads simultâneos
+    não apagam nem sobrescrevem os arquivos uns dos outros.
+    
+    Returns:
+        Caminho da pasta criada
+    """
+    upload_dir = Path(app.config['UPLOAD_FOLDER']) / uuid.uuid4().hex
+    upload_dir.mkdir(parents=True)
+    return str(upload_dir)
+
+
+def discard_upload_dir(upload_dir):
+    """Remove em background a pasta de upload de uma requisição já processada"""
+    CLEANUP_EXECUTOR.submit(shutil.rmtree, upload_dir, ignore_errors=True)
 
 
 @app.route('/')
@@ -58,117 +224,204 @@ def index():
     return render_template('index.html')
 
 
+def run_pipeline(file_paths, upload_dir):
+    """
+    Executa as camadas RAW -> TRUSTED -> BUSINESS sobre os arquivos já salvos
+    
+    Args:
+        file_paths: Caminhos dos arquivos OFX salvos na pasta de upload
+        upload_dir: Pasta da requisição, usada também para o JSON intermediário
+        
+    Returns:
+        Resposta JSON com o resultado do processamento
+    """
+    global current_categories, cached_results_json
+    
+    cached_results_json = None
+    
+    print(f"\n{'='*60}")
+    print(f"🚀 INICIANDO PROCESSAMENTO")
+    print(f"{'='*60}")
+    print(f"📁 Arquivos recebidos: {len(file_paths)}")
+    for fp in file_paths:
+        print(f"   - {os.path.basename(fp)}")
+    
+    # ==== CAMADA RAW: Processa arquivos OFX e gera Parquet ====
+    raw_layer = RawLayer()
+    raw_path = os.path.join(upload_dir, 'raw_transactions.parquet')
+    
+    raw_result = raw_layer.execute(file_paths, raw_path)
+    
+    # ==== CAMADA TRUSTED: Transforma Parquet em DataFrame ====
+    trusted_layer = TrustedLayer()
+    df = trusted_layer.execute(raw_path)
+    
+    # ==== CAMADA BUSINESS: Classifica transações com IA ====
+    # Classifica no próprio DataFrame da TRUSTED (sem cópia) e libera as referências intermediárias
+    business_layer = BusinessLayer(regra_path='./src/prompts/regra.json')
+    try:
+        df_classificado = business_layer.execute(df, inplace=True)
+    finally:
+        business_layer.close()
+    del df, trusted_layer
+    
+    # Adiciona índice único para cada transação; o índice do pandas passa a ser
+    # o mesmo valor (RangeIndex), então a transação i é localizada direto por .loc[i]
+    df_classificado.index = pd.RangeIndex(len(df_classificado))
+    df_classificado['index'] = pd.to_numeric(df_classificado.index.to_series(), downcast='integer')
+    
+    # Categorias do dropdown (carregadas uma única vez na inicialização)
+    current_categories = ALL_CATEGORIES
+    
+    # Guarda a classificação como Categorical: cada rótulo é armazenado uma
+    # única vez e as linhas guardam apenas o código inteiro. As categorias são
+    # as do dropdown + eventuais rótulos sugeridos fora dele.
+    classificacoes = df_classificado['classificacao_sugerida']
+    extras = sorted(set(classificacoes.dropna().unique()) - set(current_categories))
+    df_classificado['classificacao_sugerida'] = pd.Categorical(
+        classificacoes, categories=list(current_categories) + extras
+    )
+    
+    # Armazena DataFrame (Arrow IPC) e categorias globalmente
+    store_current_df(df_classificado)
+    
+    # Salva resultado final em Parquet (o Excel só é gerado no download)
+    output_parquet = os.path.join(app.config['OUTPUT_FOLDER'], 'classified_transactions.parquet')
+    business_layer.save_to_parquet(df_classificado, output_parquet)
+    
+    # Libera os intermediários do pipeline antes de responder; o DataFrame
+    # atual continua acessível via _current_df_cache
+    total_transactions = len(df_classificado)
+    del df_classificado, classificacoes, raw_layer, raw_result, business_layer
+    gc.collect()
+    
+    print(f"\n{'='*60}")
+    print(f"✅ PROCESSAMENTO CONCLUÍDO COM SUCESSO!")
+    print(f"{'='*60}\n")
+    
+    return ojsonify({
+        'success': True,
+        'message': f'✅ Processamento concluído! {total_transactions} transações classificadas.',
+        'total_files': len(file_paths),
+        'total_transactions': total_transactions,
+        'redirect': '/results'
+    }, 200)
+
+
 @app.route('/process', methods=['POST'])
 def process_files():
     """Processa os arquivos OFX enviados"""
-    global current_df, current_categories
-    
+    upload_dir = None
     try:
-        # Verifica se há arquivos na requisição
-        if 'files' not in request.files:
-            return jsonify({'error': 'Nenhum arquivo enviado'}), 400
-        
-        files = request.files.getlist('files')
-        
-        if not files or files[0].filename == '':
-            return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
-        
-        # Limpa pastas antes de processar
-        cleanup_folders()
-        
-        # Salva os arquivos enviados
-        file_paths = []
-        for file in files:
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                file_paths.append(filepath)
-            else:
-                return jsonify({
-                    'error': f'Arquivo não permitido: {file.filename}. Apenas arquivos .ofx são aceitos.'
-                }), 400
+        # Lê o corpo multipart em blocos e grava os arquivos direto em disco,
+        # sem passar pelo MultiPartParser do Werkzeug
+        try:
+            parser = StreamingFormDataParser(headers=request.headers)
+        except ParseFailedException:
+            return ojsonify({'error': 'Nenhum arquivo enviado'}, 400)
+        
+        upload_dir = create_upload_dir()
+        
+        target = OFXUploadTarget(upload_dir)
+        parser.register('files', target)
+        
+        chunk_size = app.config['UPLOAD_CHUNK_SIZE']
+        while True:
+            chunk = request.stream.read(chunk_size)
+            if not chunk:
+                break
+            parser.data_received(chunk)
+        
+        if target.received == 0:
+            return ojsonify({'error': 'Nenhum arquivo enviado'}, 400)
+        
+        if target.rejected:
+            return ojsonify({
+                'error': f'Arquivo não permitido: {target.rejected[0]}. Apenas arquivos .ofx são aceitos.'
+            }, 400)
+        
+        file_paths = target.file_paths
         
         if not file_paths:
-            return jsonify({'error': 'Nenhum arquivo OFX válido foi enviado'}), 400
-        
-        print(f"\n{'='*60}")
-        print(f"🚀 INICIANDO PROCESSAMENTO")
-        print(f"{'='*60}")
-        print(f"📁 Arquivos recebidos: {len(file_paths)}")
-        for fp in file_paths:
-            print(f"   - {os.path.basename(fp)}")
-        
-        # ==== CAMADA RAW: Processa arquivos OFX e gera JSON ====
-        raw_layer = RawLayer()
-        json_path = os.path.join(app.config['OUTPUT_FOLDER'], 'raw_transactions.json')
-        raw_result = raw_layer.execute(file_paths, json_path)
-        
-        # ==== CAMADA TRUSTED: Transforma JSON em DataFrame ====
-        trusted_layer = TrustedLayer()
-        df = trusted_layer.execute(json_path)
-        
-        # ==== CAMADA BUSINESS: Classifica transações com IA ====
-        business_layer = BusinessLayer(regra_path='./src/prompts/regra.json')
-        df_classificado = business_layer.execute(df)
-        
-        # Adiciona índice único para cada transação
-        df_classificado['index'] = range(len(df_classificado))
-        
-        # Carrega categorias estruturadas do arquivo catetegorias.json
-        with open('./src/prompts/catetegorias.json', 'r', encoding='utf-8') as f:
-            categorias_data = json.load(f)
-        
-        # Extrai todas as subcontas para usar no dropdown
-        categories_list = []
-        for grupo in categorias_data['grupos']:
-            for subconta in grupo['subcontas']:
-                # Formato: "codigo - descricao"
-                categories_list.append(f"{subconta['codigo']} - {subconta['descricao']}")
-        
-        # Armazena DataFrame e categorias globalmente
-        current_df = df_classificado
-        current_categories = sorted(categories_list)  # Ordena alfabeticamente
-        
-        # Salva resultado final em Excel
-        output_excel = os.path.join(app.config['OUTPUT_FOLDER'], 'classified_transactions.xlsx')
-        business_layer.save_to_excel(df_classificado, output_excel)
+            return ojsonify({'error': 'Nenhum arquivo OFX válido foi enviado'}, 400)
         
-        print(f"\n{'='*60}")
-        print(f"✅ PROCESSAMENTO CONCLUÍDO COM SUCESSO!")
-        print(f"{'='*60}\n")
+        return run_pipeline(file_paths, upload_dir)
         
-        return jsonify({
-            'success': True,
-            'message': f'✅ Processamento concluído! {len(df_classificado)} transações classificadas.',
-            'total_files': len(file_paths),
-            'total_transactions': len(df_classificado),
-            'redirect': '/results'
-        }), 200
+    except Exception as e:
+        print(f"\n❌ ERRO NO PROCESSAMENTO: {str(e)}\n")
+        return ojsonify({'error': f'Erro ao processar arquivos: {str(e)}'}, 500)
+    finally:
+        if upload_dir is not None:
+            discard_upload_dir(upload_dir)
+
+
+@app.route('/process-stream', methods=['POST'])
+def process_stream():
+    """
+    Processa um único arquivo OFX enviado como application/octet-stream
+    
+    O nome do arquivo vem no header X-Filename (URL-encoded) e o corpo da requisição é
+    copiado direto para o disco, sem multipart nem arquivo temporário.
+    """
+    upload_dir = None
+    try:
+        filename = unquote(request.headers.get('X-Filename', ''))
+        
+        if not filename:
+            return ojsonify({'error': 'Nenhum arquivo selecionado'}, 400)
+        
+        if not allowed_file(filename):
+            return ojsonify({
+                'error': f'Arquivo não permitido: {filename}. Apenas arquivos .ofx são aceitos.'
+            }, 400)
+        
+        upload_dir = create_upload_dir()
+        
+        filepath = os.path.join(upload_dir, secure_filename(filename))
+        with open(filepath, 'wb') as f:
+            shutil.copyfileobj(request.stream, f, length=app.config['UPLOAD_CHUNK_SIZE'])
+        
+        return run_pipeline([filepath], upload_dir)
         
     except Exception as e:
         print(f"\n❌ ERRO NO PROCESSAMENTO: {str(e)}\n")
-        return jsonify({'error': f'Erro ao processar arquivos: {str(e)}'}), 500
+        return ojsonify({'error': f'Erro ao processar arquivos: {str(e)}'}, 500)
+    finally:
+        if upload_dir is not None:
+            discard_upload_dir(upload_dir)
 
 
 @app.route('/download')
 def download_file():
     """Faz download do arquivo Excel gerado"""
     try:
+        output_parquet = os.path.join(app.config['OUTPUT_FOLDER'], 'classified_transactions.parquet')
         output_excel = os.path.join(app.config['OUTPUT_FOLDER'], 'classified_transactions.xlsx')
         
-        if not Path(output_excel).exists():
-            return jsonify({'error': 'Arquivo não encontrado. Execute o processamento primeiro.'}), 404
+        if not Path(output_parquet).exists():
+            return ojsonify({'error': 'Arquivo não encontrado. Execute o processamento primeiro.'}, 404)
+        
+        # Converte o Parquet para Excel sob demanda; reaproveita o .xlsx
+        # enquanto ele for mais novo que o Parquet
+        if (not Path(output_excel).exists()
+                or os.path.getmtime(output_excel) < os.path.getmtime(output_parquet)):
+            BusinessLayer.save_to_excel(pd.read_parquet(output_parquet), output_excel)
         
+        # Requisição condicional (ETag/Last-Modified) evita reenviar o mesmo
+        # arquivo; o servidor WSGI pode usar wsgi.file_wrapper (sendfile)
         return send_file(
             output_excel,
             as_attachment=True,
             download_name='transacoes_classificadas.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            conditional=True,
+            etag=True,
+            last_modified=os.path.getmtime(output_excel),
+            max_age=0
         )
         
     except Exception as e:
-        return jsonify({'error': f'Erro ao baixar arquivo: {str(e)}'}), 500
+        return ojsonify({'error': f'Erro ao baixar arquivo: {str(e)}'}, 500)
 
 
 @app.route('/results')
@@ -180,82 +433,113 @@ def results():
 @app.route('/api/results')
 def api_results():
     """Retorna os dados processados em JSON"""
-    global current_df, current_categories
+    global current_categories, cached_results_json
     
+    current_df = get_current_df()
     if current_df is None:
-        return jsonify({'error': 'Nenhum dado processado. Execute o processamento primeiro.'}), 404
+        return ojsonify({'error': 'Nenhum dado processado. Execute o processamento primeiro.'}, 404)
+    
+    # Reaproveita o JSON já serializado enquanto o DataFrame não mudar
+    if cached_results_json is not None:
+        return Response(cached_results_json, status=200, mimetype='application/json')
     
     try:
-        # Converte DataFrame para lista de dicionários
-        transactions = current_df.to_dict('records')
-        
-        # Converte valores numpy para tipos Python nativos
-        for t in transactions:
-            for key, value in t.items():
-                if pd.isna(value):
-                    t[key] = None
-                elif hasattr(value, 'item'):  # numpy types
-                    t[key] = value.item()
-        
-        return jsonify({
-            'transactions': transactions,
+        # Formato colunar: uma lista por coluna (tolist() converte a coluna
+        # inteira em C), sem repetir as chaves em cada transação
+        columns = list(current_df.columns)
+        data = []
+        category_legend = []
+        for col in columns:
+            serie = current_df[col]
+            if col == 'classificacao_sugerida':
+                # A classificação vai como código inteiro (-1 = sem classificação);
+                # o texto de cada código está em 'category_legend'
+                classificacao = serie.astype('category')
+                values = classificacao.cat.codes.tolist()
+                category_legend = list(classificacao.cat.categories)
+            elif serie.hasnans:
+                # NaN/NaT viram None
+                values = serie.astype(object).where(serie.notna(), None).tolist()
+            else:
+                values = serie.tolist()
+            data.append(values)
+        
+        body = orjson.dumps({
+            'columns': columns,
+            'data': data,
             'categories': current_categories,
-            'total': len(transactions)
-        }), 200
+            'category_legend': category_legend,
+            'total': len(current_df)
+        }, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+        cached_results_json = body
+        
+        return Response(body, status=200, mimetype='application/json')
         
     except Exception as e:
-        return jsonify({'error': f'Erro ao buscar resultados: {str(e)}'}), 500
+        return ojsonify({'error': f'Erro ao buscar resultados: {str(e)}'}, 500)
 
 
 @app.route('/api/save', methods=['POST'])
 def api_save():
     """Salva as edições feitas pelo usuário"""
-    global current_df
+    global cached_results_json
     
+    current_df = get_current_df()
     if current_df is None:
-        return jsonify({'error': 'Nenhum dado processado.'}), 404
+        return ojsonify({'error': 'Nenhum dado processado.'}, 404)
     
     try:
         data = request.get_json()
         edits = data.get('edits', {})
         
         if not edits:
-            return jsonify({'error': 'Nenhuma edição foi enviada.'}), 400
+            return ojsonify({'error': 'Nenhuma edição foi enviada.'}, 400)
         
-        # Aplica as edições no DataFrame
-        for index_str, new_classification in edits.items():
-            index = int(index_str)
-            if index in current_df['index'].values:
-                current_df.loc[current_df['index'] == index, 'classificacao_sugerida'] = new_classification
+        # O DataFrame vai mudar: descarta o JSON em cache de /api/results
+        cached_results_json = None
         
-        # Salva o DataFrame atualizado em Excel
-        output_excel = os.path.join(app.config['OUTPUT_FOLDER'], 'classified_transactions.xlsx')
-        current_df.to_excel(output_excel, index=False, engine='openpyxl')
+        # Aplica todas as edições em uma única atribuição vetorizada; o índice
+        # do DataFrame é a própria coluna 'index' (ids fora dele são ignorados)
+        edits_series = pd.Series({int(k): v for k, v in edits.items()}, dtype=object)
+        edits_series = edits_series[edits_series.index.isin(current_df.index)]
+        
+        # Rótulos novos precisam existir nas categorias antes da atribuição
+        classificacao = current_df['classificacao_sugerida']
+        if isinstance(classificacao.dtype, pd.CategoricalDtype):
+            novas = pd.Index(edits_series.dropna().unique()).difference(classificacao.cat.categories)
+            if len(novas) > 0:
+                current_df['classificacao_sugerida'] = classificacao.cat.add_categories(novas)
+        
+        current_df.loc[edits_series.index, 'classificacao_sugerida'] = edits_series.values
+        
+        store_current_df(current_df)
+        
+        # Salva o DataFrame atualizado em Parquet
+        output_parquet = os.path.join(app.config['OUTPUT_FOLDER'], 'classified_transactions.parquet')
+        current_df.to_parquet(output_parquet, engine='pyarrow', compression='zstd', index=False)
         
         print(f"✅ {len(edits)} edições salvas com sucesso!")
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': f'✅ {len(edits)} alterações salvas com sucesso!',
             'edited_count': len(edits)
-        }), 200
+        }, 200)
         
     except Exception as e:
-        return jsonify({'error': f'Erro ao salvar: {str(e)}'}), 500
+        return ojsonify({'error': f'Erro ao salvar: {str(e)}'}, 500)
 
 
 @app.route('/health')
 def health():
     """Endpoint de health check"""
-    return jsonify({'status': 'ok', 'message': 'Servidor funcionando'}), 200
+    return ojsonify({'status': 'ok', 'message': 'Servidor funcionando'}, 200)
 
 
 @app.route('/relatorio')
 def relatorio():
     """Página do relatório financeiro executivo com DADOS REAIS dos arquivos OFX"""
-    global current_df
-    
-    if current_df is None:
+    if get_current_df() is None:
         return render_template('index.html')
     
     # Usar template novo que exibe APENAS dados reais dos arquivos OFX
@@ -266,9 +550,7 @@ def relatorio():
 @app.route('/relatorio-executivo-mockup')
 def relatorio_executivo_mockup():
     """Template antigo com dados de exemplo (apenas para referência visual)"""
-    global current_df
-    
-    if current_df is None:
+    if get_current_df() is None:
         return render_template('index.html')
     
     # Template antigo com dados hardcoded - mantido apenas para referência
@@ -276,106 +558,297 @@ def relatorio_executivo_mockup():
     return render_template('relatorio_executivo.html')
 
 
-@app.route('/api/relatorio')
-def api_relatorio():
-    """API que retorna dados do relatório financeiro"""
-    global current_df, cached_report
+def load_cached_report(fp):
+    """
+    Retorna o relatório em cache para o fingerprint ou None
     
-    if current_df is None:
-        return jsonify({'error': 'Nenhum dado processado'}), 404
+    Procura primeiro na cópia local do worker e depois no disco, onde pode
+    ter sido gravado por outro worker (inclusive depois de a IA ter falhado aqui).
+    """
+    report = REPORT_CACHE.get(fp)
+    if report is not None and 'error' not in report.get('strategic_report', {}):
+        return report
     
     try:
-        # Gera análise financeira (dados reais)
-        analyzer = FinancialAnalyzer()
-        report = analyzer.generate_full_report(current_df)
+        with open(os.path.join(REPORT_CACHE_DIR, f'{fp}.pkl'), 'rb') as f:
+            report = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️  Relatório em cache inválido ({fp[:8]}): {e}")
+        return None
+    
+    _remember_report(fp, report)
+    return report
+
 
-        # Gera análise estratégica com IA para a TELA também
+def store_cached_report(fp, report):
+    """
+    Guarda o relatório no cache local e em disco (arquivo temporário + rename)
+    
+    Mantém apenas os REPORT_CACHE_MAX_ENTRIES relatórios mais recentes.
+    """
+    _remember_report(fp, report)
+    
+    try:
+        Path(REPORT_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=REPORT_CACHE_DIR, suffix='.tmp', delete=False) as f:
+            pickle.dump(report, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, os.path.join(REPORT_CACHE_DIR, f'{fp}.pkl'))
+        
+        antigos = sorted(Path(REPORT_CACHE_DIR).glob('*.pkl'), key=lambda p: p.stat().st_mtime)
+        for antigo in antigos[:-REPORT_CACHE_MAX_ENTRIES]:
+            antigo.unlink(missing_ok=True)
+    except Exception as e:
+        print(f"⚠️  Não foi possível salvar o relatório em cache: {e}")
+
+
+def _remember_report(fp, report):
+    """Guarda o relatório na cópia local do worker, descartando os mais antigos"""
+    REPORT_CACHE[fp] = report
+    while len(REPORT_CACHE) > REPORT_CACHE_MAX_ENTRIES:
+        REPORT_CACHE.pop(next(iter(REPORT_CACHE)))
+
+
+def fingerprint(df):
+    """
+    Impressão digital do conteúdo de um DataFrame (mesmos dados -> mesmo hash)
+    
+    Args:
+        df: DataFrame com as transações
+        
+    Returns:
+        Hash hexadecimal de 32 caracteres
+    """
+    hashes = pd.util.hash_pandas_object(df, index=False).values
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+
+def _build_report(current_df):
+    """
+    Gera o relatório completo (financeiro + estratégico com IA)
+    
+    Args:
+        current_df: DataFrame com as transações classificadas
+        
+    Returns:
+        Dicionário do relatório, com a análise estratégica em 'strategic_report'
+    """
+    # Gera análise financeira (dados reais)
+    analyzer = FinancialAnalyzer()
+    report = analyzer.generate_full_report(current_df)
+    
+    # Gera análise estratégica com IA para a TELA também
+    try:
+        from src.layers.strategic_analyzer import StrategicAnalyzer
+        strategic_analyzer = StrategicAnalyzer()
         try:
-            from src.layers.strategic_analyzer import StrategicAnalyzer
-            strategic_analyzer = StrategicAnalyzer()
             strategic_report = strategic_analyzer.generate_full_strategic_report(
                 financial_summary=report['sumario'],
                 monthly_analysis=report['tendencia_mensal'],
                 category_analysis=report['analise_categorias']
             )
-            report['strategic_report'] = strategic_report
-        except Exception as ia_err:
-            # Não derruba a API se a IA falhar; apenas registra a mensagem
-            print(f"\n❌ ERRO AO GERAR ANÁLISE ESTRATÉGICA: {str(ia_err)}")
-            import traceback
-            traceback.print_exc()
-            report['strategic_report'] = {
-                'error': f'Falha ao gerar análise estratégica: {str(ia_err)}'
-            }
-        
-        # Armazena em cache para reaproveitar no PDF sem reexecutar IA
-        cached_report = report
-        
-        # Adiciona headers para desabilitar cache no navegador
-        response = jsonify(report)
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
+        finally:
+            strategic_analyzer.close()
+        report['strategic_report'] = strategic_report
+    except Exception as ia_err:
+        # Não derruba a API se a IA falhar; apenas registra a mensagem
+        print(f"\n❌ ERRO AO GERAR ANÁLISE ESTRATÉGICA: {str(ia_err)}")
+        import traceback
+        traceback.print_exc()
+        report['strategic_report'] = {
+            'error': f'Falha ao gerar análise estratégica: {str(ia_err)}'
+        }
+    
+    return report
+
+
+@app.route('/api/relatorio')
+def api_relatorio():
+    """API que retorna dados do relatório financeiro"""
+    current_df = get_current_df()
+    if current_df is None:
+        return ojsonify({'error': 'Nenhum dado processado'}, 404)
+    
+    try:
+        # Reaproveita o relatório (e a chamada de IA) quando os dados são os mesmos
+        fp = fingerprint(current_df)
+        
+        # O navegador já tem o relatório completo destes dados: nada a fazer
+        if request.if_none_match.contains(fp):
+            return Response(status=304)
+        
+        report = load_cached_report(fp)
+        
+        # Sem cache, ou a IA falhou da última vez: gera de novo
+        if report is None or 'error' in report['strategic_report']:
+            report = _build_report(current_df)
+            store_cached_report(fp, report)
+        else:
+            print(f"\n📦 Relatório em cache para os dados atuais ({fp[:8]})")
+        
+        # O navegador guarda o relatório mas sempre revalida com o servidor;
+        # o ETag (fingerprint dos dados) só é enviado quando a IA respondeu,
+        # para que um relatório com erro seja gerado de novo no próximo acesso
+        response = ojsonify(report)
+        response.headers['Cache-Control'] = 'no-cache'
+        if 'error' not in report['strategic_report']:
+            response.set_etag(fp)
         return response, 200
     except Exception as e:
-        return jsonify({'error': f'Erro ao gerar relatório: {str(e)}'}), 500
+        return ojsonify({'error': f'Erro ao gerar relatório: {str(e)}'}, 500)
+
+
+def _build_pdf(current_df, report, pdf_path):
+    """
+    Gera o PDF executivo em background (executado no EXECUTOR)
+    
+    Args:
+        current_df: DataFrame com as transações classificadas
+        report: Relatório em cache (com 'strategic_report') ou None
+        pdf_path: Caminho final do PDF
+        
+    Returns:
+        Caminho do PDF gerado
+    """
+    # Usa o relatório em cache (gerado pela página /api/relatorio) para NÃO reexecutar a IA
+    # Caso o cache não exista, gera apenas a parte financeira (sem IA)
+    if report is not None:
+        print("\n📦 Usando relatório em cache para gerar PDF (sem reexecutar IA)...")
+        financial_report = dict(report)
+        strategic_report = report.get('strategic_report', {
+            'key_events': [],
+            'swot': {
+                'forcas': [], 'fraquezas': [], 'oportunidades': [], 'ameacas': []
+            },
+            'action_plans': [],
+            'revenue_analysis': {'analise_completa': ''},
+            '_meta': {'generated_at': None}
+        })
+        # Remove a chave estratégica do bloco financeiro, se existir
+        financial_report.pop('strategic_report', None)
+    else:
+        print("\n⚠️ Cache vazio. Gerando SOMENTE a análise financeira para o PDF (sem IA)...")
+        analyzer = FinancialAnalyzer()
+        financial_report = analyzer.generate_full_report(current_df)
+        strategic_report = {
+            'key_events': [],
+            'swot': {
+                'forcas': [], 'fraquezas': [], 'oportunidades': [], 'ameacas': []
+            },
+            'action_plans': [],
+            'revenue_analysis': {'analise_completa': ''},
+            '_meta': {'generated_at': None}
+        }
+    
+    # Gera PDF executivo V2 (com dados reais) em arquivo temporário + rename,
+    # para que o PDF nunca seja servido pela metade
+    print("📄 Gerando PDF executivo...")
+    from src.utils.executive_pdf_generator_v2 import ExecutivePDFGeneratorV2
+    tmp_path = pdf_path + '.tmp'
+    executive_pdf = ExecutivePDFGeneratorV2()
+    executive_pdf.generate_executive_report(financial_report, strategic_report, tmp_path)
+    os.replace(tmp_path, pdf_path)
+    print(f"✅ PDF executivo salvo: {pdf_path}")
+    
+    return pdf_path
+
+
+def _job_path(job_id, ext):
+    """
+    Caminho de um arquivo de estado de um job de PDF
+    
+    'pending' existe enquanto o PDF é gerado, 'error' guarda a mensagem de
+    falha e 'pdf' é o resultado.
+    """
+    return os.path.join(app.config['OUTPUT_FOLDER'], f'relatorio_executivo_{job_id}.{ext}')
+
+
+def _run_pdf_job(job_id, current_df, report):
+    """Executa _build_pdf no EXECUTOR, registrando o resultado nos arquivos do job"""
+    try:
+        _build_pdf(current_df, report, _job_path(job_id, 'pdf'))
+    except Exception as e:
+        print(f"❌ Erro ao gerar PDF (job {job_id[:8]}): {str(e)}")
+        Path(_job_path(job_id, 'error')).write_text(str(e), encoding='utf-8')
+    finally:
+        # O .pdf/.error já existe quando o .pending some: quem consulta nunca fica sem estado
+        Path(_job_path(job_id, 'pending')).unlink(missing_ok=True)
+
+
+def _purge_old_jobs():
+    """Apaga arquivos de jobs de PDF mais antigos que PDF_JOB_MAX_AGE"""
+    limite = time.time() - PDF_JOB_MAX_AGE
+    for path in Path(app.config['OUTPUT_FOLDER']).glob('relatorio_executivo_*'):
+        try:
+            if path.stat().st_mtime < limite:
+                path.unlink()
+        except FileNotFoundError:
+            pass
 
 
 @app.route('/relatorio/download')
 def download_relatorio():
-    """Download do relatório executivo em PDF com análises REAIS"""
-    global current_df, cached_report
+    """
+    Agenda a geração do PDF executivo em background
     
+    Returns:
+        JSON com o job_id e a URL a ser consultada até o PDF ficar pronto
+    """
+    current_df = get_current_df()
     if current_df is None:
-        return jsonify({'error': 'Nenhum dado processado'}), 404
+        return ojsonify({'error': 'Nenhum dado processado'}, 404)
+    
+    _purge_old_jobs()
+    
+    job_id = uuid.uuid4().hex
+    report = load_cached_report(fingerprint(current_df))
+    Path(_job_path(job_id, 'pending')).touch()
+    EXECUTOR.submit(_run_pdf_job, job_id, current_df, report)
+    
+    return ojsonify({
+        'job_id': job_id,
+        'status_url': f'/relatorio/download/{job_id}'
+    }, 202)
+
+
+@app.route('/relatorio/download/<job_id>')
+def download_relatorio_job(job_id):
+    """
+    Retorna o PDF de um job de geração
+    
+    Responde 202 enquanto o PDF ainda está sendo gerado. O estado vem dos
+    arquivos do job, então a consulta pode cair em qualquer worker. O PDF é
+    apagado depois de enviado.
+    """
+    pdf_path = _job_path(job_id, 'pdf')
+    error_path = _job_path(job_id, 'error')
     
+    # O PDF (poucas dezenas de KB) é lido para a memória e apagado antes do envio
     try:
-        # Usa o relatório em cache (gerado pela página /api/relatorio) para NÃO reexecutar a IA
-        # Caso o cache não exista, gera apenas a parte financeira (sem IA)
-        if cached_report is not None:
-            print("\n� Usando relatório em cache para gerar PDF (sem reexecutar IA)...")
-            financial_report = dict(cached_report)
-            strategic_report = cached_report.get('strategic_report', {
-                'key_events': [],
-                'swot': {
-                    'forcas': [], 'fraquezas': [], 'oportunidades': [], 'ameacas': []
-                },
-                'action_plans': [],
-                'revenue_analysis': {'analise_completa': ''},
-                'generated_at': None
-            })
-            # Remove a chave estratégica do bloco financeiro, se existir
-            financial_report.pop('strategic_report', None)
-        else:
-            print("\n⚠️ Cache vazio. Gerando SOMENTE a análise financeira para o PDF (sem IA)...")
-            analyzer = FinancialAnalyzer()
-            financial_report = analyzer.generate_full_report(current_df)
-            strategic_report = {
-                'key_events': [],
-                'swot': {
-                    'forcas': [], 'fraquezas': [], 'oportunidades': [], 'ameacas': []
-                },
-                'action_plans': [],
-                'revenue_analysis': {'analise_completa': ''},
-                'generated_at': None
-            }
-        
-        # Gera PDF executivo V2 (com dados reais)
-        print("📄 Gerando PDF executivo...")
-        pdf_path = os.path.join(app.config['OUTPUT_FOLDER'], 'relatorio_executivo.pdf')
-        from src.utils.executive_pdf_generator_v2 import ExecutivePDFGeneratorV2
-        executive_pdf = ExecutivePDFGeneratorV2()
-        executive_pdf.generate_executive_report(financial_report, strategic_report, pdf_path)
-        
-        # Retorna PDF
+        pdf_bytes = Path(pdf_path).read_bytes()
+        Path(pdf_path).unlink(missing_ok=True)
+    except FileNotFoundError:
+        pdf_bytes = None
+    
+    if pdf_bytes is not None:
         return send_file(
-            pdf_path,
+            io.BytesIO(pdf_bytes),
             mimetype='application/pdf',
             as_attachment=True,
-            download_name=f'relatorio_executivo_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}.pdf'
+            download_name=f'relatorio_executivo_{pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")}.pdf',
+            max_age=0
         )
-    except Exception as e:
-        return jsonify({'error': f'Erro ao gerar PDF: {str(e)}'}), 500
+    
+    if os.path.exists(error_path):
+        error = Path(error_path).read_text(encoding='utf-8')
+        Path(error_path).unlink(missing_ok=True)
+        return ojsonify({'error': f'Erro ao gerar PDF: {error}'}, 500)
+    
+    if os.path.exists(_job_path(job_id, 'pending')):
+        return ojsonify({'status': 'pending'}, 202)
+    
+    return ojsonify({'error': 'Job não encontrado'}, 404)
 
 
 if __name__ == '__main__':
@@ -386,4 +859,6 @@ if __name__ == '__main__':
     print("📝 Acesse o navegador para fazer upload dos arquivos OFX")
     print("="*60 + "\n")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Debug (e o reloader) só em desenvolvimento; em produção use o gunicorn (gunicorn.conf.py)
+    debug = os.environ.get('FLASK_ENV') == 'development'
+    app.run(debug=debug, host='0.0.0.0', port=5000)
@@ -0,0 +1,29 @@
+"""
+Configuração do gunicorn para produção
+
+Uso: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Um worker com várias threads: as requisições passam a maior parte do tempo
+# esperando a IA ou o upload, e o parsing dos OFX (CPU) já roda em processos
+# próprios, que usam todos os núcleos. O estado compartilhado (DataFrame atual,
+# relatórios em cache e jobs de PDF) fica em disco em output/, então é possível
+# subir mais workers com WEB_CONCURRENCY. O custo: cada worker mantém sua
+# própria cópia do DataFrame e dos relatórios e seu próprio pool de parsing,
+# que passam a disputar memória e núcleos
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+worker_class = 'gthread'
+threads = 8
+
+# Processamento com IA e geração de relatórios podem levar alguns minutos
+timeout = 300
+
+# Carrega a aplicação antes do fork: módulos e dados de inicialização são
+# compartilhados entre os workers via copy-on-write. Threads e processos
+# auxiliares (EXECUTOR, forkserver do parsing) só são criados no primeiro uso,
+# já dentro de cada worker
+preload_app = True
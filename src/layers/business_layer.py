@@ -3,24 +3,251 @@ BUSINESS LAYER - Camada de Negócio
 Responsável pela classificação inteligente de transações usando IA
 """
 
+import re
 import json
 import asyncio
+import functools
+import importlib.util
+import httpx
+import numpy as np
 import pandas as pd
-from typing import Optional, Literal, Dict, Any, List
-from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List, Tuple
 from tqdm import tqdm
 from dotenv import load_dotenv
+from openai import AsyncOpenAI
 from langchain_openai import ChatOpenAI
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import convert_to_openai_messages
+from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from src.utils.ai_decision_logger import get_logger
-
-# Configurar nest_asyncio para permitir loops aninhados
-import nest_asyncio
-nest_asyncio.apply()
+from src.utils.llm_cache import LLMResponseCache
 
 load_dotenv()
 
+# xlsxwriter é opcional: permite gravar Excel grande em streaming (constant_memory)
+_HAS_XLSXWRITER = importlib.util.find_spec("xlsxwriter") is not None
+
+
+# Regras de negócio aplicadas antes da IA, em ordem de prioridade (a primeira
+# que casar vence). Cada regra casa se algum padrão aparece na descrição em
+# maiúsculas e sem acentos; com "origem" definida, "se_origem" vale quando a origem é igual e
+# "senao" caso contrário. Ramos: (classificação, explicação, raciocínio do log
+# ou None para não logar). "nome" identifica a regra na regex combinada
+REGRAS_DESCRICAO = [
+    # Regra ESPECIAL: Transferência entre contas próprias (BODY STATION e J E MADEIRA)
+    {
+        "nome": "transf_propria",
+        "padroes": ["BODY STATION ACADEMIA", "J E MADEIRA A"],
+        "origem": "CAR",
+        "se_origem": (
+            "(+) Transferencia Entre Contas",
+            "Transferência entre contas próprias identificada (entrada)",
+            "Regra: Transferência entre contas próprias (BODY STATION/J E MADEIRA) - Entrada (CAR)"
+        ),
+        "senao": (
+            "(-) Transferencia Entre Contas",
+            "Transferência entre contas próprias identificada (saída)",
+            "Regra: Transferência entre contas próprias (BODY STATION/J E MADEIRA) - Saída (CAP)"
+        ),
+    },
+    # Regra: Rende Fácil (aplicação/resgate) - VERIFICAR ANTES de outras regras genéricas
+    {
+        "nome": "rende",
+        "padroes": ["RENDE FACIL"],
+        "origem": "CAR",
+        "se_origem": (
+            "Resgate Aplicação Financeira",
+            "Resgate de aplicação financeira identificado",
+            "Regra: Rende Fácil detectado + origem CAR = Resgate"
+        ),
+        "senao": (
+            "0.006 - Aplicação Financeira",
+            "Aplicação financeira identificada",
+            "Regra: Rende Fácil detectado + origem CAP = Aplicação"
+        ),
+    },
+    # Regra: Transferências genéricas PIX/TED
+    {
+        "nome": "pixted",
+        "padroes": ["PIX", "TED"],
+        "origem": "CAP",
+        "se_origem": ("Saída de Transferência", "Transferência genérica identificada (saída)", None),
+        "senao": ("Entrada de Transferência", "Transferência genérica identificada (entrada)", None),
+    },
+    # Regra: Recebimentos por cartão
+    {
+        "nome": "cartao",
+        "padroes": ["REDE", "CARTAO"],
+        "origem": None,
+        "se_origem": ("Receita com Venda de Serviços", "Recebimento via cartão/maquininha", None),
+    },
+    # Regra: Gympass
+    {
+        "nome": "gympass",
+        "padroes": ["GYMPASS"],
+        "origem": None,
+        "se_origem": ("Gympass", "Receita Gympass identificada", None),
+    },
+    # Regra: Seguros
+    {
+        "nome": "seguro",
+        "padroes": ["SEGURO"],
+        "origem": None,
+        "se_origem": ("Seguros", "Seguro identificado na descrição", None),
+    },
+    # Regra: Consórcios
+    {
+        "nome": "consorcio",
+        "padroes": ["CONSORCIO"],
+        "origem": None,
+        "se_origem": ("Consórcios", "Consórcio identificado na descrição", None),
+    },
+    # Regra: Investimentos genéricos
+    {
+        "nome": "invest",
+        "padroes": ["OUROCAP", "INVEST"],
+        "origem": None,
+        "se_origem": ("Investimento", "Investimento identificado na descrição", None),
+    },
+]
+
+# Regex única com todas as regras: um grupo nomeado por regra, testados na
+# ordem de prioridade (lookahead), de modo que m.lastgroup indica a regra
+# vencedora mesmo que outro padrão apareça antes na descrição
+_RULE_RE = re.compile(
+    "^(?:" + "|".join(
+        f"(?=.*?(?P<{regra['nome']}>{'|'.join(re.escape(p) for p in regra['padroes'])}))"
+        for regra in REGRAS_DESCRICAO
+    ) + ")",
+    re.DOTALL
+)
+_REGRAS_POR_NOME = {regra["nome"]: regra for regra in REGRAS_DESCRICAO}
+
+# Remove acentos da descrição já em maiúsculas, para que as regras precisem de
+# um único padrão por palavra (CARTAO casa "CARTÃO", CONSORCIO casa "CONSÓRCIO")
+_ACCENT_TBL = str.maketrans("ÁÀÂÃÄÉÈÊËÍÌÎÏÓÒÔÕÖÚÙÛÜÇ", "AAAAAEEEEIIIIOOOOOUUUUC")
+
+
+@functools.lru_cache(maxsize=8)
+def _carregar_regra(regra_path: str) -> Dict[str, Any]:
+    """
+    Lê o arquivo de regras uma única vez por caminho
+    
+    Args:
+        regra_path: Caminho do arquivo de regras
+        
+    Returns:
+        Conteúdo do JSON (compartilhado entre instâncias, não modificar)
+    """
+    return json.loads(Path(regra_path).read_text(encoding="utf-8"))
+
+
+def _texto_local(descricao: Any, origem: Any) -> str:
+    """
+    Monta o texto de entrada do classificador local (treino e predição)
+    
+    Args:
+        descricao: Descrição da transação
+        origem: Origem (CAR/CAP)
+        
+    Returns:
+        Origem seguida da descrição em maiúsculas e sem acentos
+    """
+    return f"{origem} {str(descricao or '').upper().translate(_ACCENT_TBL)}"
+
+
+@functools.lru_cache(maxsize=4)
+def _carregar_classificador_local(path: str, mtime: float):
+    """
+    Carrega o classificador local (pipeline scikit-learn salvo com joblib)
+    
+    Args:
+        path: Caminho do arquivo .pkl
+        mtime: Data de modificação do arquivo (recarrega se o modelo for retreinado)
+        
+    Returns:
+        Modelo com predict_proba e classes_, ou None se joblib/scikit-learn
+        não estiverem instalados (a classificação segue só com a IA)
+    """
+    try:
+        import joblib
+        return joblib.load(path)
+    except ImportError as e:
+        print(f"⚠️  Classificador local ignorado ({path}): {e}")
+        return None
+
+
+@functools.lru_cache(maxsize=8)
+def _montar_system_prompt(regra_path: str) -> str:
+    """
+    Monta o prompt de sistema a partir do arquivo de regras
+    
+    Args:
+        regra_path: Caminho do arquivo de regras
+        
+    Returns:
+        Texto do prompt de sistema
+    """
+    # As classes permitidas não entram no texto: o schema da saída estruturada
+    # (enum em _response_format_classificacao) já as envia e restringe a resposta
+    regra = _carregar_regra(regra_path)
+    instrucoes = "\n".join(f"- {instrucao}" for instrucao in regra["contexto"]["instrucoes_gerais"])
+    return f"""Você é um analista financeiro que classifica transações bancárias.
+Regras:
+{instrucoes}
+"""
+
+
+@functools.lru_cache(maxsize=8)
+def _response_format_classificacao(classes_permitidas: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    Monta o response_format (JSON Schema estrito) da saída da IA
+    
+    Args:
+        classes_permitidas: Classes aceitas em classificacao_sugerida
+        
+    Returns:
+        response_format da API de chat da OpenAI
+    """
+    schema = {
+        "type": "object",
+        "properties": {
+            "classificacao_sugerida": {
+                "type": "string",
+                "enum": list(classes_permitidas),
+                "description": "Classificação da transação."
+            },
+            "explicacao": {"type": "string", "description": "Explicação da classificação."}
+        },
+        "required": ["classificacao_sugerida", "explicacao"],
+        "additionalProperties": False
+    }
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "ClassificacaoTransacao", "schema": schema, "strict": True}
+    }
+
+
+class _ProgressoCallback(BaseCallbackHandler):
+    """Avança uma barra tqdm a cada transação concluída (ou com erro) no abatch"""
+    
+    run_inline = True
+    
+    def __init__(self, barra: tqdm):
+        self.barra = barra
+    
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs):
+        # Só a execução de topo da chain corresponde a uma transação
+        if parent_run_id is None:
+            self.barra.update(1)
+    
+    def on_chain_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self.barra.update(1)
+
 
 class BusinessLayer:
     """Classifica transações bancárias usando IA e regras de negócio"""
@@ -29,7 +256,10 @@ class BusinessLayer:
                  model: str = "gpt-4o-mini",
                  temperature: float = 0,
                  max_concurrency: int = 6,
-                 regra_path: str = "./src/prompts/regra.json"):
+                 regra_path: str = "./src/prompts/regra.json",
+                 cache_path: Optional[str] = "./src/cache/llm_cache.sqlite",
+                 local_clf_path: Optional[str] = "./src/models/tfidf_lr.pkl",
+                 local_clf_threshold: float = 0.85):
         """
         Inicializa a camada de negócio
         
@@ -38,35 +268,56 @@ class BusinessLayer:
             temperature: Temperatura para geração
             max_concurrency: Máximo de requisições simultâneas
             regra_path: Caminho do arquivo de regras
+            cache_path: Arquivo SQLite do cache de respostas da IA (None desativa)
+            local_clf_path: Classificador local treinado com treinar_classificador_local;
+                ignorado se o arquivo não existir
+            local_clf_threshold: Confiança mínima para aceitar a classe do
+                classificador local sem consultar a IA
         """
         self.model = model
         self.temperature = temperature
         self.max_concurrency = max_concurrency
+        self._cache = LLMResponseCache(cache_path) if cache_path else None
         
-        # Carrega regras de classificação
-        with open(regra_path, 'r', encoding='utf-8') as f:
-            self.regra = json.load(f)
-            self.classes_permitidas = self.regra["contexto"]["classes_permitidas"]
-        
-        # Modelo de dados para classificação
-        class ClassificacaoTransacao(BaseModel):
-            classificacao_sugerida: Literal[tuple(self.classes_permitidas)] = Field(
-                ..., description="Classificação da transação."
+        # Classificador local (opcional): resolve descrições fáceis antes da IA
+        self.local_clf_threshold = local_clf_threshold
+        self._local_clf = None
+        if local_clf_path and Path(local_clf_path).exists():
+            self._local_clf = _carregar_classificador_local(
+                local_clf_path, Path(local_clf_path).stat().st_mtime
             )
-            explicacao: str = Field(..., description="Explicação da classificação.")
         
-        self.ClassificacaoTransacao = ClassificacaoTransacao
+        # Regras, prompt e modelo de saída vêm de caches por caminho: instanciar
+        # a camada de novo (ex.: a cada requisição) não relê nem reconstrói nada
+        self.regra = _carregar_regra(regra_path)
+        self.classes_permitidas = self.regra["contexto"]["classes_permitidas"]
+        
+        # Todos os rótulos que a camada pode produzir (IA, regras e erro), na
+        # ordem: usados como categorias da coluna de classificação
+        rotulos_regras = [
+            regra[ramo][0]
+            for regra in REGRAS_DESCRICAO
+            for ramo in ("se_origem", "senao") if ramo in regra
+        ]
+        self.categorias_classificacao = list(dict.fromkeys(
+            self.classes_permitidas + rotulos_regras + ["Nao classificado"]
+        ))
+        
+        # Formato da resposta da IA: JSON Schema estrito, validado pela própria
+        # API; localmente só se confere a classe (sem modelo Pydantic por resposta)
+        self.response_format = _response_format_classificacao(tuple(self.classes_permitidas))
+        self._classes_validas = frozenset(self.classes_permitidas)
         
         # Configura o prompt
-        system_prompt = f"""
-Você é um analista financeiro especializado em classificar transações bancárias.
-
-REGRAS DE CLASSIFICAÇÃO:
-{json.dumps(self.regra["contexto"]["instrucoes_gerais"], indent=2, ensure_ascii=False)}
-
-CLASSES PERMITIDAS:
-{json.dumps(self.classes_permitidas, indent=2, ensure_ascii=False)}
-"""
+        system_prompt = _montar_system_prompt(regra_path)
+        
+        # Muda quando o prompt, as classes ou o schema de saída mudam, invalidando o
+        # cache de respostas (as classes não fazem mais parte do system prompt)
+        self._prompt_digest = LLMResponseCache.make_key(
+            system_prompt,
+            "\x1f".join(sorted(self.classes_permitidas)),
+            json.dumps(self.response_format, sort_keys=True, ensure_ascii=False)
+        )
         
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", system_prompt),
@@ -79,274 +330,518 @@ Valor: R$ {valor}
 """)
         ])
         
-        # Cria a chain de processamento
-        llm = ChatOpenAI(model=self.model, temperature=self.temperature)
-        self.chain = (self.prompt | llm.with_structured_output(self.ClassificacaoTransacao))
+        # Loop de eventos próprio da instância: o pool HTTP abaixo fica preso ao
+        # loop em que é usado, então todas as execuções rodam neste mesmo loop
+        self._loop = asyncio.new_event_loop()
+        
+        # Cliente HTTP com pool de conexões keep-alive, reaproveitado por todas as
+        # chamadas desta instância (evita um handshake TLS por requisição)
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency * 2,
+                max_keepalive_connections=self.max_concurrency
+            ),
+            timeout=httpx.Timeout(30.0, connect=5.0)
+        )
+        
+        # Cria a chain de processamento (o SDK da OpenAI faz backoff exponencial
+        # em 429/5xx até max_retries)
+        llm = ChatOpenAI(
+            model=self.model,
+            temperature=self.temperature,
+            http_async_client=self._http,
+            max_retries=4,
+            timeout=30
+        )
+        self.chain = (
+            self.prompt
+            | llm.bind(response_format=self.response_format)
+            | JsonOutputParser()
+        )
     
-    def regras_pre_classificacao(self, row: pd.Series, log_decision: bool = True) -> Optional[Dict[str, str]]:
+    def regras_pre_classificacao(self, rec: Dict[str, Any], log_decision: bool = True,
+                                 idx: int = -1) -> Optional[Dict[str, str]]:
         """
         Aplica regras de negócio antes de chamar a IA
         
         Args:
-            row: Linha do DataFrame com a transação
+            rec: Transação como dicionário (descricao, origem, valor)
             log_decision: Se deve logar a decisão
+            idx: Índice da transação no DataFrame (usado no log)
             
         Returns:
             Dicionário com classificação ou None se não houver regra aplicável
         """
-        desc = str(row.get("descricao", "") or "").upper()  # Converte para maiúsculas
-        logger = get_logger()
+        desc = str(rec.get("descricao", "") or "").upper().translate(_ACCENT_TBL)
         
-        # Regra ESPECIAL: Transferência entre contas próprias (BODY STATION e J E MADEIRA)
-        if ("BODY STATION ACADEMIA" in desc or "J E MADEIRA A" in desc):
-            if row["origem"] == "CAR":
-                result = {
-                    "classificacao_sugerida": "(+) Transferencia Entre Contas",
-                    "explicacao": "Transferência entre contas próprias identificada (entrada)"
-                }
-                if log_decision:
-                    logger.log_classification_decision(
-                        transaction_id=row.get("index", -1),
-                        input_data={
-                            "descricao": row.get("descricao", ""),
-                            "origem": row["origem"],
-                            "valor": row["valor"]
-                        },
-                        decision=result,
-                        method="rule",
-                        reasoning="Regra: Transferência entre contas próprias (BODY STATION/J E MADEIRA) - Entrada (CAR)",
-                        confidence=1.0
-                    )
-                return result
-            else:
-                result = {
-                    "classificacao_sugerida": "(-) Transferencia Entre Contas",
-                    "explicacao": "Transferência entre contas próprias identificada (saída)"
-                }
-                if log_decision:
-                    logger.log_classification_decision(
-                        transaction_id=row.get("index", -1),
-                        input_data={
-                            "descricao": row.get("descricao", ""),
-                            "origem": row["origem"],
-                            "valor": row["valor"]
-                        },
-                        decision=result,
-                        method="rule",
-                        reasoning="Regra: Transferência entre contas próprias (BODY STATION/J E MADEIRA) - Saída (CAP)",
-                        confidence=1.0
-                    )
-                return result
-        
-        # Regra: Rende Fácil (aplicação/resgate) - VERIFICAR ANTES de outras regras genéricas
-        if "RENDE FACIL" in desc or "RENDE FÁCIL" in desc:
-            if row["origem"] == "CAR":
-                result = {
-                    "classificacao_sugerida": "Resgate Aplicação Financeira",
-                    "explicacao": "Resgate de aplicação financeira identificado"
-                }
-                if log_decision:
-                    logger.log_classification_decision(
-                        transaction_id=row.get("index", -1),
-                        input_data={"descricao": row.get("descricao", ""), "origem": row["origem"], "valor": row["valor"]},
-                        decision=result,
-                        method="rule",
-                        reasoning="Regra: Rende Fácil detectado + origem CAR = Resgate",
-                        confidence=1.0
-                    )
-                return result
-            else:
-                result = {
-                    "classificacao_sugerida": "0.006 - Aplicação Financeira",
-                    "explicacao": "Aplicação financeira identificada"
-                }
-                if log_decision:
-                    logger.log_classification_decision(
-                        transaction_id=row.get("index", -1),
-                        input_data={"descricao": row.get("descricao", ""), "origem": row["origem"], "valor": row["valor"]},
-                        decision=result,
-                        method="rule",
-                        reasoning="Regra: Rende Fácil detectado + origem CAP = Aplicação",
-                        confidence=1.0
-                    )
-                return result
-        
-        # Regra: Transferências genéricas PIX/TED
-        if "PIX" in desc or "TED" in desc:
-            if row["origem"] == "CAP":
-                return {
-                    "classificacao_sugerida": "Saída de Transferência",
-                    "explicacao": "Transferência genérica identificada (saída)"
-                }
-            else:
-                return {
-                    "classificacao_sugerida": "Entrada de Transferência",
-                    "explicacao": "Transferência genérica identificada (entrada)"
-                }
+        # Uma única busca identifica a regra de maior prioridade que casou
+        m = _RULE_RE.search(desc)
+        if m is None:
+            return None
         
-        # Regra: Recebimentos por cartão
-        if "REDE" in desc or "CARTAO" in desc or "CARTÃO" in desc:
-            return {
-                "classificacao_sugerida": "Receita com Venda de Serviços",
-                "explicacao": "Recebimento via cartão/maquininha"
-            }
+        regra = _REGRAS_POR_NOME[m.lastgroup]
+        if regra["origem"] is None or rec["origem"] == regra["origem"]:
+            classificacao, explicacao, reasoning = regra["se_origem"]
+        else:
+            classificacao, explicacao, reasoning = regra["senao"]
         
-        # Regra: Gympass
-        if "GYMPASS" in desc:
-            return {
-                "classificacao_sugerida": "Gympass",
-                "explicacao": "Receita Gympass identificada"
-            }
+        result = {
+            "classificacao_sugerida": classificacao,
+            "explicacao": explicacao
+        }
+        if log_decision and reasoning:
+            get_logger().log_classification_decision(
+                transaction_id=idx,
+                input_data={
+                    "descricao": rec.get("descricao", ""),
+                    "origem": rec["origem"],
+                    "valor": rec["valor"]
+                },
+                decision=result,
+                method="rule",
+                reasoning=reasoning,
+                confidence=1.0
+            )
+        return result
+    
+    def _apply_rules_vectorized(self, df: pd.DataFrame) -> pd.Index:
+        """
+        Aplica as regras de negócio de uma vez sobre todo o DataFrame
         
-        # Regra: Seguros
-        if "SEGURO" in desc:
-            return {
-                "classificacao_sugerida": "Seguros",
-                "explicacao": "Seguro identificado na descrição"
-            }
+        Mesmo resultado de regras_pre_classificacao linha a linha, mas com uma
+        única extração vetorizada da regex de regras na coluna de descrição.
+        Só altera linhas ainda sem classificação.
         
-        # Regra: Consórcios
-        if "CONSORCIO" in desc or "CONSÓRCIO" in desc:
-            return {
-                "classificacao_sugerida": "Consórcios",
-                "explicacao": "Consórcio identificado na descrição"
-            }
+        Args:
+            df: DataFrame com transações (modificado no local)
+            
+        Returns:
+            Índices das transações classificadas por regra
+        """
+        sem_class = df["classificacao_sugerida"].isna()
+        desc = df["descricao"].fillna("").astype(str).str.upper().str.translate(_ACCENT_TBL)
+        origem = df["origem"]
+        
+        # Uma coluna por regra; no máximo uma preenchida por linha (a vencedora)
+        achados = desc.str.extract(_RULE_RE)
+        casou = achados.notna().to_numpy() & sem_class.to_numpy()[:, None]
+        
+        # Uma condição por ramo (regra x origem), na ordem de prioridade das regras
+        condicoes = []
+        ramos = []
+        for i, regra in enumerate(REGRAS_DESCRICAO):
+            casa = casou[:, i]
+            if regra["origem"] is None:
+                condicoes.append(casa)
+                ramos.append(regra["se_origem"])
+            else:
+                mesma_origem = origem.eq(regra["origem"]).to_numpy()
+                condicoes += [casa & mesma_origem, casa & ~mesma_origem]
+                ramos += [regra["se_origem"], regra["senao"]]
         
-        # Regra: Investimentos genéricos
-        if any(k in desc for k in ["OUROCAP", "INVEST"]):
-            return {
-                "classificacao_sugerida": "Investimento",
-                "explicacao": "Investimento identificado na descrição"
+        # np.select escolhe o primeiro ramo verdadeiro de cada linha (-1 = nenhum)
+        ramo_idx = np.select(condicoes, np.arange(len(ramos)), default=-1)
+        classificadas = df.index[ramo_idx >= 0]
+        if len(classificadas) == 0:
+            return classificadas
+        
+        ramo_idx = ramo_idx[ramo_idx >= 0]
+        classificacoes = np.array([r[0] for r in ramos], dtype=object)
+        explicacoes = np.array([r[1] for r in ramos], dtype=object)
+        df.loc[classificadas, "classificacao_sugerida"] = classificacoes[ramo_idx]
+        df.loc[classificadas, "explicacao"] = explicacoes[ramo_idx]
+        
+        # Loga em lote apenas as decisões das regras que têm raciocínio registrado
+        com_log = np.array([bool(r[2]) for r in ramos])[ramo_idx]
+        logados = df.loc[classificadas[com_log], ["descricao", "origem", "valor"]]
+        get_logger().log_classification_decisions([
+            {
+                "transaction_id": int(idx),
+                "input_data": rec,
+                "decision": {
+                    "classificacao_sugerida": ramos[r][0],
+                    "explicacao": ramos[r][1]
+                },
+                "method": "rule",
+                "reasoning": ramos[r][2],
+                "confidence": 1.0
             }
+            for idx, rec, r in zip(logados.index, logados.to_dict("records"), ramo_idx[com_log])
+        ])
         
-        return None
+        return classificadas
     
-    async def classificar_transacao(self, row: pd.Series) -> Dict[str, str]:
+    async def classificar_transacao(self, rec: Dict[str, Any], idx: int = -1,
+                                    usar_regras: bool = True) -> Dict[str, str]:
         """
         Classifica uma única transação
         
         Args:
-            row: Linha do DataFrame com a transação
+            rec: Transação como dicionário (descricao, origem, valor)
+            idx: Índice da transação no DataFrame (usado no log)
+            usar_regras: Se deve tentar as regras antes da IA (False quando
+                as regras já foram aplicadas ao DataFrame inteiro)
             
         Returns:
             Dicionário com classificação e explicação
         """
-        logger = get_logger()
-        
         # Tenta regras pré-definidas primeiro
-        pre_class = self.regras_pre_classificacao(row, log_decision=True)
-        if pre_class:
-            return pre_class
+        if usar_regras:
+            pre_class = self.regras_pre_classificacao(rec, log_decision=True, idx=idx)
+            if pre_class:
+                return pre_class
         
         # Se não conseguiu classificar com regras, usa a IA
-        try:
-            input_data = {
-                "descricao": row["descricao"],
-                "origem": row["origem"],
-                "valor": row["valor"]
-            }
+        resultados = await self.classificar_com_ia([rec], [idx])
+        return resultados[0]
+    
+    def _cache_key(self, rec: Dict[str, Any]) -> Optional[str]:
+        """
+        Chave do cache de respostas: descrições repetidas (mesma origem e
+        sinal do valor) reaproveitam a resposta da IA
+        
+        Args:
+            rec: Transação como dicionário (descricao, origem, valor)
             
-            resultado = await self.chain.ainvoke(input_data)
-            decision = resultado.model_dump()
+        Returns:
+            Chave do cache ou None se o cache estiver desativado
+        """
+        if self._cache is None:
+            return None
+        
+        sinal = "+" if float(rec["valor"] or 0) >= 0 else "-"
+        return LLMResponseCache.make_key(
+            self.model, self._prompt_digest,
+            str(rec["descricao"] or "").strip().upper(), rec["origem"], sinal
+        )
+    
+    def classificar_localmente(self, records: List[Dict[str, Any]],
+                               idx_list: List[int]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Classifica com o modelo local as transações em que ele tem confiança
+        
+        Args:
+            records: Transações (descricao, origem, valor)
+            idx_list: Índices das transações (para o log)
             
-            # Loga a decisão da IA
-            logger.log_classification_decision(
-                transaction_id=row.get("index", -1),
-                input_data=input_data,
-                decision=decision,
-                method="ai",
-                reasoning=f"IA (GPT-4o-mini) analisou a descrição '{row['descricao'][:50]}...' e classificou como '{decision.get('classificacao_sugerida', 'N/A')}'. Explicação: {decision.get('explicacao', 'N/A')}",
-                confidence=None  # GPT não retorna confidence score
-            )
+        Returns:
+            Lista alinhada a records com a decisão, ou None quando a transação
+            deve seguir para a IA
+        """
+        resultados = [None] * len(records)
+        if self._local_clf is None or not records:
+            return resultados
+        
+        probs = self._local_clf.predict_proba(
+            [_texto_local(rec["descricao"], rec["origem"]) for rec in records]
+        )
+        melhores = probs.argmax(axis=1)
+        confiancas = probs[np.arange(len(records)), melhores]
+        classes = self._local_clf.classes_
+        
+        entradas_log = []
+        for pos, (melhor, confianca) in enumerate(zip(melhores, confiancas)):
+            classe = str(classes[melhor])
+            if confianca < self.local_clf_threshold or classe not in self.categorias_classificacao:
+                continue
             
-            return decision
-        except Exception as e:
-            print(f"❌ Erro ao classificar transação: {e}")
-            error_result = {
-                "classificacao_sugerida": "Nao classificado",
-                "explicacao": f"Erro na classificação: {str(e)}"
+            rec = records[pos]
+            decision = {
+                "classificacao_sugerida": classe,
+                "explicacao": f"Classificador local ({confianca:.0%} de confiança)"
             }
+            entradas_log.append({
+                "transaction_id": int(idx_list[pos]),
+                "input_data": {"descricao": rec["descricao"], "origem": rec["origem"], "valor": rec["valor"]},
+                "decision": decision,
+                "method": "local_clf",
+                "reasoning": f"Classificador local (TF-IDF + regressão logística) previu '{classe}' com confiança {confianca:.2f}",
+                "confidence": float(confianca)
+            })
+            resultados[pos] = decision
+        
+        get_logger().log_classification_decisions(entradas_log)
+        return resultados
+    
+    async def classificar_com_ia(self, records: List[Dict[str, Any]], idx_list: List[int],
+                                 mode: str = "realtime") -> List[Dict[str, str]]:
+        """
+        Classifica transações com a IA em lote
+        
+        Respostas já em cache não vão para a API. As demais são enviadas de
+        uma vez: em modo "realtime" via chain.abatch (no máximo max_concurrency
+        requisições simultâneas); em modo "batch" via OpenAI Batch API.
+        
+        Args:
+            records: Transações como dicionários (descricao, origem, valor)
+            idx_list: Índices das transações no DataFrame (usados no log)
+            mode: "realtime" ou "batch"
             
-            logger.log_classification_decision(
-                transaction_id=row.get("index", -1),
-                input_data={"descricao": row.get("descricao", ""), "origem": row.get("origem", ""), "valor": row.get("valor", 0)},
-                decision=error_result,
-                method="error",
-                reasoning=f"Erro ao classificar: {str(e)}",
-                confidence=0.0
-            )
+        Returns:
+            Lista de dicionários com classificação e explicação, na mesma ordem
+        """
+        resultados = [None] * len(records)
+        chaves = [self._cache_key(rec) for rec in records]
+        
+        # Logs e gravações no cache são acumulados e descarregados de uma vez no fim
+        entradas_log = []
+        novas_respostas = []
+        
+        # Separa o que já está em cache do que precisa ir para a IA
+        pendentes = []
+        for pos, (rec, idx, chave) in enumerate(zip(records, idx_list, chaves)):
+            cached = self._cache.get(chave) if chave is not None else None
+            # Resposta em cache com classe que não é mais permitida: volta para a IA
+            if cached is None or cached.get("classificacao_sugerida") not in self._classes_validas:
+                pendentes.append(pos)
+                continue
+            
+            entradas_log.append({
+                "transaction_id": idx,
+                "input_data": {"descricao": rec["descricao"], "origem": rec["origem"], "valor": rec["valor"]},
+                "decision": cached,
+                "method": "cache",
+                "reasoning": "Resposta da IA reaproveitada do cache (mesma descrição, origem e sinal do valor)",
+                "confidence": None
+            })
+            resultados[pos] = cached
+        
+        if not pendentes:
+            get_logger().log_classification_decisions(entradas_log)
+            return resultados
+        
+        inputs = [
+            {
+                "descricao": records[pos]["descricao"],
+                "origem": records[pos]["origem"],
+                "valor": records[pos]["valor"]
+            }
+            for pos in pendentes
+        ]
+        if mode == "batch":
+            saidas = await self._classificar_batch_api(inputs)
+        else:
+            # Um único abatch: a barra avança por transação concluída, sem
+            # esperar blocos inteiros terminarem
+            with tqdm(total=len(inputs), desc="   Progresso") as barra:
+                saidas = await self.chain.abatch(
+                    inputs,
+                    config={
+                        "max_concurrency": self.max_concurrency,
+                        "callbacks": [_ProgressoCallback(barra)]
+                    },
+                    return_exceptions=True
+                )
+        
+        for pos, input_data, saida in zip(pendentes, inputs, saidas):
+            idx = idx_list[pos]
             
-            return error_result
+            if not isinstance(saida, Exception) and saida.get("classificacao_sugerida") not in self._classes_validas:
+                saida = ValueError(f"Classe fora das permitidas: {saida.get('classificacao_sugerida')!r}")
+            
+            if isinstance(saida, Exception):
+                print(f"❌ Erro ao classificar transação: {saida}")
+                error_result = {
+                    "classificacao_sugerida": "Nao classificado",
+                    "explicacao": f"Erro na classificação: {str(saida)}"
+                }
+                
+                entradas_log.append({
+                    "transaction_id": idx,
+                    "input_data": input_data,
+                    "decision": error_result,
+                    "method": "error",
+                    "reasoning": f"Erro ao classificar: {str(saida)}",
+                    "confidence": 0.0
+                })
+                resultados[pos] = error_result
+                continue
+            
+            decision = saida
+            if chaves[pos] is not None:
+                novas_respostas.append((chaves[pos], decision))
+            
+            # Loga a decisão da IA
+            entradas_log.append({
+                "transaction_id": idx,
+                "input_data": input_data,
+                "decision": decision,
+                "method": "ai",
+                "reasoning": f"IA (GPT-4o-mini) analisou a descrição '{str(input_data.get('descricao') or '')[:50]}...' e classificou como '{decision.get('classificacao_sugerida', 'N/A')}'. Explicação: {decision.get('explicacao', 'N/A')}",
+                "confidence": None  # GPT não retorna confidence score
+            })
+            resultados[pos] = decision
+        
+        if novas_respostas:
+            self._cache.set_many(novas_respostas)
+        get_logger().log_classification_decisions(entradas_log)
+        
+        return resultados
     
-    async def _gather_limit(self, coros: List, limit: int):
+    async def _classificar_batch_api(self, inputs: List[Dict[str, Any]],
+                                     poll_interval: float = 30.0) -> List[Any]:
         """
-        Executa coroutines com limite de concorrência
+        Classifica transações via OpenAI Batch API (assíncrona, metade do custo)
+        
+        Monta um JSONL com uma requisição de chat por transação (mesmo prompt e
+        mesmo schema de saída da chain), envia um único job e aguarda o fim.
         
         Args:
-            coros: Lista de coroutines
-            limit: Limite de concorrência
+            inputs: Entradas do prompt (descricao, origem, valor)
+            poll_interval: Segundos entre consultas ao status do job
             
         Returns:
-            Resultados das coroutines
+            Para cada entrada, o dict da resposta ou a Exception correspondente
         """
-        sem = asyncio.Semaphore(limit)
+        client = AsyncOpenAI(http_client=self._http, max_retries=4)
+        
+        linhas = []
+        for i, input_data in enumerate(inputs):
+            messages = convert_to_openai_messages(self.prompt.format_messages(**input_data))
+            linhas.append(json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "temperature": self.temperature,
+                    "messages": messages,
+                    "response_format": self.response_format
+                }
+            }, ensure_ascii=False, default=float))
+        
+        print(f"   📦 Enviando {len(inputs)} transações para a Batch API...")
+        batch_file = await client.files.create(
+            file=("classificacao.jsonl", "\n".join(linhas).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
         
-        async def run(c):
-            async with sem:
-                return await c
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            batch = await client.batches.retrieve(batch.id)
+            print(f"   ⏳ Batch {batch.id}: {batch.status}")
         
-        return await asyncio.gather(*(run(c) for c in coros))
+        erro_job = RuntimeError(f"Batch {batch.id} terminou com status '{batch.status}'")
+        saidas: List[Any] = [erro_job] * len(inputs)
+        
+        # Resultados (e erros por requisição) voltam indexados pelo custom_id
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            conteudo = await client.files.content(file_id)
+            for linha in conteudo.text.splitlines():
+                if not linha.strip():
+                    continue
+                item = json.loads(linha)
+                pos = int(item["custom_id"])
+                response = item.get("response") or {}
+                try:
+                    if response.get("status_code") != 200:
+                        raise RuntimeError(item.get("error") or response.get("body"))
+                    content = response["body"]["choices"][0]["message"]["content"]
+                    saidas[pos] = json.loads(content)
+                except Exception as e:
+                    saidas[pos] = e
+        
+        return saidas
     
-    async def classificar_transacoes_df(self, df: pd.DataFrame) -> pd.DataFrame:
+    async def classificar_transacoes_df(self, df: pd.DataFrame, inplace: bool = False,
+                                        mode: str = "realtime") -> pd.DataFrame:
         """
         Classifica todas as transações do DataFrame
         
         Args:
             df: DataFrame com transações
+            inplace: Se True, preenche as colunas no próprio DataFrame (sem cópia)
+            mode: "realtime" (chamadas concorrentes) ou "batch" (OpenAI Batch API)
             
         Returns:
             DataFrame com classificações
         """
-        df = df.copy()
+        if not inplace:
+            df = df.copy()
         
-        # Inicializa colunas se não existirem
+        # Inicializa colunas se não existirem, já com tipos compactos: a
+        # classificação como Categorical (rótulo guardado uma vez) e a
+        # explicação como string
         if "classificacao_sugerida" not in df.columns:
-            df["classificacao_sugerida"] = None
+            df["classificacao_sugerida"] = pd.Categorical(
+                [None] * len(df), categories=self.categorias_classificacao
+            )
         if "explicacao" not in df.columns:
-            df["explicacao"] = None
+            df["explicacao"] = pd.array([None] * len(df), dtype="string")
         
-        # Identifica transações não classificadas
+        # Aplica as regras de negócio em uma passada vetorizada
+        por_regra = self._apply_rules_vectorized(df)
+        if len(por_regra) > 0:
+            print(f"   📏 {len(por_regra)} transações classificadas por regras")
+        
+        # Identifica transações não classificadas (só essas vão para a IA)
         mask_sem_class = df["classificacao_sugerida"].isna()
         indices = df.index[mask_sem_class]
         
+        # Contagens por caminho de decisão, acumuladas aqui para que execute()
+        # não precise varrer a coluna de novo
+        self._last_stats = {
+            "total": len(df),
+            "classificadas": len(df),
+            "regras": len(por_regra),
+            "modelo_local": 0,
+            "ia": 0,
+            "nao_classificadas": 0
+        }
+        
         if len(indices) > 0:
-            print(f"   🤖 Classificando {len(indices)} transações com IA...")
+            # Descrições repetidas (mesma descrição e origem) vão uma única vez
+            # para a IA; grupo[i] é a posição da transação i entre as únicas
+            sub = df.loc[indices, ["descricao", "origem", "valor"]]
+            grupo = sub.groupby(["descricao", "origem"], sort=False, dropna=False).ngroup().to_numpy()
+            unicos = sub[~sub.duplicated(["descricao", "origem"])]
+            
+            # Registros simples (sem um pd.Series por linha); o classificador
+            # local resolve os fáceis e só o restante vai em lote à IA
+            records = unicos.to_dict("records")
+            idx_unicos = unicos.index.tolist()
+            resultados = self.classificar_localmente(records, idx_unicos)
+            faltam = [pos for pos, r in enumerate(resultados) if r is None]
+            if len(faltam) < len(records):
+                print(f"   🧠 {len(records) - len(faltam)} descrições únicas classificadas pelo modelo local")
             
-            # Cria tasks para cada transação
-            tasks = [self.classificar_transacao(df.loc[i]) for i in indices]
+            if faltam:
+                print(f"   🤖 Classificando {int(np.isin(grupo, faltam).sum())} transações ({len(faltam)} descrições únicas) com IA...")
+                via_ia = await self.classificar_com_ia(
+                    [records[pos] for pos in faltam], [idx_unicos[pos] for pos in faltam], mode=mode
+                )
+                for pos, resultado in zip(faltam, via_ia):
+                    resultados[pos] = resultado
             
-            # Processa em chunks para não sobrecarregar
-            resultados = []
-            for start in tqdm(range(0, len(tasks), 50), desc="   Progresso"):
-                chunk = tasks[start:start + 50]
-                out = await self._gather_limit(chunk, self.max_concurrency)
-                resultados.extend(out)
+            # Replica o resultado de cada descrição única para todas as suas transações
+            classificacoes = np.array([r["classificacao_sugerida"] for r in resultados], dtype=object)
+            explicacoes = np.array([r["explicacao"] for r in resultados], dtype=object)
+            df.loc[indices, "classificacao_sugerida"] = classificacoes[grupo]
+            df.loc[indices, "explicacao"] = explicacoes[grupo]
             
-            # Atualiza o DataFrame com os resultados
-            for idx, res in zip(indices, resultados):
-                df.loc[idx, ["classificacao_sugerida", "explicacao"]] = [
-                    res["classificacao_sugerida"],
-                    res["explicacao"]
-                ]
+            por_ia = int(np.isin(grupo, faltam).sum())
+            self._last_stats["modelo_local"] = len(indices) - por_ia
+            self._last_stats["ia"] = por_ia
+            self._last_stats["nao_classificadas"] = int((classificacoes == "Nao classificado")[grupo].sum())
         
         return df
     
-    def execute(self, df: pd.DataFrame) -> pd.DataFrame:
+    def execute(self, df: pd.DataFrame, inplace: bool = False, mode: str = "realtime") -> pd.DataFrame:
         """
         Executa o processo completo da camada BUSINESS
         
         Args:
             df: DataFrame com transações
+            inplace: Se True, classifica o próprio DataFrame e o retorna (sem cópia)
+            mode: "realtime" para uso interativo ou "batch" para rodadas não
+                interativas via OpenAI Batch API (mais lenta, metade do custo)
             
         Returns:
             DataFrame com classificações
@@ -355,16 +850,18 @@ Valor: R$ {valor}
         logger = get_logger()
         
         # Executa classificação assíncrona
-        loop = asyncio.get_event_loop()
-        df_classificado = loop.run_until_complete(self.classificar_transacoes_df(df))
+        df_classificado = self._run(
+            self.classificar_transacoes_df(df, inplace=inplace, mode=mode)
+        )
         
-        # Estatísticas
-        total = len(df_classificado)
-        classificados = df_classificado["classificacao_sugerida"].notna().sum()
+        # Estatísticas (contadas durante a classificação)
+        stats = self._last_stats
         
         print(f"✅ [BUSINESS LAYER] Classificação concluída!")
-        print(f"   📊 Total de transações: {total}")
-        print(f"   ✨ Transações classificadas: {classificados}")
+        print(f"   📊 Total de transações: {stats['total']}")
+        print(f"   ✨ Transações classificadas: {stats['classificadas']}")
+        print(f"      📏 Regras: {stats['regras']} | 🧠 Modelo local: {stats['modelo_local']} | 🤖 IA: {stats['ia']}")
+        print(f"      ❔ Não classificadas: {stats['nao_classificadas']}")
         
         # Salva logs da sessão
         logger.save_session()
@@ -372,17 +869,153 @@ Valor: R$ {valor}
         
         return df_classificado
     
-    def save_to_excel(self, df: pd.DataFrame, output_path: str) -> None:
+    def _run(self, coro):
+        """
+        Executa uma corrotina até o fim no loop da instância
+        
+        Args:
+            coro: Corrotina a executar
+            
+        Returns:
+            Resultado da corrotina
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return self._loop.run_until_complete(coro)
+        
+        # Já existe um loop rodando nesta thread (ex.: Jupyter): roda o loop da
+        # instância em outra thread e aguarda o resultado
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(self._loop.run_until_complete, coro).result()
+    
+    async def aclose(self) -> None:
+        """Fecha o pool de conexões HTTP usado nas chamadas à IA e o cache de respostas"""
+        await self._http.aclose()
+        if self._cache is not None:
+            self._cache.close()
+    
+    def close(self) -> None:
+        """Versão síncrona de aclose, para uso após execute(); encerra também o loop"""
+        if self._cache is not None:
+            self._cache.close()
+        if self._loop.is_closed():
+            return
+        if not self._http.is_closed:
+            self._run(self.aclose())
+        self._run(self._loop.shutdown_asyncgens())
+        self._loop.close()
+    
+    async def __aenter__(self) -> "BusinessLayer":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    @staticmethod
+    def save_to_excel(df: pd.DataFrame, output_path: str, chunk_size: int = 10_000) -> None:
         """
         Salva o DataFrame classificado em Excel
         
+        Com xlsxwriter instalado, grava em modo constant_memory: as linhas vão
+        para o disco à medida que são escritas (em blocos de chunk_size), sem
+        montar a planilha inteira em memória. Sem ele, usa openpyxl.
+        
         Args:
             df: DataFrame a ser salvo
             output_path: Caminho do arquivo Excel de saída
+            chunk_size: Linhas convertidas por vez no modo constant_memory
         """
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        df.to_excel(output_path, index=False, engine='openpyxl')
+        
+        if not _HAS_XLSXWRITER:
+            df.to_excel(output_path, index=False, engine='openpyxl')
+            print(f"   💾 Excel salvo em: {output_path}")
+            return
+        
+        # O to_excel do pandas escreve coluna a coluna, o que o constant_memory
+        # não aceita (só a linha corrente fica em memória); por isso as linhas
+        # são escritas aqui, em ordem
+        import xlsxwriter
+        workbook = xlsxwriter.Workbook(output_path, {
+            "constant_memory": True,
+            "default_date_format": "dd/mm/yyyy",
+            "nan_inf_to_errors": True
+        })
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, [str(col) for col in df.columns])
+        
+        for start in range(0, len(df), chunk_size):
+            bloco = df.iloc[start:start + chunk_size].astype(object)
+            bloco = bloco.where(bloco.notna(), None)
+            for offset, row in enumerate(bloco.itertuples(index=False, name=None)):
+                worksheet.write_row(start + offset + 1, 0, row)
+        
+        workbook.close()
         print(f"   💾 Excel salvo em: {output_path}")
+    
+    @staticmethod
+    def save(df: pd.DataFrame, output_path: str) -> None:
+        """
+        Salva o DataFrame no formato indicado pela extensão (.parquet ou .xlsx)
+        
+        Args:
+            df: DataFrame a ser salvo
+            output_path: Caminho de saída
+        """
+        if Path(output_path).suffix.lower() == ".parquet":
+            BusinessLayer.save_to_parquet(df, output_path)
+        else:
+            BusinessLayer.save_to_excel(df, output_path)
+    
+    @staticmethod
+    def save_to_parquet(df: pd.DataFrame, output_path: str) -> None:
+        """
+        Salva o DataFrame classificado em Parquet (compressão zstd)
+        
+        Args:
+            df: DataFrame a ser salvo
+            output_path: Caminho do arquivo Parquet de saída
+        """
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(output_path, engine='pyarrow', compression='zstd', index=False)
+        print(f"   💾 Parquet salvo em: {output_path}")
+
+
+def treinar_classificador_local(arquivos: List[str],
+                                output_path: str = "./src/models/tfidf_lr.pkl") -> None:
+    """
+    Treina o classificador local a partir de transações já classificadas
+    (saídas .xlsx/.parquet do pipeline, revisadas). Requer scikit-learn e joblib
+    
+    Args:
+        arquivos: Arquivos com as colunas descricao, origem e classificacao_sugerida
+        output_path: Caminho do modelo salvo (lido por BusinessLayer)
+    """
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    
+    df = pd.concat(
+        [pd.read_parquet(a) if a.endswith(".parquet") else pd.read_excel(a) for a in arquivos],
+        ignore_index=True
+    )
+    df = df.dropna(subset=["descricao", "classificacao_sugerida"])
+    df = df[~df["classificacao_sugerida"].isin(["Nao classificado", "Não classificado"])]
+    
+    modelo = make_pipeline(
+        TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True),
+        LogisticRegression(max_iter=1000)
+    )
+    modelo.fit(
+        [_texto_local(d, o) for d, o in zip(df["descricao"], df["origem"])],
+        df["classificacao_sugerida"].astype(str)
+    )
+    
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(modelo, output_path)
+    print(f"   💾 Classificador local salvo em: {output_path} ({len(df)} transações)")
 
 
 # Função de conveniência para uso direto
@@ -399,4 +1032,7 @@ def classify_transactions(df: pd.DataFrame,
         DataFrame com classificações
     """
     business_layer = BusinessLayer(regra_path=regra_path)
-    return business_layer.execute(df)
+    try:
+        return business_layer.execute(df)
+    finally:
+        business_layer.close()
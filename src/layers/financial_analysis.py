@@ -21,16 +21,76 @@ OBRIGATÓRIO:
 Gera relatório detalhado com base no plano de contas e dados reais.
 """
 
+import os
+import re
+import pickle
+import tempfile
+import hashlib
+import functools
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional
 from pathlib import Path
 
+# Troca os separadores do formato americano (1,234.56) pelo brasileiro (1.234,56)
+# em uma única passada
+_SEPARADORES_BRL = str.maketrans(',.', '.,')
+
+
+# Exclusões do top de receitas/despesas (transferências e saldos não são
+# receita nem despesa de verdade)
+_RE_CLASSE_NAO_RECEITA = re.compile('Saldo Inicial|Transferencia Entre Contas', re.IGNORECASE)
+_RE_TRANSFERENCIA = re.compile('Transferencia Entre Contas', re.IGNORECASE)
+_RE_SALDO = re.compile('SALDO', re.IGNORECASE)
+
+# Cópia em Parquet do plano de contas: ler o .xlsx (openpyxl) é a parte mais
+# lenta de instanciar o analisador, que é criado a cada relatório
+PLANO_CONTAS_CACHE_DIR = "./src/cache"
+
+# Colunas do plano de contas levadas para as transações (únicas usadas na DRE/DFC)
+PLANO_COLUNAS_NIVEIS = ('dre_n1', 'dre_n2', 'dfc_n1', 'dfc_n2')
+
+# Relatórios completos já gerados, indexados pelo conteúdo das transações e pela
+# versão do plano de contas (o relatório é função só desses dois)
+REPORT_CACHE_DIR = "./src/cache/reports"
+REPORT_CACHE_MAX_FILES = 32
+
+
+@functools.lru_cache(maxsize=2)
+def _carregar_plano_contas(plano_contas_path: str, mtime: float) -> pd.DataFrame:
+    """
+    Carrega o plano de contas, preferindo a cópia em Parquet quando ela estiver
+    atualizada em relação ao Excel
+    
+    Args:
+        plano_contas_path: Caminho do arquivo plano de contas (.xlsx)
+        mtime: Data de modificação do Excel (invalida o cache quando muda)
+        
+    Returns:
+        DataFrame do plano de contas (compartilhado, não modificar)
+    """
+    cache_path = Path(PLANO_CONTAS_CACHE_DIR) / f"{Path(plano_contas_path).stem}.parquet"
+    if cache_path.exists() and cache_path.stat().st_mtime >= mtime:
+        return pd.read_parquet(cache_path)
+    
+    plano = pd.read_excel(plano_contas_path)
+    plano['conta_cod'] = plano['conta_cod'].astype(str)
+    
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        plano.to_parquet(cache_path, engine='pyarrow', index=False)
+    except Exception as e:
+        print(f"⚠️  Não foi possível salvar o cache do plano de contas: {e}")
+    
+    return plano
+
 
 class FinancialAnalyzer:
     """Analisa transações e gera relatórios financeiros BASEADOS EM DADOS REAIS"""
     
-    def __init__(self, plano_contas_path: str = "./src/plano_de_contas.xlsx"):
+    def __init__(self, plano_contas_path: str = "./src/plano_de_contas.xlsx",
+                 report_cache_dir: Optional[str] = REPORT_CACHE_DIR):
         """
         Inicializa o analisador financeiro
         
@@ -39,13 +99,49 @@ class FinancialAnalyzer:
         
         Args:
             plano_contas_path: Caminho do arquivo plano de contas
+            report_cache_dir: Diretório do cache de relatórios (None desativa)
         """
-        self.plano_contas = pd.read_excel(plano_contas_path)
-        self.plano_contas['conta_cod'] = self.plano_contas['conta_cod'].astype(str)
+        plano_stat = Path(plano_contas_path).stat()
+        self.plano_contas = _carregar_plano_contas(plano_contas_path, plano_stat.st_mtime)
+        self._plano_versao = str(plano_stat.st_mtime_ns).encode()
+        self.report_cache_dir = report_cache_dir
+        
+        # Um dicionário código -> nível por coluna usada na DRE/DFC, montado uma
+        # única vez: enrich_with_plan faz só .map, sem merge nem cópia do plano
+        plano_por_codigo = self.plano_contas.set_index('conta_cod')
+        self._plano_map = {
+            coluna: plano_por_codigo[coluna].to_dict() for coluna in PLANO_COLUNAS_NIVEIS
+        }
+        
+        # Os níveis têm poucos valores distintos: viram Categorical com as
+        # categorias em ordem alfabética (mesma ordem do groupby sobre texto)
+        self._plano_dtypes = {
+            coluna: pd.CategoricalDtype(sorted(plano_por_codigo[coluna].dropna().unique()))
+            for coluna in PLANO_COLUNAS_NIVEIS
+        }
     
     def _format_currency(self, value: float) -> str:
         """Formata valor em moeda brasileira"""
-        return f"R$ {abs(value):,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+        return f"R$ {abs(value):,.2f}".translate(_SEPARADORES_BRL)
+    
+    def _add_period_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Garante as colunas data_dt (datetime) e mes_ano ('YYYY-MM') no DataFrame
+        
+        A data é convertida uma única vez (cache=True reaproveita a conversão
+        de datas repetidas); se as colunas já existirem, o DataFrame volta como está.
+        
+        Args:
+            df: DataFrame com a coluna 'data' no formato dd/mm/yyyy
+            
+        Returns:
+            DataFrame com data_dt e mes_ano
+        """
+        if 'data_dt' in df.columns and 'mes_ano' in df.columns:
+            return df
+        
+        data_dt = pd.to_datetime(df['data'], format='%d/%m/%Y', errors='coerce', cache=True)
+        return df.assign(data_dt=data_dt, mes_ano=data_dt.dt.to_period('M').astype(str))
     
     def extract_code(self, classificacao: str) -> str:
         """
@@ -75,20 +171,56 @@ class FinancialAnalyzer:
         Returns:
             DataFrame enriquecido
         """
-        df = df.copy()
+        # Extrai código da classificação (mesma regra de extract_code, vetorizada):
+        # o que vem antes de ' - ', sem espaços; sem separador, o texto inteiro
+        classificacao = df['classificacao_sugerida']
+        codigo = classificacao.str.split(' - ', n=1).str[0]
+        tem_separador = classificacao.str.contains(' - ', regex=False, na=False)
+        codigo = codigo.where(~tem_separador, codigo.str.strip())
+        
+        # Lookup no plano de contas pelo código (códigos sem conta ficam NaN),
+        # já como Categorical para os groupbys da DRE/DFC
+        niveis = {
+            coluna: codigo.map(mapa).astype(self._plano_dtypes[coluna])
+            for coluna, mapa in self._plano_map.items()
+        }
+        if not isinstance(classificacao.dtype, pd.CategoricalDtype):
+            niveis['classificacao_sugerida'] = classificacao.astype('category')
         
-        # Extrai código da classificação
-        df['codigo_conta'] = df['classificacao_sugerida'].apply(self.extract_code)
+        return df.assign(codigo_conta=codigo, **niveis)
+    
+    def _agrupar_niveis(self, df: pd.DataFrame, col_n1: str, col_n2: str) -> pd.DataFrame:
+        """
+        Soma os valores por par de níveis (N1, N2) do plano de contas
         
-        # Merge com plano de contas
-        df = df.merge(
-            self.plano_contas,
-            left_on='codigo_conta',
-            right_on='conta_cod',
-            how='left'
-        )
+        Args:
+            df: DataFrame enriquecido, filtrado para N1 definido
+            col_n1: Coluna do nível 1 (ex: 'dre_n1')
+            col_n2: Coluna do nível 2 (ex: 'dre_n2')
+            
+        Returns:
+            DataFrame com as colunas nivel1, nivel2 (textos sem espaços nas pontas) e valor
+        """
+        grouped = df.groupby([col_n1, col_n2], observed=True)['valor'].sum().reset_index()
         
-        return df
+        return pd.DataFrame({
+            'nivel1': grouped[col_n1].astype(str).str.strip(),
+            'nivel2': grouped[col_n2].astype(object).fillna('').astype(str).str.strip(),
+            'valor': grouped['valor'].astype(float)
+        })
+    
+    def _somar_por_linha(self, demonstrativo: Dict[str, Any], linhas: np.ndarray, valores: np.ndarray) -> None:
+        """
+        Acumula os valores de cada grupo na linha correspondente do demonstrativo
+        
+        Args:
+            demonstrativo: Dicionário da DRE/DFC (alterado no lugar)
+            linhas: Nome da linha de cada grupo ('' para grupos sem linha)
+            valores: Valor de cada grupo
+        """
+        for linha in np.unique(linhas):
+            if linha:
+                demonstrativo[linha] += float(valores[linhas == linha].sum())
     
     def calculate_dre(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
@@ -101,7 +233,7 @@ class FinancialAnalyzer:
             Dicionário com estrutura da DRE
         """
         # Filtra apenas transações com DRE definido
-        df_dre = df[df['dre_n1'].notna()].copy()
+        df_dre = df[df['dre_n1'].notna()]
         
         dre = {
             'receita_bruta': 0,
@@ -117,30 +249,28 @@ class FinancialAnalyzer:
             'detalhamento': []
         }
         
-        # Agrupa por DRE N1 e N2
+        # Agrupa por DRE N1 e N2 e classifica cada grupo nas linhas da DRE (vetorizado)
         if not df_dre.empty:
-            grouped = df_dre.groupby(['dre_n1', 'dre_n2'])['valor'].sum().reset_index()
+            grouped = self._agrupar_niveis(df_dre, 'dre_n1', 'dre_n2')
+            dre['detalhamento'] = grouped.to_dict('records')
             
-            for _, row in grouped.iterrows():
-                nivel1 = str(row['dre_n1']).strip()
-                nivel2 = str(row['dre_n2']).strip() if pd.notna(row['dre_n2']) else ''
-                valor = float(row['valor'])
-                
-                dre['detalhamento'].append({
-                    'nivel1': nivel1,
-                    'nivel2': nivel2,
-                    'valor': valor
-                })
-                
-                # Classifica nas linhas da DRE
-                if 'Receita Bruta' in nivel1:
-                    dre['receita_bruta'] += valor
-                elif 'Receita Líquida' in nivel1:
-                    dre['deducoes'] += abs(valor)
-                elif 'Lucro Bruto' in nivel1 or 'CMV' in nivel2 or 'Custo' in nivel2:
-                    dre['custos'] += abs(valor)
-                elif 'Despesa' in nivel1 or 'Despesa' in nivel2:
-                    dre['despesas_operacionais'] += abs(valor)
+            nivel1, nivel2 = grouped['nivel1'], grouped['nivel2']
+            linhas = np.select(
+                [
+                    nivel1.str.contains('Receita Bruta', regex=False),
+                    nivel1.str.contains('Receita Líquida', regex=False),
+                    nivel1.str.contains('Lucro Bruto', regex=False)
+                    | nivel2.str.contains('CMV', regex=False)
+                    | nivel2.str.contains('Custo', regex=False),
+                    nivel1.str.contains('Despesa', regex=False)
+                    | nivel2.str.contains('Despesa', regex=False),
+                ],
+                ['receita_bruta', 'deducoes', 'custos', 'despesas_operacionais'],
+                default=''
+            )
+            # Receita bruta soma o valor com sinal; as demais linhas somam o valor absoluto
+            valores = np.where(linhas == 'receita_bruta', grouped['valor'], grouped['valor'].abs())
+            self._somar_por_linha(dre, linhas, valores)
         
         # Calcula receita bruta total
         receitas = df[df['valor'] > 0]['valor'].sum()
@@ -164,7 +294,7 @@ class FinancialAnalyzer:
         Returns:
             Dicionário com estrutura da DFC
         """
-        df_dfc = df[df['dfc_n1'].notna()].copy()
+        df_dfc = df[df['dfc_n1'].notna()]
         
         dfc = {
             'operacional': 0,
@@ -177,27 +307,21 @@ class FinancialAnalyzer:
         }
         
         if not df_dfc.empty:
-            grouped = df_dfc.groupby(['dfc_n1', 'dfc_n2'])['valor'].sum().reset_index()
+            grouped = self._agrupar_niveis(df_dfc, 'dfc_n1', 'dfc_n2')
+            dfc['detalhamento'] = grouped.to_dict('records')
             
-            for _, row in grouped.iterrows():
-                nivel1 = str(row['dfc_n1']).strip()
-                nivel2 = str(row['dfc_n2']).strip() if pd.notna(row['dfc_n2']) else ''
-                valor = float(row['valor'])
-                
-                dfc['detalhamento'].append({
-                    'nivel1': nivel1,
-                    'nivel2': nivel2,
-                    'valor': valor
-                })
-                
-                if 'Operacional' in nivel1:
-                    dfc['operacional'] += valor
-                elif 'Investimento' in nivel1:
-                    dfc['investimento'] += valor
-                elif 'Financiamento' in nivel1:
-                    dfc['financiamento'] += valor
-                elif 'Movimentação entre Contas' in nivel1:
-                    dfc['transferencias'] += valor
+            nivel1 = grouped['nivel1']
+            linhas = np.select(
+                [
+                    nivel1.str.contains('Operacional', regex=False),
+                    nivel1.str.contains('Investimento', regex=False),
+                    nivel1.str.contains('Financiamento', regex=False),
+                    nivel1.str.contains('Movimentação entre Contas', regex=False),
+                ],
+                ['operacional', 'investimento', 'financiamento', 'transferencias'],
+                default=''
+            )
+            self._somar_por_linha(dfc, linhas, grouped['valor'].to_numpy())
         
         # Calcula saldo final
         dfc['saldo_final'] = dfc['saldo_inicial'] + dfc['operacional'] + dfc['investimento'] + dfc['financiamento']
@@ -214,25 +338,17 @@ class FinancialAnalyzer:
         Returns:
             Lista com análise por categoria
         """
-        analysis = []
-        
         # Agrupa por classificação
-        grouped = df.groupby('classificacao_sugerida').agg({
+        grouped = df.groupby('classificacao_sugerida', observed=True).agg({
             'valor': ['sum', 'count', 'mean'],
             'data': ['min', 'max']
         }).reset_index()
         
-        grouped.columns = ['categoria', 'total', 'quantidade', 'media', 'primeira_data', 'ultima_data']
+        grouped.columns = ['categoria', 'total', 'quantidade', 'media', 'primeira_transacao', 'ultima_transacao']
+        grouped = grouped.astype({'total': 'float64', 'quantidade': 'int64', 'media': 'float64'})
         
-        for _, row in grouped.iterrows():
-            analysis.append({
-                'categoria': row['categoria'],
-                'total': float(row['total']),
-                'quantidade': int(row['quantidade']),
-                'media': float(row['media']),
-                'primeira_transacao': row['primeira_data'],
-                'ultima_transacao': row['ultima_data']
-            })
+        # Conversão única para lista de dicionários (sem iterrows)
+        analysis = grouped.to_dict('records')
         
         # Ordena por valor absoluto
         analysis.sort(key=lambda x: abs(x['total']), reverse=True)
@@ -252,32 +368,47 @@ class FinancialAnalyzer:
         Returns:
             Lista com análise mensal baseada em dados reais
         """
-        df = df.copy()
-        
-        # Converte data para datetime usando o formato REAL dos arquivos OFX
-        df['data_dt'] = pd.to_datetime(df['data'], format='%d/%m/%Y', errors='coerce')
-        df['mes_ano'] = df['data_dt'].dt.to_period('M')
+        # Datas no formato REAL dos arquivos OFX (convertidas uma única vez)
+        df = self._add_period_columns(df)
         
         # Remove linhas com data inválida (não deveria acontecer com dados reais)
-        df = df.dropna(subset=['mes_ano'])
+        validas = df['data_dt'].notna()
         
-        if df.empty:
+        if not validas.any():
             print("⚠️  AVISO: Nenhum dado mensal válido encontrado nos arquivos OFX!")
             return []
         
-        # Agrupa por mês REAL presente nos dados
-        monthly = df.groupby('mes_ano').agg({
-            'valor': lambda x: (x[x > 0].sum(), abs(x[x < 0].sum()), x.sum())
-        }).reset_index()
+        # Mês REAL de cada transação como inteiro (meses desde 1970): agrupar
+        # por um código inteiro é bem mais barato que pela string 'YYYY-MM'.
+        # A conversão dia -> mês é feita só para os dias do intervalo (tabela
+        # pequena), e não linha a linha
+        validas = validas.to_numpy()
+        dias = df['data_dt'].to_numpy()[validas].astype('datetime64[D]').astype(np.int64)
+        primeiro_dia = dias.min()
+        meses_por_dia = (
+            np.arange(primeiro_dia, dias.max() + 1).astype('datetime64[D]')
+            .astype('datetime64[M]').astype(np.int64)
+        )
+        codigo_mes = meses_por_dia[dias - primeiro_dia]
+        
+        # Receita, despesa e saldo viram colunas e são somados por mês REAL
+        # presente nos dados em um único groupby vetorizado (soma compensada do
+        # pandas, sem lambda por grupo)
+        valor = df['valor'].to_numpy(dtype=np.float64)[validas]
+        monthly = pd.DataFrame({
+            'receita': np.where(valor > 0, valor, 0.0),
+            'despesa': np.where(valor < 0, valor, 0.0),
+            'saldo': valor
+        }).groupby(codigo_mes).sum()
         
         monthly_data = []
-        for _, row in monthly.iterrows():
-            receita, despesa, saldo = row['valor']
+        for codigo, receita, despesa, saldo in zip(monthly.index, monthly['receita'], monthly['despesa'], monthly['saldo']):
+            ano, mes = divmod(int(codigo), 12)
             monthly_data.append({
-                'mes': str(row['mes_ano']),  # Mês REAL extraído dos arquivos OFX
-                'receita': float(receita),   # Receita REAL calculada dos dados
-                'despesa': float(despesa),   # Despesa REAL calculada dos dados
-                'saldo': float(saldo)        # Saldo REAL calculado
+                'mes': f"{1970 + ano:04d}-{mes + 1:02d}",  # Mês REAL extraído dos arquivos OFX
+                'receita': float(receita),                # Receita REAL calculada dos dados
+                'despesa': float(abs(despesa)),           # Despesa REAL calculada dos dados
+                'saldo': float(saldo)                     # Saldo REAL calculado
             })
         
         print(f"✅ Análise mensal gerada com {len(monthly_data)} meses REAIS dos arquivos OFX")
@@ -299,12 +430,7 @@ class FinancialAnalyzer:
         Returns:
             Dicionário com comparação detalhada baseada em dados reais, ou None se não houver dados
         """
-        from src.utils.ai_decision_logger import get_logger
-        logger = get_logger()
-        
-        df = df.copy()
-        df['data_dt'] = pd.to_datetime(df['data'], format='%d/%m/%Y', errors='coerce')
-        df['mes_ano'] = df['data_dt'].dt.to_period('M').astype(str)
+        df = self._add_period_columns(df)
         
         # Filtra dados REAIS dos dois meses
         df_a = df[df['mes_ano'] == month_a]
@@ -321,6 +447,29 @@ class FinancialAnalyzer:
         receita_b = df_b[df_b['valor'] > 0]['valor'].sum()  # Receita REAL do mês B
         despesa_a = abs(df_a[df_a['valor'] < 0]['valor'].sum())  # Despesa REAL do mês A
         despesa_b = abs(df_b[df_b['valor'] < 0]['valor'].sum())  # Despesa REAL do mês B
+        
+        return self._build_month_comparison(
+            month_a, month_b, receita_a, despesa_a, len(df_a), receita_b, despesa_b, len(df_b)
+        )
+    
+    def _build_month_comparison(self, month_a: str, month_b: str,
+                                receita_a: float, despesa_a: float, n_a: int,
+                                receita_b: float, despesa_b: float, n_b: int) -> Dict[str, Any]:
+        """
+        Monta (e loga) a comparação entre dois meses a partir dos totais REAIS
+        
+        Args:
+            month_a: Mês A ('YYYY-MM')
+            month_b: Mês B ('YYYY-MM')
+            receita_a, despesa_a, n_a: Receita, despesa (positiva) e nº de transações do mês A
+            receita_b, despesa_b, n_b: Receita, despesa (positiva) e nº de transações do mês B
+            
+        Returns:
+            Dicionário com a comparação detalhada
+        """
+        from src.utils.ai_decision_logger import get_logger
+        logger = get_logger()
+        
         saldo_a = receita_a - despesa_a  # Saldo REAL calculado do mês A
         saldo_b = receita_b - despesa_b  # Saldo REAL calculado do mês B
         
@@ -338,14 +487,14 @@ class FinancialAnalyzer:
                 'receita': float(receita_a),  # Valor REAL dos arquivos OFX
                 'despesa': float(despesa_a),  # Valor REAL dos arquivos OFX
                 'saldo': float(saldo_a),      # Cálculo REAL
-                'num_transacoes': len(df_a)   # Quantidade REAL de transações
+                'num_transacoes': int(n_a)    # Quantidade REAL de transações
             },
             'period_b': {
                 'mes': month_b,
                 'receita': float(receita_b),  # Valor REAL dos arquivos OFX
                 'despesa': float(despesa_b),  # Valor REAL dos arquivos OFX
                 'saldo': float(saldo_b),      # Cálculo REAL
-                'num_transacoes': len(df_b)   # Quantidade REAL de transações
+                'num_transacoes': int(n_b)    # Quantidade REAL de transações
             },
             'variations': {
                 'receita_pct': float(var_receita),              # Variação REAL calculada
@@ -378,27 +527,75 @@ class FinancialAnalyzer:
         """
         Gera todas as comparações mês a mês disponíveis
         
+        Os totais de todos os meses saem de um único groupby (uma passada pelos
+        dados), em vez de filtrar o DataFrame inteiro a cada par de meses.
+        
         Args:
             df: DataFrame com transações
             
         Returns:
             Lista de comparações sequenciais
         """
-        df = df.copy()
-        df['data_dt'] = pd.to_datetime(df['data'], format='%d/%m/%Y', errors='coerce')
-        df['mes_ano'] = df['data_dt'].dt.to_period('M').astype(str)
+        df = self._add_period_columns(df)
+        
+        # Receita, despesa e quantidade de transações por mês (meses ordenados)
+        valor = df['valor']
+        totais = pd.DataFrame({
+            'receita': valor.clip(lower=0),
+            'despesa': valor.clip(upper=0),
+        }).groupby(df['mes_ano']).agg(
+            receita=('receita', 'sum'),
+            despesa=('despesa', 'sum'),
+            n=('receita', 'size')
+        )
+        totais['despesa'] = totais['despesa'].abs()
         
-        # Obtém meses únicos ordenados
-        meses = sorted(df['mes_ano'].unique())
+        # Pares consecutivos: cada mês contra o anterior (shift)
+        linhas = list(zip(totais.index, totais['receita'], totais['despesa'], totais['n']))
         
         comparisons = []
-        for i in range(len(meses) - 1):
-            comparison = self.compare_months(df, meses[i], meses[i+1])
-            if comparison:
-                comparisons.append(comparison)
+        for (mes_a, receita_a, despesa_a, n_a), (mes_b, receita_b, despesa_b, n_b) in zip(linhas, linhas[1:]):
+            comparisons.append(self._build_month_comparison(
+                mes_a, mes_b, receita_a, despesa_a, n_a, receita_b, despesa_b, n_b
+            ))
         
         return comparisons
     
+    def _top_transacoes(self, df: pd.DataFrame, n: int, maiores: bool,
+                        excluir: Callable[[pd.DataFrame], pd.Series]) -> pd.DataFrame:
+        """
+        Seleciona as n maiores (ou menores) transações que não são excluídas
+        
+        Os filtros de texto (regex) rodam só sobre candidatos pré-selecionados
+        por nlargest/nsmallest; o lote cresce enquanto sobrarem menos de n.
+        Seleciona as mesmas transações que filtrar tudo e depois aplicar
+        nlargest/nsmallest; empates de valor ficam na ordem de aparição.
+        
+        Args:
+            df: Transações (já filtradas por sinal)
+            n: Quantidade desejada
+            maiores: True para nlargest, False para nsmallest
+            excluir: Função que recebe os candidatos e devolve a máscara dos excluídos
+            
+        Returns:
+            DataFrame com data, descricao, valor e classificacao_sugerida
+        """
+        colunas = ['data', 'descricao', 'valor', 'classificacao_sugerida']
+        valores = df['valor'].reset_index(drop=True)
+        k = n * 10
+        while True:
+            # Posições dos k candidatos, mantidas na ordem original: no empate de
+            # valor vence a transação que aparece primeiro (como keep='first')
+            posicoes = (valores.nlargest(k) if maiores else valores.nsmallest(k)).index
+            candidatos = df.iloc[np.sort(posicoes)]
+            candidatos = candidatos[~excluir(candidatos)]
+            if len(candidatos) >= n or k >= len(df):
+                break
+            k *= 4
+        
+        top = candidatos.sort_values('valor', ascending=not maiores, kind='mergesort').head(n)
+        return top[colunas]
+    
     def generate_summary(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
         Gera sumário executivo APENAS COM DADOS REAIS dos arquivos OFX
@@ -417,24 +614,30 @@ class FinancialAnalyzer:
             raise ValueError("DataFrame vazio! Não é possível gerar sumário sem dados reais dos arquivos OFX.")
         
         # Converte data para datetime para obter período real dos arquivos OFX
-        df_copy = df.copy()
-        df_copy['data_dt'] = pd.to_datetime(df_copy['data'], format='%d/%m/%Y', errors='coerce')
+        df = self._add_period_columns(df)
         
         # PERÍODO REAL: Extrai o período REAL presente nos dados dos arquivos OFX
-        data_min = df_copy['data_dt'].min()
-        data_max = df_copy['data_dt'].max()
+        data_min = df['data_dt'].min()
+        data_max = df['data_dt'].max()
         
         # DEBUG: Mostrar período detectado
         print(f"\n🔍 DEBUG PERÍODO:")
         print(f"   Data mínima: {data_min} -> Mês: {data_min.strftime('%Y-%m') if pd.notna(data_min) else 'N/A'}")
         print(f"   Data máxima: {data_max} -> Mês: {data_max.strftime('%Y-%m') if pd.notna(data_max) else 'N/A'}")
-        print(f"   Total de transações: {len(df_copy)}")
-        print(f"   Primeiras 3 datas: {df_copy['data'].head(3).tolist()}")
-        print(f"   Últimas 3 datas: {df_copy['data'].tail(3).tolist()}")
-        
-        # Calcula receitas e despesas REAIS (sem valores default)
-        receitas = df[df['valor'] > 0]['valor'].sum()
-        despesas = abs(df[df['valor'] < 0]['valor'].sum())
+        print(f"   Total de transações: {len(df)}")
+        print(f"   Primeiras 3 datas: {df['data'].head(3).tolist()}")
+        print(f"   Últimas 3 datas: {df['data'].tail(3).tolist()}")
+        
+        # Calcula receitas e despesas REAIS (sem valores default): cada máscara
+        # é montada uma vez e reaproveitada em somas, contagens e médias
+        valores = df['valor'].to_numpy()
+        positivos = valores > 0
+        negativos = valores < 0
+        v_rec = valores[positivos]
+        v_desp = valores[negativos]
+        
+        receitas = v_rec.sum()
+        despesas = abs(v_desp.sum())
         saldo = receitas - despesas
         
         # Estatísticas gerais BASEADAS EM DADOS REAIS
@@ -453,53 +656,89 @@ class FinancialAnalyzer:
             },
             'transacoes': {
                 'total': len(df),
-                'receitas': len(df[df['valor'] > 0]),
-                'despesas': len(df[df['valor'] < 0]),
-                'ticket_medio_receita': float(df[df['valor'] > 0]['valor'].mean() if len(df[df['valor'] > 0]) > 0 else 0),
-                'ticket_medio_despesa': float(abs(df[df['valor'] < 0]['valor'].mean()) if len(df[df['valor'] < 0]) > 0 else 0)
+                'receitas': len(v_rec),
+                'despesas': len(v_desp),
+                'ticket_medio_receita': float(v_rec.mean() if len(v_rec) > 0 else 0),
+                'ticket_medio_despesa': float(abs(v_desp.mean()) if len(v_desp) > 0 else 0)
             },
             'top_receitas': [],
             'top_despesas': []
         }
         
         # Top 5 receitas (excluindo Saldo Inicial e transferências entre contas)
-        df_receitas = df[df['valor'] > 0].copy()
-        
-        # Filtra saldos iniciais e transferências
-        df_receitas = df_receitas[
-            ~df_receitas['classificacao_sugerida'].str.contains('Saldo Inicial', case=False, na=False) &
-            ~df_receitas['classificacao_sugerida'].str.contains('Transferencia Entre Contas', case=False, na=False) &
-            ~df_receitas['descricao'].str.contains('SALDO', case=False, na=False)
-        ]
-        
-        top_rec = df_receitas.nlargest(5, 'valor')[['data', 'descricao', 'valor', 'classificacao_sugerida']]
-        for _, row in top_rec.iterrows():
+        top_rec = self._top_transacoes(
+            df[positivos], 5, maiores=True,
+            excluir=lambda c: (
+                c['classificacao_sugerida'].str.contains(_RE_CLASSE_NAO_RECEITA, na=False) |
+                c['descricao'].str.contains(_RE_SALDO, na=False)
+            )
+        )
+        for row in top_rec.itertuples(index=False):
             summary['top_receitas'].append({
-                'data': row['data'],
-                'descricao': row['descricao'][:50],
-                'valor': float(row['valor']),
-                'categoria': row['classificacao_sugerida']
+                'data': row.data,
+                'descricao': row.descricao[:50],
+                'valor': float(row.valor),
+                'categoria': row.classificacao_sugerida
             })
         
         # Top 5 despesas (excluindo transferências entre contas)
-        df_despesas = df[df['valor'] < 0].copy()
-        
-        # Filtra transferências
-        df_despesas = df_despesas[
-            ~df_despesas['classificacao_sugerida'].str.contains('Transferencia Entre Contas', case=False, na=False)
-        ]
-        
-        top_desp = df_despesas.nsmallest(5, 'valor')[['data', 'descricao', 'valor', 'classificacao_sugerida']]
-        for _, row in top_desp.iterrows():
+        top_desp = self._top_transacoes(
+            df[negativos], 5, maiores=False,
+            excluir=lambda c: c['classificacao_sugerida'].str.contains(_RE_TRANSFERENCIA, na=False)
+        )
+        for row in top_desp.itertuples(index=False):
             summary['top_despesas'].append({
-                'data': row['data'],
-                'descricao': row['descricao'][:50],
-                'valor': float(row['valor']),
-                'categoria': row['classificacao_sugerida']
+                'data': row.data,
+                'descricao': row.descricao[:50],
+                'valor': float(row.valor),
+                'categoria': row.classificacao_sugerida
             })
         
         return summary
     
+    def _report_cache_path(self, df: pd.DataFrame) -> Optional[Path]:
+        """
+        Caminho do relatório em cache para estas transações
+        
+        A chave combina o hash vetorizado do conteúdo (hash_pandas_object),
+        os nomes das colunas e a versão (mtime) do plano de contas.
+        
+        Args:
+            df: DataFrame com transações classificadas
+            
+        Returns:
+            Caminho do arquivo .pkl ou None se o cache estiver desativado
+        """
+        if not self.report_cache_dir:
+            return None
+        
+        h = hashlib.blake2b(digest_size=16)
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        h.update("|".join(map(str, df.columns)).encode())
+        h.update(self._plano_versao)
+        return Path(self.report_cache_dir) / f"report_{h.hexdigest()}.pkl"
+    
+    def _save_report_cache(self, report: Dict[str, Any], cache_path: Path) -> None:
+        """
+        Grava o relatório no cache de forma atômica e descarta os mais antigos
+        
+        Args:
+            report: Relatório gerado
+            cache_path: Caminho retornado por _report_cache_path
+        """
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # Nome temporário único: outra thread (ou worker) pode gravar a mesma chave
+            with tempfile.NamedTemporaryFile(dir=cache_path.parent, suffix=".tmp", delete=False) as f:
+                pickle.dump(report, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f.name, cache_path)
+            
+            antigos = sorted(cache_path.parent.glob("report_*.pkl"), key=lambda p: p.stat().st_mtime)
+            for antigo in antigos[:-REPORT_CACHE_MAX_FILES]:
+                antigo.unlink(missing_ok=True)
+        except Exception as e:
+            print(f"⚠️  Não foi possível salvar o relatório em cache: {e}")
+    
     def generate_full_report(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
         Gera relatório completo BASEADO EXCLUSIVAMENTE EM DADOS REAIS dos arquivos OFX
@@ -508,6 +747,40 @@ class FinancialAnalyzer:
         Não gera valores default, fictícios ou hardcoded. Se não houver dados suficientes,
         retorna indicadores claros de insuficiência de dados.
         
+        O relatório é memorizado em disco (REPORT_CACHE_DIR) pelo conteúdo das
+        transações e pela versão do plano de contas: os mesmos dados não
+        recalculam DRE/DFC/categorias/tendência.
+        
+        Args:
+            df: DataFrame com transações classificadas dos arquivos OFX REAIS
+            
+        Returns:
+            Dicionário com relatório completo baseado em dados reais
+        """
+        report = None
+        cache_path = self._report_cache_path(df)
+        if cache_path is not None and cache_path.exists():
+            try:
+                with open(cache_path, 'rb') as f:
+                    report = pickle.load(f)
+                print(f"♻️  Relatório financeiro recuperado do cache ({cache_path.name})")
+            except Exception as e:
+                print(f"⚠️  Cache de relatório inválido, recalculando: {e}")
+        
+        if report is None:
+            report = self._build_full_report(df)
+            if cache_path is not None:
+                self._save_report_cache(report, cache_path)
+        
+        # A data de geração fica fora do cache: vale o momento desta chamada
+        return {**report, 'data_geracao': datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
+    
+    def _build_full_report(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Calcula o relatório completo, sem passar pelo cache (ver generate_full_report)
+        
+        Não inclui 'data_geracao', que generate_full_report acrescenta a cada chamada.
+        
         Args:
             df: DataFrame com transações classificadas dos arquivos OFX REAIS
             
@@ -524,6 +797,9 @@ class FinancialAnalyzer:
         
         print(f"✅ {len(df)} transações reais encontradas nos arquivos OFX")
         
+        # Converte as datas uma única vez para todas as análises abaixo
+        df = self._add_period_columns(df)
+        
         # Enriquece com plano de contas
         df_enriched = self.enrich_with_plan(df)
         
@@ -548,7 +824,6 @@ class FinancialAnalyzer:
         comparacoes = self.get_all_month_comparisons(df)
         
         report = {
-            'data_geracao': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
             'sumario': sumario,
             'dre': dre,
             'dfc': dfc,
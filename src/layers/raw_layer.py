@@ -1,21 +1,64 @@
 """
 RAW LAYER - Camada de Ingestão de Dados
-Responsável por ler arquivos OFX e gerar dados em formato JSON
+Responsável por ler arquivos OFX e gerar dados brutos em Parquet (ou JSON)
 """
 
-import json
+import io
+import os
+import multiprocessing
+import orjson
 import ofxparse
-from typing import List, Dict, Any
+import pyarrow as pa
+import pyarrow.parquet as pq
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Union
 from pathlib import Path
 
 
+# Esquema fixo das transações brutas: evita inferência de tipos linha a linha
+RAW_SCHEMA = pa.schema([
+    ("cod_banco", pa.string()),
+    ("banco", pa.string()),
+    ("agencia", pa.string()),
+    ("num_conta", pa.string()),
+    ("tipo_conta", pa.string()),
+    ("data_inicio", pa.string()),
+    ("data_fim", pa.string()),
+    ("saldo", pa.float64()),
+    ("favorecido", pa.string()),
+    ("tipo_transacao", pa.string()),
+    ("data", pa.string()),
+    ("valor", pa.float64()),
+    ("descricao", pa.string()),
+])
+
+# Transações em Structure-of-Arrays: uma lista por coluna de RAW_SCHEMA
+Colunas = Dict[str, List[Any]]
+
+# Contexto dos processos de parsing: o worker web tem várias threads ativas, e
+# um fork dele pode herdar locks presos. O forkserver cria os processos a
+# partir de um servidor limpo que já importou este módulo. Sem forkserver
+# (ex.: Windows), vale o padrão da plataforma
+if 'forkserver' in multiprocessing.get_all_start_methods():
+    _MP_CONTEXT = multiprocessing.get_context('forkserver')
+    _MP_CONTEXT.set_forkserver_preload([__name__])
+else:
+    _MP_CONTEXT = None
+
+
+def _colunas_vazias() -> Colunas:
+    """Cria o dicionário de colunas vazio, na ordem de RAW_SCHEMA"""
+    return {nome: [] for nome in RAW_SCHEMA.names}
+
+
 class RawLayer:
-    """Processa arquivos OFX e retorna dados brutos em formato JSON"""
+    """Processa arquivos OFX e retorna dados brutos em formato tabular (Parquet/JSON)"""
     
     def __init__(self):
         self.transactions = []
     
-    def process_ofx_file(self, file_path: str) -> List[Dict[str, Any]]:
+    def process_ofx_file(self, file_path: str) -> Colunas:
         """
         Processa um único arquivo OFX
         
@@ -23,21 +66,23 @@ class RawLayer:
             file_path: Caminho do arquivo OFX
             
         Returns:
-            Lista de transações extraídas do arquivo
+            Colunas (uma lista por campo) com as transações extraídas do arquivo
         """
-        transactions = []
-        
-        # Tenta diferentes encodings comuns em arquivos OFX
-        encodings = ["utf-8", "latin-1", "cp1252", "iso-8859-1"]
+        # Lê o arquivo uma única vez. O ofxparse decodifica o conteúdo pelo
+        # CHARSET do cabeçalho; muitos bancos declaram 1252 mas gravam UTF-8,
+        # então um arquivo UTF-8 válido vai como texto (a biblioteca o converte
+        # de volta para bytes) e, se isso falhar, os bytes originais seguem
+        # direto para a decodificação do cabeçalho
+        raw = Path(file_path).read_bytes()
         ofx = None
         
-        for encoding in encodings:
+        try:
+            ofx = ofxparse.OfxParser.parse(io.StringIO(raw.decode("utf-8")))
+        except Exception:
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    ofx = ofxparse.OfxParser.parse(f)
-                    break
+                ofx = ofxparse.OfxParser.parse(io.BytesIO(raw))
             except Exception:
-                continue
+                pass
         
         if ofx is None:
             raise Exception(f"Não foi possível ler o arquivo {file_path} com os encodings disponíveis")
@@ -51,62 +96,121 @@ class RawLayer:
         if account.institution and account.institution.organization:
             banco_nome = account.institution.organization
         
-        # Processa cada transação
+        # Processa cada transação, acumulando uma lista por coluna
+        cols = _colunas_vazias()
+        favorecido, tipo_transacao, data = cols["favorecido"], cols["tipo_transacao"], cols["data"]
+        valor, descricao = cols["valor"], cols["descricao"]
         for transaction in statement.transactions:
-            registro = {
-                "cod_banco": account.routing_number,
-                "banco": banco_nome,
-                "agencia": account.branch_id,
-                "num_conta": account.account_id,
-                "tipo_conta": account.account_type,
-                "data_inicio": statement.start_date.strftime('%d/%m/%Y') if statement.start_date else None,
-                "data_fim": statement.end_date.strftime('%d/%m/%Y') if statement.end_date else None,
-                "saldo": float(statement.balance) if statement.balance else 0.0,
-                "favorecido": transaction.payee,
-                "tipo_transacao": transaction.type,
-                "data": transaction.date.strftime('%d/%m/%Y') if transaction.date else None,
-                "valor": float(transaction.amount) if transaction.amount else 0.0,
-                "descricao": transaction.memo,
-            }
-            transactions.append(registro)
-        
-        return transactions
+            favorecido.append(transaction.payee)
+            tipo_transacao.append(transaction.type)
+            data.append(transaction.date.strftime('%d/%m/%Y') if transaction.date else None)
+            valor.append(float(transaction.amount) if transaction.amount else 0.0)
+            descricao.append(transaction.memo)
+        
+        # Campos da conta/extrato são iguais para todas as transações do arquivo
+        n = len(valor)
+        cols["cod_banco"] = [account.routing_number] * n
+        cols["banco"] = [banco_nome] * n
+        cols["agencia"] = [account.branch_id] * n
+        cols["num_conta"] = [account.account_id] * n
+        cols["tipo_conta"] = [account.account_type] * n
+        cols["data_inicio"] = [statement.start_date.strftime('%d/%m/%Y') if statement.start_date else None] * n
+        cols["data_fim"] = [statement.end_date.strftime('%d/%m/%Y') if statement.end_date else None] * n
+        cols["saldo"] = [float(statement.balance) if statement.balance else 0.0] * n
+        
+        return cols
+    
+    @staticmethod
+    def parse_single(file_path: str) -> Colunas:
+        """
+        Processa um único arquivo OFX de forma isolada
+        
+        Pode ser enviado para outro processo (ex: ProcessPoolExecutor), pois
+        não depende de estado da instância. Erros de leitura são registrados
+        e resultam em colunas vazias, como em process_multiple_ofx_files.
+        
+        Args:
+            file_path: Caminho do arquivo OFX
+            
+        Returns:
+            Colunas com as transações extraídas do arquivo
+        """
+        try:
+            return RawLayer().process_ofx_file(file_path)
+        except Exception as e:
+            print(f"❌ Erro ao processar arquivo {file_path}: {str(e)}")
+            return _colunas_vazias()
     
-    def process_multiple_ofx_files(self, file_paths: List[str]) -> List[Dict[str, Any]]:
+    def process_multiple_ofx_files(self, file_paths: List[str]) -> Colunas:
         """
         Processa múltiplos arquivos OFX
         
+        O parsing do OFX é CPU-bound e cada arquivo é independente: com mais
+        de um arquivo, cada um vai para um processo (ProcessPoolExecutor),
+        contornando o GIL. A ordem das transações segue a ordem dos arquivos.
+        Os processos vêm de _MP_CONTEXT, não de um fork do processo atual.
+        
         Args:
             file_paths: Lista de caminhos dos arquivos OFX
             
         Returns:
-            Lista consolidada de todas as transações
+            Colunas consolidadas de todas as transações
         """
-        all_transactions = []
+        if len(file_paths) > 1:
+            max_workers = min(len(file_paths), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=_MP_CONTEXT) as executor:
+                resultados = list(executor.map(RawLayer.parse_single, file_paths, chunksize=1))
+        else:
+            resultados = [RawLayer.parse_single(fp) for fp in file_paths]
         
-        for file_path in file_paths:
-            try:
-                transactions = self.process_ofx_file(file_path)
-                all_transactions.extend(transactions)
-            except Exception as e:
-                print(f"❌ Erro ao processar arquivo {file_path}: {str(e)}")
-                continue
+        return {
+            nome: list(chain.from_iterable(cols[nome] for cols in resultados))
+            for nome in RAW_SCHEMA.names
+        }
+    
+    @staticmethod
+    def to_table(transactions: Union[Colunas, List[Dict[str, Any]]]) -> pa.Table:
+        """
+        Converte as transações em uma tabela Arrow com esquema fixo
+        
+        Args:
+            transactions: Colunas de transações (ou lista de registros, por compatibilidade)
+            
+        Returns:
+            Tabela pyarrow com as colunas de RAW_SCHEMA
+        """
+        if isinstance(transactions, list):
+            return pa.Table.from_pylist(transactions, schema=RAW_SCHEMA)
+        return pa.Table.from_pydict(transactions, schema=RAW_SCHEMA)
+    
+    def save_to_parquet(self, transactions: Union[Colunas, List[Dict[str, Any]]], output_path: str) -> None:
+        """
+        Salva as transações em um arquivo Parquet (zstd)
+        
+        Args:
+            transactions: Colunas de transações (ou lista de registros)
+            output_path: Caminho do arquivo Parquet de saída
+        """
+        # Garante que o diretório existe
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
-        return all_transactions
+        pq.write_table(self.to_table(transactions), output_path, compression='zstd')
     
-    def save_to_json(self, transactions: List[Dict[str, Any]], output_path: str) -> None:
+    def save_to_json(self, transactions: Union[Colunas, List[Dict[str, Any]]], output_path: str) -> None:
         """
-        Salva as transações em um arquivo JSON
+        Salva as transações em um arquivo JSON (compatibilidade; prefira save_to_parquet)
         
         Args:
-            transactions: Lista de transações
+            transactions: Colunas de transações (ou lista de registros)
             output_path: Caminho do arquivo JSON de saída
         """
         # Garante que o diretório existe
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(transactions, f, ensure_ascii=False, indent=4)
+        # orjson grava UTF-8 direto em bytes; sem indentação, já que o arquivo
+        # é lido pela camada TRUSTED e não por pessoas
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(self.to_table(transactions).to_pylist()))
     
     def execute(self, file_paths: List[str], output_json_path: str) -> Dict[str, Any]:
         """
@@ -114,7 +218,7 @@ class RawLayer:
         
         Args:
             file_paths: Lista de caminhos dos arquivos OFX
-            output_json_path: Caminho do arquivo JSON de saída
+            output_json_path: Caminho do arquivo de saída (.parquet ou .json)
             
         Returns:
             Dicionário com informações do processamento
@@ -123,24 +227,28 @@ class RawLayer:
         
         # Processa todos os arquivos
         transactions = self.process_multiple_ofx_files(file_paths)
+        total_transactions = len(transactions["valor"])
         
-        if not transactions:
+        if not total_transactions:
             raise Exception("Nenhuma transação foi extraída dos arquivos OFX")
         
-        # Salva em JSON
-        self.save_to_json(transactions, output_json_path)
+        # Salva em Parquet (ou JSON, conforme a extensão do arquivo de saída)
+        if Path(output_json_path).suffix.lower() == ".parquet":
+            self.save_to_parquet(transactions, output_json_path)
+        else:
+            self.save_to_json(transactions, output_json_path)
         
         result = {
             "status": "success",
             "total_files": len(file_paths),
-            "total_transactions": len(transactions),
+            "total_transactions": total_transactions,
             "output_file": output_json_path
         }
         
         print(f"✅ [RAW LAYER] Processamento concluído!")
         print(f"   📁 Arquivos processados: {len(file_paths)}")
-        print(f"   📊 Transações extraídas: {len(transactions)}")
-        print(f"   💾 JSON salvo em: {output_json_path}")
+        print(f"   📊 Transações extraídas: {total_transactions}")
+        print(f"   💾 Dados brutos salvos em: {output_json_path}")
         
         return result
 
@@ -3,61 +3,577 @@ STRATEGIC ANALYZER - Análise Estratégica com IA
 Gera insights, SWOT e recomendações baseadas APENAS nos dados reais
 """
 
+import asyncio
 import pandas as pd
-import json
-import time
-from typing import Dict, Any, List
+import orjson
+import httpx
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple, Type
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from openai import AsyncOpenAI
 from langchain_openai import ChatOpenAI
+from langchain_core.messages import AIMessage, convert_to_openai_messages
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from src.utils.ai_decision_logger import get_logger
+from src.utils.llm_cache import LLMResponseCache
 
 load_dotenv()
 
+# Preparo de uma chamada à IA: prompt, schema da saída estruturada (None para
+# texto livre) e entrada do prompt
+Preparo = Tuple[ChatPromptTemplate, Optional[Type[BaseModel]], Dict[str, Any]]
+
+
+def _json_indentado(dados: Any) -> str:
+    """
+    Serializa dados para os logs de raciocínio (JSON indentado, UTF-8 sem escapes)
+    
+    Args:
+        dados: Estrutura a serializar (dicts, listas, tipos numpy)
+        
+    Returns:
+        Texto JSON com indentação de 2 espaços
+    """
+    return orjson.dumps(
+        dados, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    ).decode()
+
+
+def _json_compacto(dados: Any) -> str:
+    """
+    Serializa dados para os prompts em JSON compacto (sem indentação: o modelo
+    lê igual e a indentação custaria ~15% a mais de tokens de entrada)
+    
+    Args:
+        dados: Estrutura a serializar (dicts, listas, tipos numpy)
+        
+    Returns:
+        Texto JSON sem espaços
+    """
+    return orjson.dumps(dados, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def _marcadores(itens: List[str]) -> str:
+    """Formata itens como lista com marcadores ("  • item"), um por linha"""
+    return "  • " + "\n  • ".join(itens) if itens else ""
+
+
+# Campos levados aos prompts (projeção dos dados do relatório financeiro): o
+# que não aparece nas instruções das análises só custaria tokens
+CAMPOS_MENSAIS = ("mes", "receita", "despesa", "saldo", "margem")
+CAMPOS_CATEGORIA = ("categoria", "total", "quantidade", "percentual")
+CAMPOS_TRANSACAO = ("data", "descricao", "categoria", "valor")
+
+
+def _campos(registro: Dict[str, Any], campos: Tuple[str, ...]) -> Dict[str, Any]:
+    """Seleciona os campos de um registro, arredondando valores a 2 casas"""
+    return {
+        c: round(registro[c], 2) if isinstance(registro[c], float) else registro[c]
+        for c in campos if c in registro
+    }
+
+
+def _projetar_resumo(financial_summary: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Projeta o sumário do relatório financeiro para os prompts
+    
+    Args:
+        financial_summary: Sumário (periodo, totais, transacoes, top_despesas, top_receitas)
+        
+    Returns:
+        Período em meses, totais, contagens e maiores transações (campos essenciais)
+    """
+    periodo = financial_summary.get("periodo", {})
+    return {
+        "periodo": {"inicio": periodo.get("mes_inicio"), "fim": periodo.get("mes_fim")},
+        "totais": _campos(financial_summary.get("totais", {}), ("receita", "despesa", "saldo", "margem")),
+        "transacoes": _campos(financial_summary.get("transacoes", {}), ("receitas", "despesas", "total")),
+        "top_despesas": [_campos(t, CAMPOS_TRANSACAO) for t in financial_summary.get("top_despesas", [])],
+        "top_receitas": [_campos(t, CAMPOS_TRANSACAO) for t in financial_summary.get("top_receitas", [])]
+    }
+
+
+def _projetar_mensal(monthly_analysis: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Projeta a tendência mensal para os prompts (mes, receita, despesa, saldo, margem)"""
+    return [_campos(m, CAMPOS_MENSAIS) for m in monthly_analysis]
+
+
+def _projetar_categorias(category_analysis: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Projeta as 10 maiores categorias para os prompts (categoria, total, quantidade)"""
+    return [_campos(c, CAMPOS_CATEGORIA) for c in category_analysis[:10]]
+
+
+def _projetar_receitas(revenue_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Projeta os dados da análise de receitas (total e receita de cada mês)"""
+    return {
+        "totals": _campos(revenue_data.get("totals", {}), ("receita",)),
+        "monthly": [_campos(m, ("mes", "receita")) for m in revenue_data.get("monthly", [])]
+    }
+
+
+# Saídas estruturadas das análises
+class SWOTAnalysis(BaseModel):
+    forcas: List[str] = Field(description="Lista de forças identificadas nos dados")
+    fraquezas: List[str] = Field(description="Lista de fraquezas identificadas nos dados")
+    oportunidades: List[str] = Field(description="Lista de oportunidades identificadas")
+    ameacas: List[str] = Field(description="Lista de ameaças identificadas")
+
+
+class ActionPlan(BaseModel):
+    prioridade: str = Field(description="URGENTE, IMPORTANTE ou OBSERVAÇÃO")
+    titulo: str = Field(description="Título do plano de ação")
+    situacao: str = Field(description="Descrição da situação atual")
+    impacto: str = Field(description="Impacto no negócio")
+    acoes: List[str] = Field(description="Lista de 3-5 ações específicas")
+
+
+class ActionPlans(BaseModel):
+    planos: List[ActionPlan] = Field(description="Lista de 2-4 planos de ação")
+
+
+class KeyEvent(BaseModel):
+    tipo: str = Field(description="POSITIVO, NEUTRO ou NEGATIVO")
+    titulo: str = Field(description="Título curto do evento")
+    descricao: str = Field(description="Descrição detalhada com dados")
+
+
+class KeyEvents(BaseModel):
+    eventos: List[KeyEvent] = Field(description="Exatamente 3 eventos principais", min_length=3, max_length=3)
+
+
+class FullStrategicAnalysis(BaseModel):
+    swot: SWOTAnalysis = Field(description="Análise SWOT baseada nos dados")
+    key_events: List[KeyEvent] = Field(description="Exatamente 3 eventos principais", min_length=3, max_length=3)
+    action_plans: List[ActionPlan] = Field(description="Lista de 2-4 planos de ação baseados no SWOT")
+
+
+# Limites de saída por chamada: a latência cresce com os tokens gerados. As
+# saídas estruturadas usam temperatura 0 (o JSON não ganha nada com variação)
+# e limites folgados para o tamanho pedido em cada prompt, já que uma resposta
+# truncada não pode ser lida
+TEMPERATURA_ESTRUTURADA = 0.0
+MAX_TOKENS_TEXTO = 600
+MAX_TOKENS_POR_SCHEMA = {
+    SWOTAnalysis: 800,
+    ActionPlans: 1200,
+    KeyEvents: 600,
+    FullStrategicAnalysis: 2500,
+}
+
+
+# Com menos meses que isso não há tendência a analisar: SWOT, eventos-chave e
+# planos de ação não vão à IA e o relatório traz um aviso no lugar
+MIN_MESES_ANALISE = 2
+AVISO_DADOS_INSUFICIENTES = (
+    f"Dados insuficientes para análise estratégica: são necessários ao menos "
+    f"{MIN_MESES_ANALISE} meses de transações"
+)
+
+
+def _swot_vazio() -> Dict[str, List[str]]:
+    """SWOT sem itens (análise não gerada)"""
+    return {"forcas": [], "fraquezas": [], "oportunidades": [], "ameacas": []}
+
+
+def _eventos_dados_insuficientes() -> List[Dict[str, str]]:
+    """Evento-chave de aviso usado quando o período é curto demais para a IA"""
+    return [{"tipo": "NEUTRO", "titulo": "Dados insuficientes", "descricao": AVISO_DADOS_INSUFICIENTES}]
+
+
+def _analise_dados_insuficientes() -> Dict[str, Any]:
+    """Resposta fixa de generate_strategic_analysis para períodos curtos demais"""
+    return {
+        "swot": _swot_vazio(),
+        "key_events": _eventos_dados_insuficientes(),
+        "action_plans": [{
+            "prioridade": "OBSERVAÇÃO",
+            "titulo": "Ampliar o período analisado",
+            "situacao": AVISO_DADOS_INSUFICIENTES,
+            "impacto": "Sem histórico mensal não é possível identificar tendências nem priorizar ações",
+            "acoes": [f"Processar os extratos OFX de pelo menos {MIN_MESES_ANALISE} meses"]
+        }]
+    }
+
 
 class StrategicAnalyzer:
     """Analisa dados financeiros e gera insights estratégicos com IA"""
     
-    def __init__(self, model: str = "gpt-4o", temperature: float = 0.3):
+    def __init__(self, model: str = "gpt-4o", temperature: float = 0.3,
+                 cache_path: Optional[str] = "./src/cache/llm_cache.sqlite"):
         """
         Inicializa o analisador estratégico
         
         Args:
             model: Modelo de IA (gpt-4o para análises mais sofisticadas)
-            temperature: Temperatura (0.3 para ser criativo mas factual)
+            temperature: Temperatura das análises em texto livre (0.3 para ser
+                criativo mas factual; as estruturadas usam TEMPERATURA_ESTRUTURADA)
+            cache_path: Arquivo SQLite do cache de respostas da IA (None desativa)
         """
         self.model = model
         self.temperature = temperature
-        self.llm = ChatOpenAI(model=self.model, temperature=self.temperature)
+        
+        # Respostas já obtidas para o mesmo prompt (mesmos dados) são reaproveitadas
+        self._cache = LLMResponseCache(cache_path) if cache_path else None
+        
+        # Loop e pool de conexões próprios para as chamadas assíncronas: as
+        # análises independentes do relatório vão à IA em paralelo. Limites de
+        # taxa (429) são tratados pelo cliente OpenAI com retentativas e backoff
+        # exponencial (respeitando Retry-After), sem pausas fixas entre chamadas
+        self._loop = asyncio.new_event_loop()
+        self._http = httpx.AsyncClient(timeout=httpx.Timeout(120.0, connect=5.0))
+        self.llm = ChatOpenAI(
+            model=self.model,
+            http_async_client=self._http,
+            max_retries=4,
+            **self._parametros(None)
+        )
+        
+        # Modelos com saída estruturada montados uma única vez (with_structured_output
+        # converte o schema Pydantic em JSON Schema a cada chamada)
+        self._llm_estruturado = {}
+        for schema in MAX_TOKENS_POR_SCHEMA:
+            self._llm_para(schema)
         self.logger = get_logger()
     
-    def generate_swot_analysis(self, financial_data: Dict[str, Any]) -> Dict[str, List[str]]:
+    def _parametros(self, schema: Optional[Type[BaseModel]]) -> Dict[str, Any]:
         """
-        Gera análise SWOT baseada nos dados financeiros reais
+        Temperatura e limite de tokens de saída das chamadas de um schema
         
         Args:
-            financial_data: Dados financeiros sumarizados
+            schema: Schema da saída estruturada (None para texto livre)
+            
+        Returns:
+            Dicionário com temperature e max_tokens (None se não houver limite)
+        """
+        if schema is None:
+            return {"temperature": self.temperature, "max_tokens": MAX_TOKENS_TEXTO}
+        return {"temperature": TEMPERATURA_ESTRUTURADA, "max_tokens": MAX_TOKENS_POR_SCHEMA.get(schema)}
+    
+    def _llm_para(self, schema: Optional[Type[BaseModel]]):
+        """
+        Modelo a usar para um schema de saída (reaproveita os já montados)
+        
+        Args:
+            schema: Schema da saída estruturada (None para texto livre)
+            
+        Returns:
+            Runnable do modelo, com saída estruturada se houver schema
+        """
+        if schema is None:
+            return self.llm
+        if schema not in self._llm_estruturado:
+            llm = ChatOpenAI(
+                model=self.model,
+                http_async_client=self._http,
+                max_retries=4,
+                **self._parametros(schema)
+            )
+            # include_raw: a mensagem original traz o uso de tokens (ver _desembrulhar)
+            self._llm_estruturado[schema] = llm.with_structured_output(schema, include_raw=True)
+        return self._llm_estruturado[schema]
+    
+    def _desembrulhar(self, resposta: Any) -> Any:
+        """
+        Mostra o uso de tokens de entrada de uma chamada (quantos vieram do
+        cache de prompt da OpenAI) e devolve a resposta no formato de _invocar
+        
+        Os prompts começam pelas partes fixas (system e instruções) e terminam
+        nos dados, para que o prefixo comum seja reaproveitado entre chamadas.
+        
+        Args:
+            resposta: Mensagem da IA ou, na saída estruturada, o dict com raw,
+                parsed e parsing_error de with_structured_output(include_raw=True)
+            
+        Returns:
+            Instância do schema ou mensagem da IA (texto livre)
+        """
+        bruta = resposta
+        if isinstance(resposta, dict):
+            if resposta.get("parsing_error") is not None:
+                raise resposta["parsing_error"]
+            if resposta.get("parsed") is None:
+                raise ValueError("A IA não retornou a saída estruturada esperada")
+            bruta, resposta = resposta["raw"], resposta["parsed"]
+        
+        uso = getattr(bruta, "usage_metadata", None)
+        if uso:
+            em_cache = (uso.get("input_token_details") or {}).get("cache_read", 0)
+            print(f"   💾 Tokens de entrada: {uso['input_tokens']} ({em_cache} do cache de prompt)")
+        return resposta
+    
+    def _cache_key(self, preparo: Preparo) -> str:
+        """
+        Chave do cache para um preparo: modelo, temperatura, limite de tokens,
+        schema e o prompt já formatado com os dados (qualquer mudança nos dados
+        muda a chave)
+        
+        Args:
+            preparo: Prompt, schema e entrada montados por um _preparar_*
             
         Returns:
-            Dicionário com Forças, Fraquezas, Oportunidades e Ameaças
+            Chave gerada por LLMResponseCache.make_key
         """
-        class SWOTAnalysis(BaseModel):
-            forcas: List[str] = Field(description="Lista de forças identificadas nos dados")
-            fraquezas: List[str] = Field(description="Lista de fraquezas identificadas nos dados")
-            oportunidades: List[str] = Field(description="Lista de oportunidades identificadas")
-            ameacas: List[str] = Field(description="Lista de ameaças identificadas")
+        prompt, schema, entrada = preparo
+        mensagens = prompt.format_messages(**entrada)
+        return LLMResponseCache.make_key(
+            self.model, *self._parametros(schema).values(), schema.__name__ if schema else "texto",
+            *(f"{m.type}:{m.content}" for m in mensagens)
+        )
+    
+    def _ler_cache(self, chave: str, schema: Optional[Type[BaseModel]]) -> Optional[Any]:
+        """
+        Busca uma resposta no cache, no mesmo formato devolvido pela IA
         
+        Args:
+            chave: Chave gerada por _cache_key
+            schema: Schema da saída estruturada (None para texto livre)
+            
+        Returns:
+            Instância do schema, mensagem de texto ou None se não houver cache
+        """
+        salvo = self._cache.get(chave) if self._cache is not None else None
+        if salvo is None:
+            return None
+        return schema.model_validate(salvo["saida"]) if schema else AIMessage(content=salvo["saida"])
+    
+    def _gravar_cache(self, chave: str, resposta: Any) -> None:
+        """
+        Guarda uma resposta da IA no cache (saída estruturada como dict)
+        
+        Args:
+            chave: Chave gerada por _cache_key
+            resposta: Instância do schema ou mensagem de texto
+        """
+        if self._cache is None:
+            return
+        saida = resposta.content if isinstance(resposta, AIMessage) else resposta.model_dump()
+        self._cache.set(chave, {"saida": saida})
+    
+    def _invocar(self, preparo: Preparo, cache_bust: bool = False) -> Any:
+        """
+        Faz a chamada à IA de um preparo (saída estruturada se houver schema)
+        
+        Args:
+            preparo: Prompt, schema e entrada montados por um _preparar_*
+            cache_bust: Ignora o cache e consulta a IA novamente
+            
+        Returns:
+            Instância do schema ou mensagem da IA (texto livre)
+        """
+        prompt, schema, entrada = preparo
+        chave = self._cache_key(preparo)
+        resposta = None if cache_bust else self._ler_cache(chave, schema)
+        if resposta is None:
+            llm = self._llm_para(schema)
+            resposta = self._desembrulhar((prompt | llm).invoke(entrada))
+            self._gravar_cache(chave, resposta)
+        return resposta
+    
+    async def _ainvocar(self, preparo: Preparo, cache_bust: bool = False,
+                        ao_receber: Optional[Callable[[str], None]] = None) -> Any:
+        """
+        Versão assíncrona de _invocar (via ainvoke)
+        
+        Args:
+            preparo: Prompt, schema e entrada montados por um _preparar_*
+            cache_bust: Ignora o cache e consulta a IA novamente
+            ao_receber: Recebe os trechos do texto livre à medida que a IA os gera
+                (via astream; vindo do cache, o texto chega inteiro de uma vez)
+            
+        Returns:
+            Instância do schema ou mensagem da IA (texto livre)
+        """
+        prompt, schema, entrada = preparo
+        chave = self._cache_key(preparo)
+        resposta = None if cache_bust else self._ler_cache(chave, schema)
+        if resposta is None:
+            llm = self._llm_para(schema)
+            if ao_receber is not None and schema is None:
+                partes = []
+                async for chunk in (prompt | llm).astream(entrada):
+                    partes.append(chunk.content)
+                    ao_receber(chunk.content)
+                resposta = AIMessage(content="".join(partes))
+            else:
+                resposta = self._desembrulhar(await (prompt | llm).ainvoke(entrada))
+            self._gravar_cache(chave, resposta)
+        elif ao_receber is not None and schema is None:
+            ao_receber(resposta.content)
+        return resposta
+    
+    def _stream(self, preparo: Preparo, cache_bust: bool = False) -> Iterator[str]:
+        """
+        Faz a chamada à IA de um preparo de texto livre em streaming
+        
+        Args:
+            preparo: Prompt, schema (None) e entrada montados por um _preparar_*
+            cache_bust: Ignora o cache e consulta a IA novamente
+            
+        Returns:
+            Iterador com os trechos do texto à medida que a IA os gera (vindo do
+            cache, o texto sai inteiro em um único trecho)
+        """
+        prompt, _, entrada = preparo
+        chave = self._cache_key(preparo)
+        em_cache = None if cache_bust else self._ler_cache(chave, None)
+        if em_cache is not None:
+            yield em_cache.content
+            return
+        
+        partes = []
+        for chunk in (prompt | self.llm).stream(entrada):
+            partes.append(chunk.content)
+            yield chunk.content
+        self._gravar_cache(chave, AIMessage(content="".join(partes)))
+    
+    async def _abatch_api(self, preparos: Dict[str, Preparo], poll_interval: float = 30.0,
+                          cache_bust: bool = False) -> Dict[str, Any]:
+        """
+        Envia vários preparos em um único job da OpenAI Batch API (metade do custo)
+        
+        Cada preparo vira uma linha do JSONL com o mesmo prompt e o schema de
+        saída como response_format; as respostas são convertidas para os mesmos
+        tipos de _invocar (instância do schema ou mensagem de texto). Preparos
+        com resposta em cache não são enviados.
+        
+        Args:
+            preparos: Preparos indexados por nome (usado como custom_id)
+            poll_interval: Segundos entre consultas ao status do job
+            cache_bust: Ignora o cache e envia todos os preparos
+            
+        Returns:
+            Para cada nome, a resposta convertida ou a Exception correspondente
+        """
+        chaves = {nome: self._cache_key(preparo) for nome, preparo in preparos.items()}
+        saidas: Dict[str, Any] = {}
+        if not cache_bust:
+            for nome, (_, schema, _) in preparos.items():
+                em_cache = self._ler_cache(chaves[nome], schema)
+                if em_cache is not None:
+                    saidas[nome] = em_cache
+        
+        pendentes = {nome: preparo for nome, preparo in preparos.items() if nome not in saidas}
+        if not pendentes:
+            return saidas
+        
+        client = AsyncOpenAI(http_client=self._http, max_retries=4)
+        
+        linhas = []
+        for nome, (prompt, schema, entrada) in pendentes.items():
+            body = {
+                "model": self.model,
+                "messages": convert_to_openai_messages(prompt.format_messages(**entrada))
+            }
+            body.update({k: v for k, v in self._parametros(schema).items() if v is not None})
+            if schema is not None:
+                body["response_format"] = {
+                    "type": "json_schema",
+                    "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema()}
+                }
+            linhas.append(orjson.dumps({
+                "custom_id": nome,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body
+            }))
+        
+        print(f"   📦 Enviando {len(pendentes)} análises para a Batch API...")
+        batch_file = await client.files.create(
+            file=("estrategico.jsonl", b"\n".join(linhas)),
+            purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            batch = await client.batches.retrieve(batch.id)
+            print(f"   ⏳ Batch {batch.id}: {batch.status}")
+        
+        erro_job = RuntimeError(f"Batch {batch.id} terminou com status '{batch.status}'")
+        saidas.update({nome: erro_job for nome in pendentes})
+        
+        # Resultados (e erros por requisição) voltam indexados pelo custom_id
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            conteudo = await client.files.content(file_id)
+            for linha in conteudo.text.splitlines():
+                if not linha.strip():
+                    continue
+                item = orjson.loads(linha)
+                nome = item["custom_id"]
+                response = item.get("response") or {}
+                try:
+                    if response.get("status_code") != 200:
+                        raise RuntimeError(item.get("error") or response.get("body"))
+                    content = response["body"]["choices"][0]["message"]["content"]
+                    schema = pendentes[nome][1]
+                    saidas[nome] = schema.model_validate_json(content) if schema else AIMessage(content=content)
+                    self._gravar_cache(chaves[nome], saidas[nome])
+                except Exception as e:
+                    saidas[nome] = e
+        
+        return saidas
+    
+    async def _executar(self, tarefas: Dict[str, Tuple[Preparo, Callable[[Any], Any]]],
+                        mode: str = "realtime", cache_bust: bool = False,
+                        on_progress: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+        """
+        Executa um conjunto de análises independentes e conclui cada uma
+        
+        Args:
+            tarefas: Para cada nome, o preparo e a função que processa/loga a resposta
+            mode: "realtime" (ainvoke concorrentes) ou "batch" (um job da Batch API)
+            cache_bust: Ignora o cache de respostas da IA
+            on_progress: Recebe (nome, trecho) do texto livre em streaming (só realtime)
+            
+        Returns:
+            Para cada nome, o resultado concluído ou a Exception correspondente
+        """
+        if mode == "batch":
+            respostas = await self._abatch_api(
+                {nome: preparo for nome, (preparo, _) in tarefas.items()}, cache_bust=cache_bust
+            )
+        else:
+            lista = await asyncio.gather(
+                *(
+                    self._ainvocar(
+                        preparo, cache_bust,
+                        (lambda trecho, nome=nome: on_progress(nome, trecho)) if on_progress else None
+                    )
+                    for nome, (preparo, _) in tarefas.items()
+                ),
+                return_exceptions=True
+            )
+            respostas = dict(zip(tarefas, lista))
+        
+        saidas = {}
+        for nome, (_, concluir) in tarefas.items():
+            resposta = respostas[nome]
+            if isinstance(resposta, BaseException):
+                saidas[nome] = resposta
+                continue
+            try:
+                saidas[nome] = concluir(resposta)
+            except Exception as e:
+                saidas[nome] = e
+        
+        return saidas
+    
+    def _preparar_swot_analysis(self, financial_data: Dict[str, Any]) -> Preparo:
+        """Monta o prompt, o schema de saída e a entrada de generate_swot_analysis"""
         prompt = ChatPromptTemplate.from_messages([
             ("system", """Você é um analista financeiro estratégico especializado em análise SWOT.
 Analise APENAS os dados fornecidos, sem inventar informações.
 Seja específico e use números dos dados quando disponível.
 Cada item deve ter 1-2 frases concisas e objetivas."""),
-            ("human", """Analise os dados financeiros e gere uma análise SWOT:
-
-DADOS FINANCEIROS:
-{financial_data}
+            ("human", """Analise os dados financeiros abaixo e gere uma análise SWOT.
 
 INSTRUÇÕES:
 - Forças: Pontos positivos observados nos dados (crescimento, margens, eficiência)
@@ -65,54 +581,74 @@ INSTRUÇÕES:
 - Oportunidades: Potenciais melhorias baseadas nos dados
 - Ameaças: Riscos ou tendências negativas identificadas
 
-Gere 3-5 itens para cada categoria baseado APENAS nos dados fornecidos.""")
+Gere 3-5 itens para cada categoria baseado APENAS nos dados fornecidos.
+
+DADOS FINANCEIROS:
+{financial_data}""")
         ])
         
-        chain = prompt | self.llm.with_structured_output(SWOTAnalysis)
-        
-        resultado = chain.invoke({
-            "financial_data": json.dumps(financial_data, indent=2, ensure_ascii=False)
-        })
-        
+        return prompt, SWOTAnalysis, {
+            "financial_data": _json_compacto({
+                "summary": _projetar_resumo(financial_data.get("summary", {})),
+                "monthly": _projetar_mensal(financial_data.get("monthly", [])),
+                "categories": _projetar_categorias(financial_data.get("categories", []))
+            })
+        }
+    
+    def _concluir_swot_analysis(self, resultado, financial_data: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Processa e registra no log a resposta de generate_swot_analysis"""
         swot = resultado.model_dump()
+        totais = financial_data.get('summary', {}).get('totais', {})
+        input_data = {
+            "receita_total": totais.get('receita', 0),
+            "despesa_total": totais.get('despesa', 0),
+            "saldo": totais.get('saldo', 0),
+            "margem": totais.get('margem', 0),
+            "num_meses": len(financial_data.get('monthly', [])),
+            "top_categorias": [c.get('categoria', 'N/A') for c in financial_data.get('categories', [])[:5]]
+        }
+        
+        # Resposta sem conteúdo: registra sem montar o raciocínio detalhado
+        if not any(swot.values()):
+            self.logger.log_analysis_decision(
+                analysis_type="swot_analysis",
+                input_data=input_data,
+                output=swot,
+                reasoning="SWOT vazio - modelo não retornou conteúdo",
+                calculations=financial_data
+            )
+            return swot
         
         # Loga a decisão de forma DETALHADA
         self.logger.log_analysis_decision(
             analysis_type="swot_analysis",
-            input_data={
-                "receita_total": financial_data.get('summary', {}).get('totais', {}).get('receita', 0),
-                "despesa_total": financial_data.get('summary', {}).get('totais', {}).get('despesa', 0),
-                "saldo": financial_data.get('summary', {}).get('totais', {}).get('saldo', 0),
-                "margem": financial_data.get('summary', {}).get('totais', {}).get('margem', 0),
-                "num_meses": len(financial_data.get('monthly', [])),
-                "top_categorias": [c.get('categoria', 'N/A') for c in financial_data.get('categories', [])[:5]]
-            },
+            input_data=input_data,
             output=swot,
-            reasoning=f"""
+            reasoning=lambda: f"""
 ANÁLISE SWOT - RACIOCÍNIO DA IA:
 
 A IA analisou os dados financeiros do período e identificou:
 
 FORÇAS ({len(swot['forcas'])} itens):
-{chr(10).join([f'  • {f}' for f in swot['forcas']])}
+{_marcadores(swot['forcas'])}
 
 JUSTIFICATIVA: Estas forças foram identificadas analisando métricas positivas como crescimento de receita, 
 margem de lucro, eficiência operacional e tendências favoráveis nos dados do período.
 
 FRAQUEZAS ({len(swot['fraquezas'])} itens):
-{chr(10).join([f'  • {f}' for f in swot['fraquezas']])}
+{_marcadores(swot['fraquezas'])}
 
 JUSTIFICATIVA: Estas fraquezas foram identificadas analisando pontos de atenção como custos elevados,
 quedas em períodos específicos, concentração de riscos ou ineficiências operacionais.
 
 OPORTUNIDADES ({len(swot['oportunidades'])} itens):
-{chr(10).join([f'  • {o}' for o in swot['oportunidades']])}
+{_marcadores(swot['oportunidades'])}
 
 JUSTIFICATIVA: Oportunidades identificadas baseadas em potenciais de melhoria, tendências do mercado
 observadas nos dados, ou áreas subexploradas.
 
 AMEAÇAS ({len(swot['ameacas'])} itens):
-{chr(10).join([f'  • {a}' for a in swot['ameacas']])}
+{_marcadores(swot['ameacas'])}
 
 JUSTIFICATIVA: Ameaças identificadas analisando riscos externos, tendências negativas ou vulnerabilidades
 observadas nos padrões de dados.
@@ -129,46 +665,58 @@ DADOS UTILIZADOS NA ANÁLISE:
         
         return swot
     
-    def generate_monthly_diagnosis(self, 
-                                   monthly_data: Dict[str, Any],
-                                   comparison_data: Dict[str, Any]) -> str:
+    def generate_swot_analysis(self, financial_data: Dict[str, Any], cache_bust: bool = False) -> Dict[str, List[str]]:
         """
-        Gera diagnóstico detalhado de um mês baseado nos dados
+        Gera análise SWOT baseada nos dados financeiros reais
         
         Args:
-            monthly_data: Dados do mês analisado
-            comparison_data: Dados comparativos (mês anterior, se disponível)
+            financial_data: Dados financeiros sumarizados
             
         Returns:
-            Texto com diagnóstico
+            Dicionário com Forças, Fraquezas, Oportunidades e Ameaças (vazio,
+            sem chamar a IA, com menos de MIN_MESES_ANALISE meses)
         """
+        if len(financial_data.get('monthly', [])) < MIN_MESES_ANALISE:
+            return _swot_vazio()
+        preparo = self._preparar_swot_analysis(financial_data)
+        return self._concluir_swot_analysis(self._invocar(preparo, cache_bust), financial_data)
+    
+    async def agenerate_swot_analysis(self, financial_data: Dict[str, Any], cache_bust: bool = False) -> Dict[str, List[str]]:
+        """Versão assíncrona de generate_swot_analysis (chamada à IA via ainvoke)"""
+        if len(financial_data.get('monthly', [])) < MIN_MESES_ANALISE:
+            return _swot_vazio()
+        preparo = self._preparar_swot_analysis(financial_data)
+        return self._concluir_swot_analysis(await self._ainvocar(preparo, cache_bust), financial_data)
+    
+    def _preparar_monthly_diagnosis(self, monthly_data: Dict[str, Any], comparison_data: Dict[str, Any]) -> Preparo:
+        """Monta o prompt, o schema de saída e a entrada de generate_monthly_diagnosis"""
         prompt = ChatPromptTemplate.from_messages([
             ("system", """Você é um analista financeiro especializado em diagnósticos.
 Analise os dados fornecidos e gere um diagnóstico objetivo e factual.
 Use números específicos dos dados.
 Seja direto e profissional."""),
-            ("human", """Gere um diagnóstico financeiro baseado nestes dados:
-
-DADOS DO PERÍODO:
-{monthly_data}
-
-COMPARAÇÃO:
-{comparison_data}
+            ("human", """Gere um diagnóstico financeiro baseado nos dados abaixo.
 
 Gere um parágrafo de 4-6 linhas que:
 1. Resuma o desempenho do período
 2. Destaque os principais indicadores
 3. Identifique tendências observadas
-4. Use números específicos dos dados""")
+4. Use números específicos dos dados
+
+DADOS DO PERÍODO:
+{monthly_data}
+
+COMPARAÇÃO:
+{comparison_data}""")
         ])
         
-        chain = prompt | self.llm
-        
-        resultado = chain.invoke({
-            "monthly_data": json.dumps(monthly_data, indent=2, ensure_ascii=False),
-            "comparison_data": json.dumps(comparison_data, indent=2, ensure_ascii=False)
-        })
-        
+        return prompt, None, {
+            "monthly_data": _json_compacto(monthly_data),
+            "comparison_data": _json_compacto(comparison_data)
+        }
+    
+    def _concluir_monthly_diagnosis(self, resultado, monthly_data: Dict[str, Any], comparison_data: Dict[str, Any]) -> str:
+        """Processa e registra no log a resposta de generate_monthly_diagnosis"""
         diagnostico = resultado.content
         
         # Loga a análise de forma DETALHADA
@@ -176,14 +724,14 @@ Gere um parágrafo de 4-6 linhas que:
             analysis_type="monthly_diagnosis",
             input_data=monthly_data,
             output={"diagnosis": diagnostico},
-            reasoning=f"""
+            reasoning=lambda: f"""
 DIAGNÓSTICO MENSAL - RACIOCÍNIO DA IA:
 
 DADOS DO PERÍODO ANALISADO:
-{json.dumps(monthly_data, indent=2, ensure_ascii=False)}
+{_json_indentado(monthly_data)}
 
 DADOS COMPARATIVOS (mês anterior ou referência):
-{json.dumps(comparison_data, indent=2, ensure_ascii=False)}
+{_json_indentado(comparison_data)}
 
 DIAGNÓSTICO GERADO:
 {diagnostico}
@@ -207,56 +755,82 @@ PREMISSAS UTILIZADAS:
         
         return diagnostico
     
-    def generate_action_plans(self, 
-                            financial_summary: Dict[str, Any],
-                            swot: Dict[str, List[str]]) -> List[Dict[str, str]]:
+    def generate_monthly_diagnosis(self, 
+                                   monthly_data: Dict[str, Any],
+                                   comparison_data: Dict[str, Any],
+                                   cache_bust: bool = False) -> str:
         """
-        Gera planos de ação baseados na análise SWOT e dados financeiros
+        Gera diagnóstico detalhado de um mês baseado nos dados
         
         Args:
-            financial_summary: Resumo financeiro
-            swot: Análise SWOT
+            monthly_data: Dados do mês analisado
+            comparison_data: Dados comparativos (mês anterior, se disponível)
             
         Returns:
-            Lista de planos de ação com prioridade
+            Texto com diagnóstico
+        """
+        preparo = self._preparar_monthly_diagnosis(monthly_data, comparison_data)
+        return self._concluir_monthly_diagnosis(self._invocar(preparo, cache_bust), monthly_data, comparison_data)
+    
+    async def agenerate_monthly_diagnosis(self, monthly_data: Dict[str, Any], comparison_data: Dict[str, Any], cache_bust: bool = False) -> str:
+        """Versão assíncrona de generate_monthly_diagnosis (chamada à IA via ainvoke)"""
+        preparo = self._preparar_monthly_diagnosis(monthly_data, comparison_data)
+        return self._concluir_monthly_diagnosis(await self._ainvocar(preparo, cache_bust), monthly_data, comparison_data)
+    
+    def generate_monthly_diagnosis_stream(self,
+                                          monthly_data: Dict[str, Any],
+                                          comparison_data: Dict[str, Any],
+                                          cache_bust: bool = False) -> Iterator[str]:
         """
-        class ActionPlan(BaseModel):
-            prioridade: str = Field(description="URGENTE, IMPORTANTE ou OBSERVAÇÃO")
-            titulo: str = Field(description="Título do plano de ação")
-            situacao: str = Field(description="Descrição da situação atual")
-            impacto: str = Field(description="Impacto no negócio")
-            acoes: List[str] = Field(description="Lista de 3-5 ações específicas")
+        Versão em streaming de generate_monthly_diagnosis
         
-        class ActionPlans(BaseModel):
-            planos: List[ActionPlan] = Field(description="Lista de 2-4 planos de ação")
+        Os trechos do diagnóstico saem à medida que a IA os gera (para exibição
+        progressiva); ao final, o texto completo é registrado no log.
         
+        Args:
+            monthly_data: Dados do mês analisado
+            comparison_data: Dados comparativos (mês anterior, se disponível)
+            cache_bust: Ignora o cache e consulta a IA novamente
+            
+        Returns:
+            Iterador com os trechos do diagnóstico
+        """
+        preparo = self._preparar_monthly_diagnosis(monthly_data, comparison_data)
+        partes = []
+        for trecho in self._stream(preparo, cache_bust):
+            partes.append(trecho)
+            yield trecho
+        self._concluir_monthly_diagnosis(AIMessage(content="".join(partes)), monthly_data, comparison_data)
+    
+    def _preparar_action_plans(self, financial_summary: Dict[str, Any], swot: Dict[str, List[str]]) -> Preparo:
+        """Monta o prompt, o schema de saída e a entrada de generate_action_plans"""
         prompt = ChatPromptTemplate.from_messages([
             ("system", """Você é um consultor financeiro especializado em planos de ação.
 Gere planos de ação práticos e específicos baseados nos dados.
 Cada ação deve ser objetiva e mensurável.
 Priorize baseado no impacto e urgência."""),
-            ("human", """Gere planos de ação baseados nesta análise:
-
-DADOS FINANCEIROS:
-{financial_summary}
-
-ANÁLISE SWOT:
-{swot}
+            ("human", """Gere planos de ação baseados na análise abaixo.
 
 Gere 2-4 planos de ação que:
 1. Abordem fraquezas críticas ou oportunidades relevantes
 2. Tenham ações específicas e práticas
 3. Sejam priorizados (URGENTE, IMPORTANTE, OBSERVAÇÃO)
-4. Referenciem dados concretos quando possível""")
+4. Referenciem dados concretos quando possível
+
+DADOS FINANCEIROS:
+{financial_summary}
+
+ANÁLISE SWOT:
+{swot}""")
         ])
         
-        chain = prompt | self.llm.with_structured_output(ActionPlans)
-        
-        resultado = chain.invoke({
-            "financial_summary": json.dumps(financial_summary, indent=2, ensure_ascii=False),
-            "swot": json.dumps(swot, indent=2, ensure_ascii=False)
-        })
-        
+        return prompt, ActionPlans, {
+            "financial_summary": _json_compacto(_projetar_resumo(financial_summary)),
+            "swot": _json_compacto(swot)
+        }
+    
+    def _concluir_action_plans(self, resultado, financial_summary: Dict[str, Any], swot: Dict[str, List[str]]) -> List[Dict[str, str]]:
+        """Processa e registra no log a resposta de generate_action_plans"""
         planos = [p.model_dump() for p in resultado.planos]
         
         # Loga cada plano de forma DETALHADA
@@ -273,7 +847,7 @@ Gere 2-4 planos de ação que:
                     "saldo": financial_summary.get('totais', {}).get('saldo', 0)
                 },
                 output=plano,
-                reasoning=f"""
+                reasoning=lambda: f"""
 PLANO DE AÇÃO {i} - RACIOCÍNIO DA IA:
 
 PRIORIDADE: {plano['prioridade']}
@@ -329,54 +903,57 @@ CONEXÃO COM O SWOT:
         
         return planos
     
-    def generate_key_events(self, 
-                          financial_summary: Dict[str, Any],
-                          monthly_analysis: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    def generate_action_plans(self, 
+                            financial_summary: Dict[str, Any],
+                            swot: Dict[str, List[str]],
+                            cache_bust: bool = False) -> List[Dict[str, str]]:
         """
-        Identifica os 3 eventos mais relevantes do período
+        Gera planos de ação baseados na análise SWOT e dados financeiros
         
         Args:
             financial_summary: Resumo financeiro
-            monthly_analysis: Análise mensal
+            swot: Análise SWOT
             
         Returns:
-            Lista com 3 eventos principais
+            Lista de planos de ação com prioridade
         """
-        class KeyEvent(BaseModel):
-            tipo: str = Field(description="POSITIVO, NEUTRO ou NEGATIVO")
-            titulo: str = Field(description="Título curto do evento")
-            descricao: str = Field(description="Descrição detalhada com dados")
-        
-        class KeyEvents(BaseModel):
-            eventos: List[KeyEvent] = Field(description="Exatamente 3 eventos principais", min_items=3, max_items=3)
-        
+        preparo = self._preparar_action_plans(financial_summary, swot)
+        return self._concluir_action_plans(self._invocar(preparo, cache_bust), financial_summary, swot)
+    
+    async def agenerate_action_plans(self, financial_summary: Dict[str, Any], swot: Dict[str, List[str]], cache_bust: bool = False) -> List[Dict[str, str]]:
+        """Versão assíncrona de generate_action_plans (chamada à IA via ainvoke)"""
+        preparo = self._preparar_action_plans(financial_summary, swot)
+        return self._concluir_action_plans(await self._ainvocar(preparo, cache_bust), financial_summary, swot)
+    
+    def _preparar_key_events(self, financial_summary: Dict[str, Any], monthly_analysis: List[Dict[str, Any]]) -> Preparo:
+        """Monta o prompt, o schema de saída e a entrada de generate_key_events"""
         prompt = ChatPromptTemplate.from_messages([
             ("system", """Você é um analista financeiro que identifica eventos-chave.
 Analise os dados e identifique os 3 eventos mais relevantes do período.
 Use números específicos dos dados.
 Cada evento deve ter impacto significativo nos resultados."""),
-            ("human", """Identifique os 3 eventos mais relevantes:
-
-RESUMO FINANCEIRO:
-{financial_summary}
-
-ANÁLISE MENSAL:
-{monthly_analysis}
+            ("human", """Identifique os 3 eventos mais relevantes nos dados abaixo.
 
 Identifique 3 eventos que:
 1. Tiveram maior impacto nos resultados
 2. São suportados por dados concretos
 3. São relevantes para tomada de decisão
-4. Representam diferentes aspectos (receita, custo, fluxo, etc)""")
+4. Representam diferentes aspectos (receita, custo, fluxo, etc)
+
+RESUMO FINANCEIRO:
+{financial_summary}
+
+ANÁLISE MENSAL:
+{monthly_analysis}""")
         ])
         
-        chain = prompt | self.llm.with_structured_output(KeyEvents)
-        
-        resultado = chain.invoke({
-            "financial_summary": json.dumps(financial_summary, indent=2, ensure_ascii=False),
-            "monthly_analysis": json.dumps(monthly_analysis, indent=2, ensure_ascii=False)
-        })
-        
+        return prompt, KeyEvents, {
+            "financial_summary": _json_compacto(_projetar_resumo(financial_summary)),
+            "monthly_analysis": _json_compacto(_projetar_mensal(monthly_analysis))
+        }
+    
+    def _concluir_key_events(self, resultado, financial_summary: Dict[str, Any], monthly_analysis: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Processa e registra no log a resposta de generate_key_events"""
         eventos = [e.model_dump() for e in resultado.eventos]
         
         # Loga os eventos de forma DETALHADA
@@ -390,7 +967,7 @@ Identifique 3 eventos que:
                     "tendencia_mensal": monthly_analysis
                 },
                 output=evento,
-                reasoning=f"""
+                reasoning=lambda: f"""
 EVENTO-CHAVE {i} - RACIOCÍNIO DA IA:
 
 TIPO: {evento['tipo']}
@@ -438,22 +1015,49 @@ críticos para entender o desempenho financeiro do período e orientar decisões
         
         return eventos
     
+    def generate_key_events(self, 
+                          financial_summary: Dict[str, Any],
+                          monthly_analysis: List[Dict[str, Any]],
+                          cache_bust: bool = False) -> List[Dict[str, str]]:
+        """
+        Identifica os 3 eventos mais relevantes do período
+        
+        Args:
+            financial_summary: Resumo financeiro
+            monthly_analysis: Análise mensal
+            
+        Returns:
+            Lista com 3 eventos principais (ou um aviso de dados insuficientes,
+            sem chamar a IA, com menos de MIN_MESES_ANALISE meses)
+        """
+        if len(monthly_analysis) < MIN_MESES_ANALISE:
+            return _eventos_dados_insuficientes()
+        preparo = self._preparar_key_events(financial_summary, monthly_analysis)
+        return self._concluir_key_events(self._invocar(preparo, cache_bust), financial_summary, monthly_analysis)
+    
+    async def agenerate_key_events(self, financial_summary: Dict[str, Any], monthly_analysis: List[Dict[str, Any]], cache_bust: bool = False) -> List[Dict[str, str]]:
+        """Versão assíncrona de generate_key_events (chamada à IA via ainvoke)"""
+        if len(monthly_analysis) < MIN_MESES_ANALISE:
+            return _eventos_dados_insuficientes()
+        preparo = self._preparar_key_events(financial_summary, monthly_analysis)
+        return self._concluir_key_events(await self._ainvocar(preparo, cache_bust), financial_summary, monthly_analysis)
+    
     def _extract_supporting_data(self, evento: Dict, financial_summary: Dict, monthly_analysis: List) -> str:
         """Extrai dados que suportam o evento identificado"""
-        # Identifica números mencionados na descrição
-        descricao = evento.get('descricao', '')
+        # Identifica números mencionados na descrição (minúsculas calculadas uma vez)
+        descricao = evento.get('descricao', '').lower()
         
         info = []
-        if 'crescimento' in descricao.lower() or 'aumento' in descricao.lower():
+        if 'crescimento' in descricao or 'aumento' in descricao:
             info.append("- Identificado crescimento em métricas de receita ou volume")
-        if 'queda' in descricao.lower() or 'redução' in descricao.lower():
+        if 'queda' in descricao or 'redução' in descricao:
             info.append("- Identificada redução em despesas ou volumes")
-        if 'margem' in descricao.lower():
+        if 'margem' in descricao:
             info.append(f"- Margem do período: {financial_summary.get('totais', {}).get('margem', 0):.1f}%")
         if monthly_analysis and len(monthly_analysis) > 1:
-            primeiro_mes = monthly_analysis[0]
-            ultimo_mes = monthly_analysis[-1]
-            var_receita = ((ultimo_mes['receita'] - primeiro_mes['receita']) / primeiro_mes['receita'] * 100) if primeiro_mes['receita'] > 0 else 0
+            receita_inicial = monthly_analysis[0]['receita']
+            receita_final = monthly_analysis[-1]['receita']
+            var_receita = ((receita_final - receita_inicial) / receita_inicial * 100) if receita_inicial > 0 else 0
             info.append(f"- Variação de receita entre primeiro e último mês: {var_receita:+.1f}%")
         
         return "\n   ".join(info) if info else "- Baseado na análise geral dos dados do período"
@@ -463,30 +1067,20 @@ críticos para entender o desempenho financeiro do período e orientar decisões
         if not monthly_analysis or len(monthly_analysis) < 2:
             return "Período insuficiente para identificar tendência"
         
-        receitas = [m['receita'] for m in monthly_analysis]
-        if receitas[-1] > receitas[0]:
+        # Só a primeira e a última receita importam: acesso direto, sem montar lista
+        primeira = monthly_analysis[0]['receita']
+        ultima = monthly_analysis[-1]['receita']
+        if ultima > primeira:
             return "Crescente (última receita maior que primeira)"
-        elif receitas[-1] < receitas[0]:
+        elif ultima < primeira:
             return "Decrescente (última receita menor que primeira)"
         else:
             return "Estável (receitas similares no período)"
     
-    def generate_revenue_analysis(self, revenue_data: Dict[str, Any]) -> Dict[str, str]:
-        """
-        Gera análise detalhada de receitas USANDO APENAS DADOS REAIS
-        
-        IMPORTANTE: Esta análise usa EXCLUSIVAMENTE os dados fornecidos.
-        A IA NÃO DEVE inventar valores, períodos ou métricas.
-        
-        Args:
-            revenue_data: Dados REAIS de receitas por período dos arquivos OFX
-            
-        Returns:
-            Dicionário com análises baseadas apenas nos dados reais fornecidos
-        """
-        # VALIDAÇÃO: Extrai meses e valores reais para validação
+    def _preparar_revenue_analysis(self, revenue_data: Dict[str, Any]) -> Preparo:
+        """Monta o prompt, o schema de saída e a entrada de generate_revenue_analysis"""
+        # VALIDAÇÃO: Extrai os meses reais para validação
         meses_reais = [m['mes'] for m in revenue_data.get('monthly', [])]
-        receitas_reais = [m.get('receita', 0) for m in revenue_data.get('monthly', [])]
         
         prompt = ChatPromptTemplate.from_messages([
             ("system", """Você é um analista financeiro que trabalha APENAS com dados reais.
@@ -503,15 +1097,10 @@ PROIBIDO:
 - Mencionar meses que não estão nos dados
 - Criar porcentagens sem base nos números fornecidos
 - Assumir tendências sem dados suficientes"""),
-            ("human", """Analise as receitas baseado APENAS nestes dados REAIS:
-
-DADOS DE RECEITAS (REAIS DOS ARQUIVOS OFX):
-{revenue_data}
-
-MESES DISPONÍVEIS NOS DADOS: {meses_disponiveis}
+            ("human", """Analise as receitas baseado APENAS nos dados REAIS abaixo.
 
 INSTRUÇÕES:
-1. MENSAL: Compare os meses QUE EXISTEM nos dados acima
+1. MENSAL: Compare os meses QUE EXISTEM nos dados abaixo
    - Use os valores EXATOS de receita de cada mês
    - Calcule variações apenas entre meses consecutivos presentes nos dados
    
@@ -522,17 +1111,30 @@ INSTRUÇÕES:
    - Use APENAS os números fornecidos
    - Não extrapole além do período dos dados
 
-IMPORTANTE: Se você mencionar qualquer valor, ele DEVE existir nos dados acima.
-Cada análise deve ter 2-3 frases com dados específicos REAIS.""")
+IMPORTANTE: Se você mencionar qualquer valor, ele DEVE existir nos dados abaixo.
+Cada análise deve ter 2-3 frases com dados específicos REAIS.
+
+DADOS DE RECEITAS (REAIS DOS ARQUIVOS OFX):
+{revenue_data}
+
+MESES DISPONÍVEIS NOS DADOS: {meses_disponiveis}""")
         ])
         
-        chain = prompt | self.llm
-        
         # Passa os dados reais E a lista de meses disponíveis para validação
-        resultado = chain.invoke({
-            "revenue_data": json.dumps(revenue_data, indent=2, ensure_ascii=False),
+        return prompt, None, {
+            "revenue_data": _json_compacto(_projetar_receitas(revenue_data)),
             "meses_disponiveis": ", ".join(meses_reais) if meses_reais else "Nenhum mês disponível"
-        })
+        }
+    
+    def _concluir_revenue_analysis(self, resultado, revenue_data: Dict[str, Any]) -> Dict[str, str]:
+        """Processa e registra no log a resposta de generate_revenue_analysis"""
+        # Meses e receitas reais em uma única passada pela lista mensal
+        monthly = revenue_data.get('monthly', [])
+        meses_reais = []
+        receitas_reais = []
+        for m in monthly:
+            meses_reais.append(m['mes'])
+            receitas_reais.append(m.get('receita', 0))
         
         print(f"\n⚠️  [REVENUE ANALYSIS] Meses reais disponíveis: {meses_reais}")
         print(f"⚠️  [REVENUE ANALYSIS] Receitas reais: {receitas_reais}")
@@ -545,11 +1147,11 @@ Cada análise deve ter 2-3 frases com dados específicos REAIS.""")
             analysis_type="revenue_analysis",
             input_data=revenue_data,
             output={"analysis": analise},
-            reasoning=f"""
+            reasoning=lambda: f"""
 ANÁLISE DE RECEITAS - RACIOCÍNIO DA IA:
 
 DADOS ANALISADOS:
-{json.dumps(revenue_data, indent=2, ensure_ascii=False)}
+{_json_indentado(revenue_data)}
 
 ANÁLISE GERADA PELA IA:
 {analise}
@@ -584,17 +1186,171 @@ de volta aos números fornecidos.
 """,
             calculations={
                 "total_receitas": revenue_data.get('totals', {}).get('receita', 0),
-                "num_meses": len(revenue_data.get('monthly', [])),
-                "receitas_por_mes": [m.get('receita', 0) for m in revenue_data.get('monthly', [])]
+                "num_meses": len(monthly),
+                "receitas_por_mes": receitas_reais
             }
         )
         
         return {"analise_completa": analise}
     
+    def generate_revenue_analysis(self, revenue_data: Dict[str, Any], cache_bust: bool = False) -> Dict[str, str]:
+        """
+        Gera análise detalhada de receitas USANDO APENAS DADOS REAIS
+        
+        IMPORTANTE: Esta análise usa EXCLUSIVAMENTE os dados fornecidos.
+        A IA NÃO DEVE inventar valores, períodos ou métricas.
+        
+        Args:
+            revenue_data: Dados REAIS de receitas por período dos arquivos OFX
+            
+        Returns:
+            Dicionário com análises baseadas apenas nos dados reais fornecidos
+        """
+        preparo = self._preparar_revenue_analysis(revenue_data)
+        return self._concluir_revenue_analysis(self._invocar(preparo, cache_bust), revenue_data)
+    
+    async def agenerate_revenue_analysis(self, revenue_data: Dict[str, Any], cache_bust: bool = False) -> Dict[str, str]:
+        """Versão assíncrona de generate_revenue_analysis (chamada à IA via ainvoke)"""
+        preparo = self._preparar_revenue_analysis(revenue_data)
+        return self._concluir_revenue_analysis(await self._ainvocar(preparo, cache_bust), revenue_data)
+    
+    def generate_revenue_analysis_stream(self, revenue_data: Dict[str, Any], cache_bust: bool = False) -> Iterator[str]:
+        """
+        Versão em streaming de generate_revenue_analysis
+        
+        Os trechos da análise saem à medida que a IA os gera (para exibição
+        progressiva); ao final, o texto completo é registrado no log.
+        
+        Args:
+            revenue_data: Dados REAIS de receitas por período dos arquivos OFX
+            cache_bust: Ignora o cache e consulta a IA novamente
+            
+        Returns:
+            Iterador com os trechos da análise
+        """
+        preparo = self._preparar_revenue_analysis(revenue_data)
+        partes = []
+        for trecho in self._stream(preparo, cache_bust):
+            partes.append(trecho)
+            yield trecho
+        self._concluir_revenue_analysis(AIMessage(content="".join(partes)), revenue_data)
+    
+    def _preparar_strategic_analysis(self,
+                                     financial_summary: Dict[str, Any],
+                                     monthly_analysis: List[Dict[str, Any]],
+                                     category_analysis: List[Dict[str, Any]]) -> Preparo:
+        """Monta o prompt, o schema de saída e a entrada de generate_strategic_analysis"""
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", """Você é um analista financeiro estratégico e consultor de planos de ação.
+Analise APENAS os dados fornecidos, sem inventar informações.
+Seja específico e use números dos dados quando disponível.
+Cada item deve ser conciso, objetivo e, no caso das ações, mensurável."""),
+            ("human", """Analise os dados financeiros abaixo e gere, em uma única resposta,
+a análise SWOT, os eventos-chave do período e os planos de ação:
+
+1. SWOT (3-5 itens por categoria, 1-2 frases cada):
+- Forças: Pontos positivos observados nos dados (crescimento, margens, eficiência)
+- Fraquezas: Pontos negativos ou riscos observados (custos altos, quedas, inadimplência)
+- Oportunidades: Potenciais melhorias baseadas nos dados
+- Ameaças: Riscos ou tendências negativas identificadas
+
+2. EVENTOS-CHAVE: os 3 eventos mais relevantes do período, que:
+- Tiveram maior impacto nos resultados
+- São suportados por dados concretos
+- Representam diferentes aspectos (receita, custo, fluxo, etc)
+- Tipo: POSITIVO, NEUTRO ou NEGATIVO
+
+3. PLANOS DE AÇÃO: 2-4 planos que:
+- Abordem as fraquezas críticas ou oportunidades relevantes do SWOT acima
+- Tenham 3-5 ações específicas e práticas
+- Sejam priorizados (URGENTE, IMPORTANTE, OBSERVAÇÃO)
+- Referenciem dados concretos quando possível
+
+RESUMO FINANCEIRO:
+{financial_summary}
+
+ANÁLISE MENSAL:
+{monthly_analysis}
+
+PRINCIPAIS CATEGORIAS:
+{category_analysis}""")
+        ])
+        
+        return prompt, FullStrategicAnalysis, {
+            "financial_summary": _json_compacto(_projetar_resumo(financial_summary)),
+            "monthly_analysis": _json_compacto(_projetar_mensal(monthly_analysis)),
+            "category_analysis": _json_compacto(_projetar_categorias(category_analysis))
+        }
+    
+    def _concluir_strategic_analysis(self,
+                                     resultado,
+                                     financial_summary: Dict[str, Any],
+                                     monthly_analysis: List[Dict[str, Any]],
+                                     category_analysis: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Processa e registra no log (seção a seção) a resposta de generate_strategic_analysis"""
+        swot_data = {
+            "summary": financial_summary,
+            "monthly": monthly_analysis,
+            "categories": category_analysis[:10]
+        }
+        swot = self._concluir_swot_analysis(resultado.swot, swot_data)
+        key_events = self._concluir_key_events(
+            KeyEvents(eventos=resultado.key_events), financial_summary, monthly_analysis
+        )
+        action_plans = self._concluir_action_plans(
+            ActionPlans(planos=resultado.action_plans), financial_summary, swot
+        )
+        
+        return {"swot": swot, "key_events": key_events, "action_plans": action_plans}
+    
+    def generate_strategic_analysis(self,
+                                    financial_summary: Dict[str, Any],
+                                    monthly_analysis: List[Dict[str, Any]],
+                                    category_analysis: List[Dict[str, Any]],
+                                    cache_bust: bool = False) -> Dict[str, Any]:
+        """
+        Gera SWOT, eventos-chave e planos de ação em uma única chamada à IA
+        
+        Os dados vão no prompt uma só vez (em vez de três) e o modelo monta os
+        planos de ação a partir do SWOT que ele mesmo acabou de gerar.
+        
+        Args:
+            financial_summary: Resumo financeiro geral
+            monthly_analysis: Análise mensal detalhada
+            category_analysis: Análise por categoria
+            cache_bust: Ignora o cache e consulta a IA novamente
+            
+        Returns:
+            Dicionário com swot, key_events e action_plans (resposta fixa de
+            dados insuficientes, sem chamar a IA, com menos de MIN_MESES_ANALISE meses)
+        """
+        if len(monthly_analysis) < MIN_MESES_ANALISE:
+            return _analise_dados_insuficientes()
+        preparo = self._preparar_strategic_analysis(financial_summary, monthly_analysis, category_analysis)
+        return self._concluir_strategic_analysis(
+            self._invocar(preparo, cache_bust), financial_summary, monthly_analysis, category_analysis
+        )
+    
+    async def agenerate_strategic_analysis(self,
+                                           financial_summary: Dict[str, Any],
+                                           monthly_analysis: List[Dict[str, Any]],
+                                           category_analysis: List[Dict[str, Any]],
+                                           cache_bust: bool = False) -> Dict[str, Any]:
+        """Versão assíncrona de generate_strategic_analysis (chamada à IA via ainvoke)"""
+        if len(monthly_analysis) < MIN_MESES_ANALISE:
+            return _analise_dados_insuficientes()
+        preparo = self._preparar_strategic_analysis(financial_summary, monthly_analysis, category_analysis)
+        return self._concluir_strategic_analysis(
+            await self._ainvocar(preparo, cache_bust), financial_summary, monthly_analysis, category_analysis
+        )
+    
     def generate_full_strategic_report(self, 
                                       financial_summary: Dict[str, Any],
                                       monthly_analysis: List[Dict[str, Any]],
-                                      category_analysis: List[Dict[str, Any]]) -> Dict[str, Any]:
+                                      category_analysis: List[Dict[str, Any]],
+                                      mode: str = "realtime",
+                                      cache_bust: bool = False,
+                                      on_progress: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
         """
         Gera relatório estratégico completo
         
@@ -602,58 +1358,98 @@ de volta aos números fornecidos.
             financial_summary: Resumo financeiro geral
             monthly_analysis: Análise mensal detalhada
             category_analysis: Análise por categoria
+            mode: "realtime" para uso interativo ou "batch" para rodadas não
+                  interativas (OpenAI Batch API: metade do custo, pode levar horas)
+            cache_bust: Ignora o cache e consulta a IA novamente
+            on_progress: Recebe (nome da análise, trecho) da análise de receitas
+                à medida que a IA gera o texto (apenas no modo "realtime")
+            
+        Returns:
+            Dicionário com análise estratégica completa
+        """
+        return self._run(self.agenerate_full_strategic_report(
+            financial_summary, monthly_analysis, category_analysis, mode=mode, cache_bust=cache_bust,
+            on_progress=on_progress
+        ))
+    
+    async def agenerate_full_strategic_report(self, 
+                                              financial_summary: Dict[str, Any],
+                                              monthly_analysis: List[Dict[str, Any]],
+                                              category_analysis: List[Dict[str, Any]],
+                                              mode: str = "realtime",
+                                              cache_bust: bool = False,
+                                              on_progress: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+        """
+        Versão assíncrona de generate_full_strategic_report
+        
+        SWOT, eventos-chave e planos de ação saem de uma única chamada
+        (generate_strategic_analysis); ela e a análise de receitas, que usa um
+        prompt próprio, vão à IA juntas (em paralelo, ou em um único job da
+        Batch API).
+        
+        Args:
+            financial_summary: Resumo financeiro geral
+            monthly_analysis: Análise mensal detalhada
+            category_analysis: Análise por categoria
+            mode: "realtime" (chamadas concorrentes) ou "batch" (OpenAI Batch API)
+            cache_bust: Ignora o cache e consulta a IA novamente
+            on_progress: Recebe (nome da análise, trecho) da análise de receitas
+                à medida que a IA gera o texto (apenas no modo "realtime")
             
         Returns:
             Dicionário com análise estratégica completa
         """
         print("🧠 [STRATEGIC ANALYZER] Gerando análise estratégica com IA...")
-        print("   ⏱️ Aguardando 60 segundos entre chamadas para respeitar rate limits da OpenAI...")
         
-        try:
-            # 1. Eventos-chave
-            print("   🔍 Identificando eventos-chave...")
-            key_events = self.generate_key_events(financial_summary, monthly_analysis)
-            print(f"   ✅ {len(key_events)} eventos identificados")
-            time.sleep(60)  # Aguarda 60 segundos antes da próxima chamada
-        except Exception as e:
-            print(f"   ❌ ERRO em eventos-chave: {e}")
-            key_events = []
+        revenue_data = {
+            "totals": financial_summary.get("totais", {}),
+            "monthly": monthly_analysis
+        }
         
-        try:
-            # 2. Análise SWOT
-            print("   📊 Gerando análise SWOT...")
-            swot = self.generate_swot_analysis({
-                "summary": financial_summary,
-                "monthly": monthly_analysis,
-                "categories": category_analysis[:10]  # Top 10 categorias
-            })
-            print("   ✅ SWOT gerado com sucesso")
-            time.sleep(60)  # Aguarda 60 segundos antes da próxima chamada
-        except Exception as e:
-            print(f"   ❌ ERRO em SWOT: {e}")
-            swot = {"forcas": [], "fraquezas": [], "oportunidades": [], "ameacas": []}
+        # 1-4. SWOT, eventos-chave e planos de ação (uma chamada) e análise de receitas
+        tarefas = {}
+        dados_suficientes = len(monthly_analysis) >= MIN_MESES_ANALISE
+        if dados_suficientes:
+            print("   🔍 Gerando SWOT, eventos-chave e planos de ação e analisando receitas...")
+            tarefas["strategic_analysis"] = (
+                self._preparar_strategic_analysis(financial_summary, monthly_analysis, category_analysis),
+                lambda r: self._concluir_strategic_analysis(
+                    r, financial_summary, monthly_analysis, category_analysis
+                )
+            )
+        else:
+            print(f"   ⚠️ Menos de {MIN_MESES_ANALISE} meses de dados: SWOT, eventos-chave e "
+                  f"planos de ação não serão gerados. Analisando apenas as receitas...")
+        tarefas["revenue_analysis"] = (
+            self._preparar_revenue_analysis(revenue_data),
+            lambda r: self._concluir_revenue_analysis(r, revenue_data)
+        )
+        saidas = await self._executar(tarefas, mode, cache_bust, on_progress)
         
-        try:
-            # 3. Planos de ação
-            print("   📋 Criando planos de ação...")
-            action_plans = self.generate_action_plans(financial_summary, swot)
-            print(f"   ✅ {len(action_plans)} planos criados")
-            time.sleep(60)  # Aguarda 60 segundos antes da próxima chamada
-        except Exception as e:
-            print(f"   ❌ ERRO em planos de ação: {e}")
+        strategic_analysis = saidas.get("strategic_analysis", _analise_dados_insuficientes())
+        if not dados_suficientes:
+            swot = strategic_analysis["swot"]
+            key_events = strategic_analysis["key_events"]
+            action_plans = strategic_analysis["action_plans"]
+        elif isinstance(strategic_analysis, BaseException):
+            print(f"   ❌ ERRO em SWOT/eventos-chave/planos de ação: {strategic_analysis}")
+            swot = _swot_vazio()
+            key_events = []
             action_plans = []
+        else:
+            swot = strategic_analysis["swot"]
+            key_events = strategic_analysis["key_events"]
+            action_plans = strategic_analysis["action_plans"]
+            print("   ✅ SWOT gerado com sucesso")
+            print(f"   ✅ {len(key_events)} eventos identificados")
+            print(f"   ✅ {len(action_plans)} planos criados")
         
-        try:
-            # 4. Análise de receitas
-            print("   💰 Analisando receitas...")
-            revenue_analysis = self.generate_revenue_analysis({
-                "totals": financial_summary.get("totais", {}),
-                "monthly": monthly_analysis
-            })
-            print("   ✅ Análise de receitas concluída")
-        except Exception as e:
-            print(f"   ❌ ERRO em análise de receitas: {e}")
+        revenue_analysis = saidas["revenue_analysis"]
+        if isinstance(revenue_analysis, BaseException):
+            print(f"   ❌ ERRO em análise de receitas: {revenue_analysis}")
             revenue_analysis = {}
+        else:
+            print("   ✅ Análise de receitas concluída")
         
         print("✅ [STRATEGIC ANALYZER] Análise estratégica concluída!")
         
@@ -662,5 +1458,69 @@ de volta aos números fornecidos.
             "swot": swot,
             "action_plans": action_plans,
             "revenue_analysis": revenue_analysis,
-            "generated_at": datetime.now().isoformat()
+            # Metadados fora do conteúdo da análise (que depende só dos dados)
+            "_meta": {"generated_at": datetime.now().isoformat()}
         }
+    
+    def run_batch(self, inputs: List[Dict[str, Any]], max_concurrency: int = 8,
+                  cache_bust: bool = False) -> List[Dict[str, Any]]:
+        """
+        Gera relatórios estratégicos de vários conjuntos de dados (clientes,
+        períodos...) com no máximo max_concurrency relatórios em andamento
+        
+        Os relatórios rodam no loop da instância e compartilham o pool de
+        conexões; respostas 429 são tratadas pelas retentativas do cliente.
+        
+        Args:
+            inputs: Argumentos de generate_full_strategic_report para cada
+                relatório (financial_summary, monthly_analysis, category_analysis)
+            max_concurrency: Máximo de relatórios gerados ao mesmo tempo
+            cache_bust: Ignora o cache e consulta a IA novamente
+            
+        Returns:
+            Relatórios na ordem das entradas ({'error': ...} para os que falharem)
+        """
+        async def executar_todos():
+            limite = asyncio.Semaphore(max_concurrency)
+            
+            async def um_relatorio(entrada: Dict[str, Any]) -> Dict[str, Any]:
+                async with limite:
+                    return await self.agenerate_full_strategic_report(**entrada, cache_bust=cache_bust)
+            
+            return await asyncio.gather(*(um_relatorio(e) for e in inputs), return_exceptions=True)
+        
+        return [
+            {'error': f'Falha ao gerar análise estratégica: {str(r)}'} if isinstance(r, BaseException) else r
+            for r in self._run(executar_todos())
+        ]
+    
+    def _run(self, coro):
+        """
+        Executa uma corrotina até o fim no loop da instância
+        
+        Args:
+            coro: Corrotina a executar
+            
+        Returns:
+            Resultado da corrotina
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return self._loop.run_until_complete(coro)
+        
+        # Já existe um loop rodando nesta thread (ex.: Jupyter): roda o loop da
+        # instância em outra thread e aguarda o resultado
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(self._loop.run_until_complete, coro).result()
+    
+    def close(self) -> None:
+        """Fecha o cache de respostas e o pool de conexões HTTP e o loop usados nas chamadas à IA"""
+        if self._cache is not None:
+            self._cache.close()
+        if self._loop.is_closed():
+            return
+        if not self._http.is_closed:
+            self._run(self._http.aclose())
+        self._run(self._loop.shutdown_asyncgens())
+        self._loop.close()
@@ -1,23 +1,96 @@
 """
 TRUSTED LAYER - Camada de Transformação de Dados
-Responsável por transformar JSON em DataFrame e aplicar limpezas/transformações
+Responsável por transformar os dados brutos (Parquet/JSON) em DataFrame e aplicar limpezas/transformações
 """
 
-import json
+import numpy as np
+import orjson
 import pandas as pd
-from typing import Dict, Any
+import pyarrow.parquet as pq
+from typing import Dict, Any, Iterator, Optional
 from pathlib import Path
 
 
+# Tipos de transação OFX conhecidos e a origem de cada um, por posição:
+# credit = Entrada (CAR), debit = Saída (CAP), dep = Depósito/Entrada (CAR).
+# O último item de _ORIGEM_POR_CODIGO atende o código -1 (tipo não mapeado)
+TIPOS_TRANSACAO = ['credit', 'debit', 'dep']
+ORIGENS = ['CAR', 'CAP', 'DESCONHECIDO']
+_ORIGEM_POR_CODIGO = np.array([0, 1, 0, 2], dtype=np.int8)
+
+# Colunas de texto com poucos valores distintos, guardadas como Categorical
+LOW_CARDINALITY_COLUMNS = (
+    'cod_banco', 'banco', 'agencia', 'num_conta', 'tipo_conta',
+    'data_inicio', 'data_fim', 'tipo_transacao', 'origem'
+)
+
+
 class TrustedLayer:
-    """Transforma dados JSON em DataFrame limpo e estruturado"""
+    """Transforma dados brutos (Parquet/JSON) em DataFrame limpo e estruturado"""
+    
+    # Linhas por bloco ao ler arquivos JSON Lines
+    CHUNK_JSONL = 50_000
     
     def __init__(self):
         self.df = None
     
+    def is_jsonl(self, json_path: str) -> bool:
+        """
+        Indica se o arquivo é JSON Lines (um objeto por linha) em vez de um array JSON
+        
+        Args:
+            json_path: Caminho do arquivo JSON
+            
+        Returns:
+            True se o primeiro caractere relevante do arquivo abre um objeto
+        """
+        with open(json_path, 'rb') as f:
+            inicio = f.read(64).lstrip()
+        
+        return inicio.startswith(b'{')
+    
+    def iter_jsonl(self, json_path: str, chunksize: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Lê um arquivo JSON Lines em blocos
+        
+        Args:
+            json_path: Caminho do arquivo JSON Lines
+            chunksize: Linhas por bloco (padrão: CHUNK_JSONL)
+            
+        Returns:
+            Iterador de DataFrames, um por bloco
+        """
+        # dtype=False mantém os tipos do JSON (ex: ids numéricos em texto não viram int)
+        with pd.read_json(json_path, lines=True, chunksize=chunksize or self.CHUNK_JSONL,
+                          dtype=False, convert_dates=False, precise_float=True) as reader:
+            yield from reader
+    
+    def iter_chunks(self, path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Lê os dados brutos (Parquet, JSON Lines ou array JSON) em blocos
+        
+        Args:
+            path: Caminho do arquivo de entrada
+            chunksize: Linhas por bloco
+            
+        Returns:
+            Iterador de DataFrames, um por bloco
+        """
+        if Path(path).suffix.lower() == ".parquet":
+            for lote in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+                yield lote.to_pandas()
+        elif self.is_jsonl(path):
+            yield from self.iter_jsonl(path, chunksize)
+        else:
+            # Array JSON precisa ser lido inteiro; só a montagem dos DataFrames é em blocos
+            with open(path, 'rb') as f:
+                data = orjson.loads(f.read())
+            for inicio in range(0, len(data), chunksize):
+                yield pd.DataFrame(data[inicio:inicio + chunksize])
+    
     def load_json(self, json_path: str) -> pd.DataFrame:
         """
-        Carrega dados de um arquivo JSON
+        Carrega dados de um arquivo JSON (array de objetos ou JSON Lines)
         
         Args:
             json_path: Caminho do arquivo JSON
@@ -25,11 +98,40 @@ class TrustedLayer:
         Returns:
             DataFrame com os dados carregados
         """
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if self.is_jsonl(json_path):
+            return pd.concat(self.iter_jsonl(json_path), ignore_index=True, copy=False)
+        
+        with open(json_path, 'rb') as f:
+            data = orjson.loads(f.read())
         
         return pd.DataFrame(data)
     
+    def load_parquet(self, parquet_path: str) -> pd.DataFrame:
+        """
+        Carrega dados de um arquivo Parquet gerado pela camada RAW
+        
+        Args:
+            parquet_path: Caminho do arquivo Parquet
+            
+        Returns:
+            DataFrame com os dados carregados
+        """
+        return pd.read_parquet(parquet_path, engine='pyarrow')
+    
+    def load(self, path: str) -> pd.DataFrame:
+        """
+        Carrega os dados brutos no formato indicado pela extensão (.parquet ou .json)
+        
+        Args:
+            path: Caminho do arquivo de entrada
+            
+        Returns:
+            DataFrame com os dados carregados
+        """
+        if Path(path).suffix.lower() == ".parquet":
+            return self.load_parquet(path)
+        return self.load_json(path)
+    
     def transform_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Aplica transformações nos dados
@@ -40,45 +142,65 @@ class TrustedLayer:
         Returns:
             DataFrame transformado
         """
-        df = df.copy()
-        
-        # Adiciona coluna de origem baseada no tipo de transação
-        df["origem"] = df['tipo_transacao'].map({
-            'credit': 'CAR',  # Crédito = Entrada (CAR)
-            'debit': 'CAP',   # Débito = Saída (CAP)
-            'dep': 'CAR'      # Depósito = Entrada (CAR)
-        })
+        # As colunas novas ou alteradas são calculadas sobre a entrada sem
+        # alterá-la; o DataFrame de saída é montado uma única vez no final, já
+        # filtrado, sem cópias intermediárias do frame inteiro
+        colunas = dict(df.items())
         
-        # Preenche valores nulos em origem (caso existam tipos não mapeados)
-        df["origem"] = df["origem"].fillna("DESCONHECIDO")
+        # Adiciona coluna de origem baseada no tipo de transação: os códigos do
+        # tipo indexam a tabela de origens (tipos não mapeados viram DESCONHECIDO)
+        tipos = pd.Categorical(df['tipo_transacao'], categories=TIPOS_TRANSACAO)
+        colunas["origem"] = pd.Categorical.from_codes(_ORIGEM_POR_CODIGO[tipos.codes], categories=ORIGENS)
         
-        # Converte data para datetime (se necessário para análises futuras)
+        # Converte data para datetime (se necessário para análises futuras);
+        # cache=True converte cada data distinta uma única vez
         if "data" in df.columns:
-            try:
-                df["data_dt"] = pd.to_datetime(df["data"], format='%d/%m/%Y', errors='coerce')
-            except Exception:
-                pass
+            if pd.api.types.is_datetime64_any_dtype(df["data"]):
+                colunas["data_dt"] = df["data"]
+            else:
+                colunas["data_dt"] = pd.to_datetime(df["data"], format='%d/%m/%Y', errors='coerce', cache=True)
         
-        # Remove espaços extras nas strings
+        # Remove espaços extras nas strings (todas as colunas de texto de uma vez)
         string_columns = df.select_dtypes(include=['object']).columns
-        for col in string_columns:
-            if col in df.columns:
-                df[col] = df[col].str.strip() if df[col].dtype == 'object' else df[col]
+        if len(string_columns):
+            colunas.update(df[string_columns].apply(lambda col: col.str.strip()).items())
         
-        # Remove transações com "Saldo" na descrição (saldos iniciais)
+        # Garante que valores monetários são numéricos
+        for col in ("valor", "saldo"):
+            if col in colunas:
+                colunas[col] = pd.to_numeric(colunas[col], errors='coerce').fillna(0.0)
+        
+        df = pd.DataFrame(colunas, copy=False)
+        
+        # Remove transações com "Saldo" na descrição (saldos iniciais). A busca
+        # literal sobre uma cópia em string do Arrow roda no kernel do pyarrow,
+        # sem regex; a coluna em si continua object para as próximas camadas
         if "descricao" in df.columns:
-            mask_saldo = df["descricao"].str.contains("SALDO", case=False, na=False)
+            descricoes = df["descricao"].astype("string[pyarrow]")
+            mask_saldo = descricoes.str.contains("SALDO", case=False, regex=False, na=False).to_numpy(dtype=bool)
             qtd_removidos = mask_saldo.sum()
             if qtd_removidos > 0:
                 print(f"   🗑️  Removendo {qtd_removidos} transações de saldo inicial")
-            df = df[~mask_saldo].copy()
+                df = df[~mask_saldo]
         
-        # Garante que valores monetários são numéricos
-        if "valor" in df.columns:
-            df["valor"] = pd.to_numeric(df["valor"], errors='coerce').fillna(0.0)
+        return df
+    
+    def compact_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compacta as colunas de texto repetitivo (banco, conta, tipo...) em Categorical
         
-        if "saldo" in df.columns:
-            df["saldo"] = pd.to_numeric(df["saldo"], errors='coerce').fillna(0.0)
+        'valor' e 'saldo' continuam float64: float32 não representa centavos
+        com exatidão em valores acima de ~R$ 100 mil
+        
+        Args:
+            df: DataFrame transformado
+            
+        Returns:
+            O mesmo DataFrame, com as colunas convertidas
+        """
+        for col in LOW_CARDINALITY_COLUMNS:
+            if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
         
         return df
     
@@ -92,33 +214,55 @@ class TrustedLayer:
         Returns:
             Dicionário com informações de validação
         """
+        # count() conta os não nulos por coluna sem materializar a máscara
+        # booleana do frame inteiro que isnull().sum() criaria
         validation = {
             "total_records": len(df),
             "columns": list(df.columns),
-            "missing_values": df.isnull().sum().to_dict(),
+            "missing_values": (len(df) - df.count()).to_dict(),
             "data_types": df.dtypes.astype(str).to_dict()
         }
         
         return validation
     
-    def execute(self, json_path: str) -> pd.DataFrame:
+    def execute(self, json_path: str, chunksize: Optional[int] = None) -> pd.DataFrame:
         """
         Executa o processo completo da camada TRUSTED
         
         Args:
-            json_path: Caminho do arquivo JSON de entrada
+            json_path: Caminho do arquivo de entrada (.parquet ou .json)
+            chunksize: Se informado, lê e transforma a entrada em blocos desse
+                número de linhas (JSON Lines é sempre lido em blocos de CHUNK_JSONL)
             
         Returns:
             DataFrame transformado e limpo
         """
         print("🔄 [TRUSTED LAYER] Iniciando transformação de dados...")
         
-        # Carrega JSON
-        df = self.load_json(json_path)
-        print(f"   📊 Registros carregados: {len(df)}")
+        if chunksize is None and Path(json_path).suffix.lower() != ".parquet" and self.is_jsonl(json_path):
+            chunksize = self.CHUNK_JSONL
+        
+        if chunksize:
+            # Transforma bloco a bloco, sem manter os dados brutos inteiros e o
+            # resultado na memória ao mesmo tempo
+            total = 0
+            blocos = []
+            for bloco in self.iter_chunks(json_path, chunksize):
+                total += len(bloco)
+                blocos.append(self.transform_data(bloco))
+            print(f"   📊 Registros carregados: {total}")
+            df = pd.concat(blocos, ignore_index=True, copy=False)
+        else:
+            # Carrega os dados brutos (Parquet ou JSON)
+            df = self.load(json_path)
+            print(f"   📊 Registros carregados: {len(df)}")
+            
+            # Transforma dados
+            df = self.transform_data(df)
         
-        # Transforma dados
-        df = self.transform_data(df)
+        # Compacta depois de juntar os blocos: Categoricals com categorias
+        # diferentes virariam object no concat
+        df = self.compact_data(df)
         print(f"   ✨ Transformações aplicadas")
         
         # Valida dados
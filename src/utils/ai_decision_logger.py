@@ -3,11 +3,18 @@ AI DECISION LOGGER - Sistema de Logging de Decisões da IA
 Registra como a IA chegou em cada conclusão/classificação
 """
 
-import json
 import os
+import uuid
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Iterator, List, Optional, Union
+
+import orjson
+
+
+# Tipos numpy (ex: valores vindos do pandas) e chaves não-string nas linhas do log
+_OPCOES_JSON = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
 
 
 class AIDecisionLogger:
@@ -23,21 +30,58 @@ class AIDecisionLogger:
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
         
-        # Arquivo de log da sessão atual
+        # Arquivo de log da sessão atual: uma decisão por linha (JSON Lines),
+        # gravada no momento do registro; o metadata fica em um arquivo à parte.
+        # O pid e o sufixo aleatório separam sessões iniciadas no mesmo segundo
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.session_file = self.log_dir / f"ai_decisions_{timestamp}.json"
+        session_id = f"{timestamp}_{os.getpid()}_{uuid.uuid4().hex[:6]}"
+        self.session_file = self.log_dir / f"ai_decisions_{session_id}.jsonl"
+        self.metadata_file = self.log_dir / f"ai_decisions_{session_id}.meta.json"
         
-        # Buffer de decisões
-        self.decisions = []
+        # Contagem por método de classificação; copiada para o metadata ao salvar
+        self._decision_types = Counter()
         
         # Metadata da sessão
         self.session_metadata = {
-            "session_id": timestamp,
+            "session_id": session_id,
             "start_time": datetime.now().isoformat(),
             "total_decisions": 0,
             "decision_types": {}
         }
     
+    def _append(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Acrescenta decisões ao arquivo da sessão, uma por linha
+        
+        O "timestamp" dos registros é um datetime: o orjson o grava em ISO 8601
+        direto em C, sem um isoformat() por chamada de log
+        
+        Args:
+            entries: Registros de decisão já montados
+        """
+        dados = b"".join(orjson.dumps(entry, option=_OPCOES_JSON) + b"\n" for entry in entries)
+        
+        # Abre, grava e fecha a cada chamada (as decisões chegam em lotes): nenhum
+        # arquivo fica aberto entre requisições. Uma única escrita em modo append,
+        # para as linhas não se misturarem entre threads
+        with open(self.session_file, 'ab') as f:
+            f.write(dados)
+    
+    def iter_decisions(self) -> Iterator[Dict[str, Any]]:
+        """
+        Lê de volta, na ordem, as decisões registradas na sessão
+        
+        Returns:
+            Iterador com um dicionário por decisão
+        """
+        if not self.session_file.exists():
+            return
+        
+        with open(self.session_file, 'rb') as f:
+            for linha in f:
+                if linha.strip():
+                    yield orjson.loads(linha)
+    
     def log_classification_decision(self,
                                    transaction_id: int,
                                    input_data: Dict[str, Any],
@@ -57,7 +101,7 @@ class AIDecisionLogger:
             confidence: Nível de confiança (0-1) se aplicável
         """
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "type": "classification",
             "transaction_id": transaction_id,
             "input": input_data,
@@ -67,19 +111,50 @@ class AIDecisionLogger:
             "confidence": confidence
         }
         
-        self.decisions.append(log_entry)
+        self._append([log_entry])
         self.session_metadata["total_decisions"] += 1
         
         # Conta tipos de decisão
-        if method not in self.session_metadata["decision_types"]:
-            self.session_metadata["decision_types"][method] = 0
-        self.session_metadata["decision_types"][method] += 1
+        self._decision_types[method] += 1
+    
+    def log_classification_decisions(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Registra várias decisões de classificação de uma vez
+        
+        Equivalente a chamar log_classification_decision para cada item, mas
+        com uma única escrita no arquivo e na contagem por método.
+        
+        Args:
+            entries: Dicionários com os mesmos campos de log_classification_decision
+                (transaction_id, input_data, decision, method, reasoning, confidence)
+        """
+        if not entries:
+            return
+        
+        timestamp = datetime.now()
+        self._append([
+            {
+                "timestamp": timestamp,
+                "type": "classification",
+                "transaction_id": entry["transaction_id"],
+                "input": entry["input_data"],
+                "decision": entry["decision"],
+                "method": entry["method"],
+                "reasoning": entry["reasoning"],
+                "confidence": entry.get("confidence")
+            }
+            for entry in entries
+        ])
+        self.session_metadata["total_decisions"] += len(entries)
+        
+        # Conta tipos de decisão
+        self._decision_types.update(entry["method"] for entry in entries)
     
     def log_analysis_decision(self,
                             analysis_type: str,
                             input_data: Dict[str, Any],
                             output: Dict[str, Any],
-                            reasoning: str,
+                            reasoning: Union[str, Callable[[], str]],
                             calculations: Optional[Dict[str, Any]] = None) -> None:
         """
         Registra uma decisão de análise financeira/estratégica
@@ -88,11 +163,15 @@ class AIDecisionLogger:
             analysis_type: Tipo de análise (swot, diagnostico, tendencia, etc)
             input_data: Dados de entrada usados
             output: Resultado da análise
-            reasoning: Como chegou na conclusão
+            reasoning: Como chegou na conclusão; se for uma função, o texto só é
+                montado com AI_DECISION_DEBUG=1 (fora disso não é registrado)
             calculations: Cálculos realizados
         """
+        if callable(reasoning):
+            reasoning = reasoning() if os.environ.get("AI_DECISION_DEBUG") == "1" else None
+        
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "type": "analysis",
             "analysis_type": analysis_type,
             "input": input_data,
@@ -101,7 +180,7 @@ class AIDecisionLogger:
             "calculations": calculations
         }
         
-        self.decisions.append(log_entry)
+        self._append([log_entry])
         self.session_metadata["total_decisions"] += 1
     
     def log_comparison_decision(self,
@@ -123,7 +202,7 @@ class AIDecisionLogger:
             calculations: Cálculos detalhados
         """
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "type": "comparison",
             "comparison_type": comparison_type,
             "period_a": period_a,
@@ -133,7 +212,7 @@ class AIDecisionLogger:
             "calculations": calculations
         }
         
-        self.decisions.append(log_entry)
+        self._append([log_entry])
         self.session_metadata["total_decisions"] += 1
     
     def log_strategic_insight(self,
@@ -153,7 +232,7 @@ class AIDecisionLogger:
             recommendation: Recomendação associada
         """
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "type": "strategic_insight",
             "insight_type": insight_type,
             "data_analyzed": data_analyzed,
@@ -162,25 +241,22 @@ class AIDecisionLogger:
             "recommendation": recommendation
         }
         
-        self.decisions.append(log_entry)
+        self._append([log_entry])
         self.session_metadata["total_decisions"] += 1
     
     def save_session(self) -> str:
         """
-        Salva todos os logs da sessão em arquivo JSON
+        Salva o metadata da sessão em arquivo JSON à parte (as decisões já
+        foram gravadas a cada registro)
         
         Returns:
-            Caminho do arquivo salvo
+            Caminho do arquivo de decisões (JSON Lines)
         """
         self.session_metadata["end_time"] = datetime.now().isoformat()
+        self.session_metadata["decision_types"] = dict(self._decision_types)
         
-        full_log = {
-            "metadata": self.session_metadata,
-            "decisions": self.decisions
-        }
-        
-        with open(self.session_file, 'w', encoding='utf-8') as f:
-            json.dump(full_log, f, ensure_ascii=False, indent=2)
+        with open(self.metadata_file, 'wb') as f:
+            f.write(orjson.dumps(self.session_metadata, option=orjson.OPT_INDENT_2))
         
         print(f"\n✅ Log de decisões salvo: {self.session_file}")
         print(f"   📊 Total de decisões: {self.session_metadata['total_decisions']}")
@@ -197,114 +273,129 @@ class AIDecisionLogger:
         """
         summary_file = self.session_file.with_suffix('.txt')
         
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            f.write("="*80 + "\n")
-            f.write("RELATÓRIO DE DECISÕES DA IA\n")
-            f.write("="*80 + "\n\n")
+        # Monta o texto em memória e grava com uma única escrita no final
+        parts = []
+        write = parts.append
+        
+        write("="*80 + "\n")
+        write("RELATÓRIO DE DECISÕES DA IA\n")
+        write("="*80 + "\n\n")
+        
+        write(f"Sessão: {self.session_metadata['session_id']}\n")
+        write(f"Início: {self.session_metadata['start_time']}\n")
+        write(f"Fim: {self.session_metadata.get('end_time', 'Em andamento')}\n")
+        write(f"Total de decisões: {self.session_metadata['total_decisions']}\n\n")
+        
+        write("-"*80 + "\n")
+        write("TIPOS DE DECISÕES\n")
+        write("-"*80 + "\n")
+        for dtype, count in self._decision_types.items():
+            write(f"  {dtype}: {count} decisões\n")
+        write("\n")
+        
+        # Agrupa decisões por tipo, lendo o arquivo da sessão uma única vez;
+        # das classificações só ficam na memória a contagem e os 5 exemplos
+        total_classifications = 0
+        by_method = {}
+        classifications = []
+        analyses = []
+        comparisons = []
+        insights = []
+        for d in self.iter_decisions():
+            if d['type'] == 'classification':
+                total_classifications += 1
+                by_method[d['method']] = by_method.get(d['method'], 0) + 1
+                if len(classifications) < 5:
+                    classifications.append(d)
+            elif d['type'] == 'analysis':
+                analyses.append(d)
+            elif d['type'] == 'comparison':
+                comparisons.append(d)
+            elif d['type'] == 'strategic_insight':
+                insights.append(d)
+        
+        # Resumo de classificações
+        if total_classifications:
+            write("-"*80 + "\n")
+            write(f"CLASSIFICAÇÕES ({total_classifications} transações)\n")
+            write("-"*80 + "\n")
             
-            f.write(f"Sessão: {self.session_metadata['session_id']}\n")
-            f.write(f"Início: {self.session_metadata['start_time']}\n")
-            f.write(f"Fim: {self.session_metadata.get('end_time', 'Em andamento')}\n")
-            f.write(f"Total de decisões: {self.session_metadata['total_decisions']}\n\n")
+            write(f"\nMétodos usados:\n")
+            for method, count in by_method.items():
+                write(f"  - {method}: {count} transações\n")
+            write("\n")
             
-            f.write("-"*80 + "\n")
-            f.write("TIPOS DE DECISÕES\n")
-            f.write("-"*80 + "\n")
-            for dtype, count in self.session_metadata['decision_types'].items():
-                f.write(f"  {dtype}: {count} decisões\n")
-            f.write("\n")
+            # Primeiras 5 classificações como exemplo
+            write("Exemplos de classificações:\n\n")
+            for i, c in enumerate(classifications, 1):
+                write(f"{i}. Transação ID {c['transaction_id']}\n")
+                write(f"   Entrada: {c['input'].get('descricao', 'N/A')[:60]}\n")
+                write(f"   Decisão: {c['decision'].get('classificacao_sugerida', 'N/A')}\n")
+                write(f"   Método: {c['method']}\n")
+                write(f"   Raciocínio: {c['reasoning'][:100]}...\n\n")
+        
+        # Resumo de análises
+        if analyses:
+            write("\n" + "="*80 + "\n")
+            write("EXPLICAÇÕES DAS DECISÕES DO RELATÓRIO EXECUTIVO\n")
+            write("="*80 + "\n")
+            write("Esta seção mostra COMO A IA chegou em cada conclusão do relatório.\n")
+            write("Cada análise abaixo foi usada para gerar o PDF executivo.\n")
+            write("="*80 + "\n\n")
             
-            # Agrupa decisões por tipo
-            classifications = [d for d in self.decisions if d['type'] == 'classification']
-            analyses = [d for d in self.decisions if d['type'] == 'analysis']
-            comparisons = [d for d in self.decisions if d['type'] == 'comparison']
-            insights = [d for d in self.decisions if d['type'] == 'strategic_insight']
+            write("-"*80 + "\n")
+            write(f"ANÁLISES ESTRATÉGICAS ({len(analyses)} análises)\n")
+            write("-"*80 + "\n\n")
             
-            # Resumo de classificações
-            if classifications:
-                f.write("-"*80 + "\n")
-                f.write(f"CLASSIFICAÇÕES ({len(classifications)} transações)\n")
-                f.write("-"*80 + "\n")
+            for i, a in enumerate(analyses, 1):
+                write(f"{i}. {a['analysis_type'].upper()}\n")
+                write(f"   Data/Hora: {a['timestamp']}\n")
                 
-                # Contadores
-                by_method = {}
-                for c in classifications:
-                    method = c['method']
-                    by_method[method] = by_method.get(method, 0) + 1
-                
-                f.write(f"\nMétodos usados:\n")
-                for method, count in by_method.items():
-                    f.write(f"  - {method}: {count} transações\n")
-                f.write("\n")
-                
-                # Primeiras 5 classificações como exemplo
-                f.write("Exemplos de classificações:\n\n")
-                for i, c in enumerate(classifications[:5], 1):
-                    f.write(f"{i}. Transação ID {c['transaction_id']}\n")
-                    f.write(f"   Entrada: {c['input'].get('descricao', 'N/A')[:60]}\n")
-                    f.write(f"   Decisão: {c['decision'].get('classificacao_sugerida', 'N/A')}\n")
-                    f.write(f"   Método: {c['method']}\n")
-                    f.write(f"   Raciocínio: {c['reasoning'][:100]}...\n\n")
+                # Mostra o raciocínio completo (não truncado)
+                reasoning = a.get('reasoning') or 'Sem raciocínio registrado'
+                write(f"\n   EXPLICAÇÃO DE COMO A IA CHEGOU NESTA CONCLUSÃO:\n")
+                # Indenta o raciocínio para melhor legibilidade
+                for linha in reasoning.split('\n'):
+                    write(f"   {linha}\n")
+                write("\n" + "-"*80 + "\n\n")
+        
+        # Resumo de comparações
+        if comparisons:
+            write("-"*80 + "\n")
+            write(f"COMPARAÇÕES ({len(comparisons)} comparações)\n")
+            write("-"*80 + "\n\n")
             
-            # Resumo de análises
-            if analyses:
-                f.write("\n" + "="*80 + "\n")
-                f.write("EXPLICAÇÕES DAS DECISÕES DO RELATÓRIO EXECUTIVO\n")
-                f.write("="*80 + "\n")
-                f.write("Esta seção mostra COMO A IA chegou em cada conclusão do relatório.\n")
-                f.write("Cada análise abaixo foi usada para gerar o PDF executivo.\n")
-                f.write("="*80 + "\n\n")
-                
-                f.write("-"*80 + "\n")
-                f.write(f"ANÁLISES ESTRATÉGICAS ({len(analyses)} análises)\n")
-                f.write("-"*80 + "\n\n")
-                
-                for i, a in enumerate(analyses, 1):
-                    f.write(f"{i}. {a['analysis_type'].upper()}\n")
-                    f.write(f"   Data/Hora: {a['timestamp']}\n")
-                    
-                    # Mostra o raciocínio completo (não truncado)
-                    reasoning = a.get('reasoning', 'Sem raciocínio registrado')
-                    f.write(f"\n   EXPLICAÇÃO DE COMO A IA CHEGOU NESTA CONCLUSÃO:\n")
-                    # Indenta o raciocínio para melhor legibilidade
-                    for linha in reasoning.split('\n'):
-                        f.write(f"   {linha}\n")
-                    f.write("\n" + "-"*80 + "\n\n")
+            for i, c in enumerate(comparisons, 1):
+                write(f"{i}. {c['comparison_type']}: {c['period_a']} vs {c['period_b']}\n")
+                write(f"   Interpretação: {c['interpretation'][:150]}\n\n")
+        
+        # Resumo de insights estratégicos
+        if insights:
+            write("-"*80 + "\n")
+            write(f"INSIGHTS ESTRATÉGICOS ({len(insights)} insights)\n")
+            write("-"*80 + "\n\n")
             
-            # Resumo de comparações
-            if comparisons:
-                f.write("-"*80 + "\n")
-                f.write(f"COMPARAÇÕES ({len(comparisons)} comparações)\n")
-                f.write("-"*80 + "\n\n")
+            for i, ins in enumerate(insights, 1):
+                write(f"{i}. {ins['insight_type'].upper()}\n")
+                write(f"   Data/Hora: {ins['timestamp']}\n")
+                write(f"   Insight: {ins['insight']}\n")
                 
-                for i, c in enumerate(comparisons, 1):
-                    f.write(f"{i}. {c['comparison_type']}: {c['period_a']} vs {c['period_b']}\n")
-                    f.write(f"   Interpretação: {c['interpretation'][:150]}\n\n")
-            
-            # Resumo de insights estratégicos
-            if insights:
-                f.write("-"*80 + "\n")
-                f.write(f"INSIGHTS ESTRATÉGICOS ({len(insights)} insights)\n")
-                f.write("-"*80 + "\n\n")
+                # Mostra evidências que suportam o insight
+                if ins.get('evidence'):
+                    write(f"\n   EVIDÊNCIAS:\n")
+                    for ev in ins['evidence']:
+                        write(f"   • {ev}\n")
                 
-                for i, ins in enumerate(insights, 1):
-                    f.write(f"{i}. {ins['insight_type'].upper()}\n")
-                    f.write(f"   Data/Hora: {ins['timestamp']}\n")
-                    f.write(f"   Insight: {ins['insight']}\n")
-                    
-                    # Mostra evidências que suportam o insight
-                    if ins.get('evidence'):
-                        f.write(f"\n   EVIDÊNCIAS:\n")
-                        for ev in ins['evidence']:
-                            f.write(f"   • {ev}\n")
-                    
-                    if ins.get('recommendation'):
-                        f.write(f"\n   RECOMENDAÇÃO:\n   {ins['recommendation']}\n")
-                    f.write("\n" + "-"*80 + "\n\n")
-            
-            f.write("="*80 + "\n")
-            f.write("FIM DO RELATÓRIO\n")
-            f.write("="*80 + "\n")
+                if ins.get('recommendation'):
+                    write(f"\n   RECOMENDAÇÃO:\n   {ins['recommendation']}\n")
+                write("\n" + "-"*80 + "\n\n")
+        
+        write("="*80 + "\n")
+        write("FIM DO RELATÓRIO\n")
+        write("="*80 + "\n")
+        
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(parts))
         
         print(f"📄 Resumo salvo: {summary_file}")
         
@@ -318,8 +409,8 @@ class AIDecisionLogger:
             Dicionário com estatísticas
         """
         return {
-            "total_decisions": len(self.decisions),
-            "decision_types": self.session_metadata["decision_types"],
+            "total_decisions": self.session_metadata["total_decisions"],
+            "decision_types": dict(self._decision_types),
             "session_duration": (datetime.now() - datetime.fromisoformat(self.session_metadata["start_time"])).total_seconds(),
             "log_file": str(self.session_file)
         }
@@ -7,11 +7,244 @@ from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, KeepTogether
-from reportlab.platypus.flowables import HRFlowable
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, KeepTogether
+from reportlab.platypus.flowables import Flowable, HRFlowable
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, Any
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import functools
+import io
+import os
+import threading
+
+# Troca os separadores do formato americano (1,234.56) pelo brasileiro (1.234,56)
+# em uma única passada
+_SEPARADORES_BRL = str.maketrans(',.', '.,')
+
+
+class _SectionBanner(Flowable):
+    """Faixa colorida com o título da seção, desenhada direto no canvas (sem o layout de uma Table)"""
+    
+    # Mesmas medidas da Table de uma célula usada antes: 14pt de respiro
+    # acima e abaixo de uma linha de 12pt, com a base do texto a 10pt do fundo
+    HEIGHT = 40
+    BASELINE = 10
+    
+    def __init__(self, title: str, color, width: float = 17*cm, space_after: float = 0):
+        super().__init__()
+        self.title = title
+        self.color = color
+        self.width = width
+        self.height = self.HEIGHT
+        self.hAlign = 'CENTER'
+        self.spaceAfter = space_after
+    
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+    
+    def draw(self):
+        self.canv.setFillColor(self.color)
+        self.canv.rect(0, 0, self.width, self.height, fill=1, stroke=0)
+        self.canv.setFillColor(colors.white)
+        self.canv.setFont('Helvetica-Bold', 16)
+        self.canv.drawCentredString(self.width / 2, self.BASELINE, self.title)
+
+
+class _TextBanner(Flowable):
+    """
+    Faixa de um único parágrafo com fundo colorido (título da capa e período),
+    desenhada direto no canvas com a mesma geometria da Table de uma célula
+    usada antes
+    """
+    
+    # Respiro lateral do texto
+    SIDE_PADDING = 15
+    
+    def __init__(self, para: Paragraph, color, padding: float, border_width: float = 0,
+                 border_color=None, width: float = 17*cm):
+        """
+        Args:
+            para: Parágrafo da faixa
+            color: Cor de fundo
+            padding: Respiro acima e abaixo do texto
+            border_width, border_color: Borda ao redor da faixa (0 = sem borda)
+            width: Largura da faixa
+        """
+        super().__init__()
+        self.para = para
+        self.color = color
+        self.padding = padding
+        self.border_width = border_width
+        self.border_color = border_color
+        self.width = width
+        self.hAlign = 'CENTER'
+    
+    def wrap(self, availWidth, availHeight):
+        _, text_h = self.para.wrapOn(self.canv, self.width - 2 * self.SIDE_PADDING, availHeight)
+        self.height = text_h + 2 * self.padding
+        return self.width, self.height
+    
+    def draw(self):
+        canv = self.canv
+        canv.setFillColor(self.color)
+        canv.rect(0, 0, self.width, self.height, fill=1, stroke=0)
+        self.para.drawOn(canv, self.SIDE_PADDING, self.padding)
+        
+        if self.border_width:
+            canv.setStrokeColor(self.border_color)
+            canv.setLineWidth(self.border_width)
+            canv.rect(0, 0, self.width, self.height, fill=0, stroke=1)
+
+
+class _Card(Flowable):
+    """
+    Card com faixa de título e corpo (eventos, subseções e planos de ação),
+    desenhado direto no canvas com a mesma geometria da Table de 2 linhas
+    usada antes, mas sem o layout de tabela. O card não é quebrado entre páginas
+    """
+    
+    # Respiro lateral do título e do corpo
+    SIDE_PADDING = 12
+    
+    def __init__(self, title_para: Paragraph, body_para: Paragraph, header_color, body_color,
+                 header_padding, body_padding, border_width: float, border_color, width: float = 17*cm,
+                 space_after: float = 0):
+        """
+        Args:
+            title_para, body_para: Parágrafos do título e do corpo
+            header_color, body_color: Cores de fundo da faixa de título e do corpo
+            header_padding, body_padding: Respiro (acima, abaixo) do título e do corpo
+            border_width, border_color: Borda ao redor do card
+            width: Largura do card
+            space_after: Espaço até o próximo elemento da página (no lugar de um Spacer)
+        """
+        super().__init__()
+        self.title_para = title_para
+        self.body_para = body_para
+        self.header_color = header_color
+        self.body_color = body_color
+        self.header_padding = header_padding
+        self.body_padding = body_padding
+        self.border_width = border_width
+        self.border_color = border_color
+        self.width = width
+        self.hAlign = 'CENTER'
+        self.spaceAfter = space_after
+        self._size = None
+    
+    def wrap(self, availWidth, availHeight):
+        # Largura e texto fixos: a altura não depende do espaço disponível, então
+        # os parágrafos são quebrados uma única vez, mesmo quando o card não cabe
+        # no fim da página e é medido de novo na seguinte
+        if self._size is None:
+            inner_width = self.width - 2 * self.SIDE_PADDING
+            _, title_h = self.title_para.wrapOn(self.canv, inner_width, availHeight)
+            _, body_h = self.body_para.wrapOn(self.canv, inner_width, availHeight)
+            self.header_height = title_h + sum(self.header_padding)
+            self.body_height = body_h + sum(self.body_padding)
+            self.height = self.header_height + self.body_height
+            self._size = (self.width, self.height)
+        return self._size
+    
+    def draw(self):
+        canv = self.canv
+        canv.setFillColor(self.header_color)
+        canv.rect(0, self.body_height, self.width, self.header_height, fill=1, stroke=0)
+        canv.setFillColor(self.body_color)
+        canv.rect(0, 0, self.width, self.body_height, fill=1, stroke=0)
+        
+        self.title_para.drawOn(canv, self.SIDE_PADDING, self.body_height + self.header_padding[1])
+        self.body_para.drawOn(canv, self.SIDE_PADDING, self.body_padding[1])
+        
+        canv.setStrokeColor(self.border_color)
+        canv.setLineWidth(self.border_width)
+        canv.rect(0, 0, self.width, self.height, fill=0, stroke=1)
+
+
+class _SwotGrid(Flowable):
+    """
+    Quadro SWOT 2x2 (faixa colorida com o título e texto em cada quadrante),
+    desenhado direto no canvas com a mesma geometria da Table 2x4 usada antes
+    """
+    
+    # Faixa de título com altura fixa; texto dos quadrantes com 10pt de respiro
+    HEADER_HEIGHT = 0.8*cm
+    HEADER_TOP_PADDING = 8
+    BODY_PADDING = 10
+    SIDE_PADDING = 10
+    
+    def __init__(self, header_paras: List[Paragraph], body_paras: List[Paragraph], header_colors,
+                 grid_color=colors.lightgrey, width: float = 17*cm):
+        """
+        Args:
+            header_paras: Títulos dos quadrantes (forças, fraquezas, oportunidades, ameaças)
+            body_paras: Textos dos quadrantes, na mesma ordem
+            header_colors: Cores de fundo dos títulos, na mesma ordem
+            grid_color: Cor das linhas do quadro
+            width: Largura do quadro (duas colunas iguais)
+        """
+        super().__init__()
+        self.header_paras = header_paras
+        self.body_paras = body_paras
+        self.header_colors = header_colors
+        self.grid_color = grid_color
+        self.width = width
+        self.hAlign = 'CENTER'
+        self._size = None
+    
+    def wrap(self, availWidth, availHeight):
+        # Conteúdo e largura fixos: os parágrafos são quebrados uma única vez
+        if self._size is None:
+            inner_width = self.width / 2 - 2 * self.SIDE_PADDING
+            self.header_text_heights = [p.wrapOn(self.canv, inner_width, availHeight)[1] for p in self.header_paras]
+            self.body_text_heights = [p.wrapOn(self.canv, inner_width, availHeight)[1] for p in self.body_paras]
+            
+            # Cada linha de quadrantes acompanha o texto mais longo dos dois
+            h = self.body_text_heights
+            self.body_heights = [max(h[0], h[1]) + 2 * self.BODY_PADDING, max(h[2], h[3]) + 2 * self.BODY_PADDING]
+            self.height = 2 * self.HEADER_HEIGHT + sum(self.body_heights)
+            self._size = (self.width, self.height)
+        return self._size
+    
+    def draw(self):
+        canv = self.canv
+        col_width = self.width / 2
+        
+        # Fundos e textos, de cima para baixo: títulos + textos de cada linha
+        row_boundaries = [self.height]
+        top = self.height
+        for row, body_height in enumerate(self.body_heights):
+            header_bottom = top - self.HEADER_HEIGHT
+            body_bottom = header_bottom - body_height
+            
+            for col in (0, 1):
+                canv.setFillColor(self.header_colors[2 * row + col])
+                canv.rect(col * col_width, header_bottom, col_width, self.HEADER_HEIGHT, fill=1, stroke=0)
+            canv.setFillColor(colors.white)
+            canv.rect(0, body_bottom, self.width, body_height, fill=1, stroke=0)
+            
+            for col in (0, 1):
+                i = 2 * row + col
+                x = col * col_width + self.SIDE_PADDING
+                self.header_paras[i].drawOn(canv, x, top - self.HEADER_TOP_PADDING - self.header_text_heights[i])
+                self.body_paras[i].drawOn(canv, x, header_bottom - self.BODY_PADDING - self.body_text_heights[i])
+            
+            row_boundaries += [header_bottom, body_bottom]
+            top = body_bottom
+        
+        # Grade
+        canv.saveState()
+        canv.setLineCap(1)
+        canv.setLineJoin(1)
+        canv.setStrokeColor(self.grid_color)
+        canv.setLineWidth(1)
+        for y in row_boundaries:
+            canv.line(0, y, self.width, y)
+        for x in (0, col_width, self.width):
+            canv.line(x, 0, x, self.height)
+        canv.restoreState()
 
 
 class ExecutivePDFGenerator:
@@ -29,9 +262,39 @@ class ExecutivePDFGenerator:
     COLOR_DARK = colors.HexColor('#2c3e50')
     COLOR_LIGHT_BG = colors.HexColor('#faf8f3')
     
+    # ESTILOS DE PARÁGRAFO (nome -> atributos que diferem do BodyText)
+    _TEXT_STYLES = {
+        'CoverTitle': dict(fontSize=28, textColor=colors.white, alignment=TA_CENTER),
+        'PeriodBanner': dict(fontSize=11, textColor=colors.HexColor('#1a1a1a'), alignment=TA_CENTER, leading=16),
+        # O Platypus sobrepõe o spaceBefore ao spaceAfter do elemento anterior:
+        # 18 + 0.3cm reproduz, após a descrição da seção, os 12pt dela + 0.3cm + 6pt do BodyText
+        'BlockTitle': dict(fontSize=13, textColor=COLOR_PRIMARY, spaceBefore=18 + 0.3*cm, spaceAfter=0.3*cm),
+        'CardTitleWhite': dict(fontSize=11, textColor=colors.white),
+        'CardBody': dict(fontSize=9, textColor=COLOR_DARK, leading=12),
+        'EventTitle': dict(fontSize=12, textColor=colors.white),
+        'EventBody': dict(fontSize=10, textColor=COLOR_DARK),
+        'SubsectionCardTitle': dict(fontSize=11, textColor=COLOR_PRIMARY),
+        'SubsectionCardBody': dict(fontSize=10, textColor=COLOR_DARK, alignment=TA_JUSTIFY, leading=13),
+        'FooterTitle': dict(fontSize=9, textColor=colors.HexColor('#636e72'), alignment=TA_CENTER),
+        'FooterSmall': dict(fontSize=8, textColor=colors.HexColor('#636e72'), alignment=TA_CENTER),
+    }
+    
+    # Folha de estilos (padrão + customizados), montada na primeira instância
+    # e compartilhada pelas seguintes
+    _styles_cache = None
+    
+    # Seções de texto fixo do relatório, montadas na primeira geração
+    _static_body = None
+    _build_lock = threading.Lock()
+    
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        cls = type(self)
+        if cls._styles_cache is None:
+            self.styles = getSampleStyleSheet()
+            self._setup_custom_styles()
+            cls._styles_cache = self.styles
+        self.styles = cls._styles_cache
+        self._build_static_paragraphs()
     
     def _setup_custom_styles(self):
         """Configura estilos customizados"""
@@ -100,25 +363,62 @@ class ExecutivePDFGenerator:
                 parent=self.styles['Normal'],
                 fontSize=9,
                 textColor=colors.HexColor('#666666'),
-                spaceAfter=12,
+                spaceAfter=12 + 0.2*cm,
                 alignment=TA_JUSTIFY,
                 leading=12
             ))
+        
+        # Estilos dos parágrafos dos cards, capa e rodapé: derivados do BodyText
+        # só com o que muda, no lugar de um <para ...> reinterpretado a cada chamada
+        for name, overrides in self._TEXT_STYLES.items():
+            if name not in self.styles:
+                self.styles.add(ParagraphStyle(name=name, parent=self.styles['BodyText'], **overrides))
+    
+    def _build_static_paragraphs(self):
+        """Monta uma única vez os parágrafos de texto fixo (capa, SWOT, planos e rodapé)"""
+        self._header_para = Paragraph("<b>📊 RELATÓRIO EXECUTIVO</b><br/><font size=16>Análise Financeira Estratégica</font>", self.styles['CoverTitle'])
+        self._swot_title_para = Paragraph("<b>📊 Análise SWOT</b>", self.styles['BlockTitle'])
+        self._swot_header_paras = [
+            Paragraph(f"<b>{rotulo}</b>", self.styles['CardTitleWhite'])
+            for rotulo in ("💪 FORÇAS", "⚠️ FRAQUEZAS", "🌟 OPORTUNIDADES", "⚡ AMEAÇAS")
+        ]
+        self._planos_title_para = Paragraph("<b>📋 Planos de Ação</b>", self.styles['BlockTitle'])
+        self._footer_title_para = Paragraph('<b>Relatório Executivo Gerado Automaticamente</b>', self.styles['FooterTitle'])
+        self._footer_system_para = Paragraph('Sistema de Classificação Financeira com IA', self.styles['FooterSmall'])
     
-    def _format_currency(self, value: float) -> str:
-        """Formata valor em moeda"""
-        return f"R$ {value:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _format_currency(value: float) -> str:
+        """Formata valor em moeda (memoizado: totais se repetem entre as seções)"""
+        return f"R$ {value:,.2f}".translate(_SEPARADORES_BRL)
     
     def generate_executive_report(self, report_data: Dict[str, Any], output_path: str):
         """
         Gera relatório executivo em PDF
         
+        O PDF é montado em memória e gravado com uma única escrita, em vez
+        das várias escritas pequenas do SimpleDocTemplate no arquivo.
+        
         Args:
             report_data: Dicionário com dados do relatório
             output_path: Caminho para salvar o PDF
         """
+        Path(output_path).write_bytes(self.generate_executive_report_bytes(report_data))
+        print(f"✅ Relatório executivo gerado com sucesso!")
+    
+    def generate_executive_report_bytes(self, report_data: Dict[str, Any]) -> bytes:
+        """
+        Gera relatório executivo em PDF sem gravar em disco
+        
+        Args:
+            report_data: Dicionário com dados do relatório
+            
+        Returns:
+            Conteúdo do PDF
+        """
+        buffer = io.BytesIO()
         doc = SimpleDocTemplate(
-            output_path,
+            buffer,
             pagesize=A4,
             rightMargin=2*cm,
             leftMargin=2*cm,
@@ -128,54 +428,111 @@ class ExecutivePDFGenerator:
         
         story = []
         
+        # Data de geração, a mesma na capa e no rodapé
+        gerado_em = datetime.now().strftime("%d/%m/%Y às %H:%M")
+        
         # ===== CAPA =====
         story.append(Spacer(1, 1*cm))
         
         # Título principal
-        header_data = [[Paragraph("<para align=center fontSize=28 textColor=white><b>📊 RELATÓRIO EXECUTIVO</b><br/><font size=16>Análise Financeira Estratégica</font></para>", self.styles['BodyText'])]]
-        header_table = Table(header_data, colWidths=[17*cm])
-        header_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), self.COLOR_PRIMARY),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 25),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 25),
-            ('LEFTPADDING', (0, 0), (-1, -1), 15),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-        ]))
-        story.append(header_table)
+        story.append(_TextBanner(self._header_para, self.COLOR_PRIMARY, padding=25))
         
         story.append(Spacer(1, 0.3*cm))
         
         # Banner de período
         periodo = report_data.get('sumario', {}).get('periodo', {})
-        periodo_text = f"""
-        <para align=center fontSize=11 textColor=#1a1a1a leading=16>
-        <b>📅 Período Analisado:</b> {periodo.get('inicio', 'N/A')} até {periodo.get('fim', 'N/A')}<br/>
-        <b>📄 Gerado em:</b> {datetime.now().strftime('%d/%m/%Y às %H:%M')}
-        </para>
+        periodo_text = (
+            f"<b>📅 Período Analisado:</b> {periodo.get('inicio', 'N/A')} até {periodo.get('fim', 'N/A')}<br/>"
+            f"<b>📄 Gerado em:</b> {gerado_em}"
+        )
+        
+        story.append(_TextBanner(
+            Paragraph(periodo_text, self.styles['PeriodBanner']),
+            self.COLOR_LIGHT_GOLD, padding=15,
+            border_width=2, border_color=self.COLOR_PRIMARY
+        ))
+        
+        # Seções 1 a 8 (texto fixo): montadas uma única vez por processo
+        story.extend(self._get_static_body())
+        
+        # Rodapé
+        story.append(Spacer(1, 1*cm))
+        story.append(HRFlowable(width="100%", thickness=1, color=colors.lightgrey, spaceBefore=5, spaceAfter=10))
+        story.append(self._footer_title_para)
+        story.append(Paragraph(f'Gerado em {gerado_em}', self.styles['FooterSmall']))
+        story.append(self._footer_system_para)
+        
+        # Gera o PDF. Os flowables das seções fixas são compartilhados e guardam
+        # estado de layout; o doc.build é CPU-bound em Python puro (GIL), então
+        # serializá-lo entre threads não custa paralelismo
+        with self._build_lock:
+            doc.build(story)
+        
+        return buffer.getvalue()
+    
+    @staticmethod
+    def generate_single(job: Tuple[Dict[str, Any], str]) -> str:
+        """
+        Gera um relatório a partir de um par (report_data, output_path)
+        
+        Pode ser enviado para outro processo (ex: ProcessPoolExecutor), pois
+        não depende de estado da instância.
+        
+        Args:
+            job: Tupla (report_data, output_path)
+            
+        Returns:
+            Caminho do PDF gerado
+        """
+        report_data, output_path = job
+        ExecutivePDFGenerator().generate_executive_report(report_data, output_path)
+        return output_path
+    
+    @classmethod
+    def generate_many(cls, jobs: List[Tuple[Dict[str, Any], str]], max_workers: Optional[int] = None) -> List[str]:
+        """
+        Gera vários relatórios executivos
+        
+        O doc.build do ReportLab é CPU-bound (layout em Python puro) e cada
+        relatório é independente: com mais de um, cada um vai para um processo
+        (ProcessPoolExecutor), contornando o GIL. Cada processo monta a folha
+        de estilos uma única vez (_styles_cache) e a reaproveita nos próximos.
+        
+        Args:
+            jobs: Lista de pares (report_data, output_path)
+            max_workers: Número máximo de processos (padrão: nº de CPUs)
+            
+        Returns:
+            Caminhos dos PDFs gerados, na ordem de jobs
         """
+        if len(jobs) > 1:
+            max_workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(cls.generate_single, jobs, chunksize=1))
         
-        periodo_data = [[Paragraph(periodo_text, self.styles['BodyText'])]]
-        periodo_table = Table(periodo_data, colWidths=[17*cm])
-        periodo_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), self.COLOR_LIGHT_GOLD),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 15),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-            ('BOX', (0, 0), (-1, -1), 2, self.COLOR_PRIMARY),
-            ('LEFTPADDING', (0, 0), (-1, -1), 15),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-        ]))
-        story.append(periodo_table)
+        return [cls.generate_single(job) for job in jobs]
+    
+    def _get_static_body(self) -> List[Flowable]:
+        """Retorna as seções fixas do relatório, montando-as na primeira chamada do processo"""
+        cls = type(self)
+        if cls._static_body is None:
+            cls._static_body = self._build_static_body()
+        return cls._static_body
+    
+    def _build_static_body(self) -> List[Flowable]:
+        """
+        Monta as seções 1 a 8 do relatório (texto fixo, sem dados de report_data)
+        
+        Returns:
+            Flowables do sumário executivo aos planos de ação
+        """
+        story = []
         
         story.append(PageBreak())
         
         # ===== 1. SUMÁRIO EXECUTIVO =====
         self._add_section_title(story, "📌 SUMÁRIO EXECUTIVO")
         story.append(Paragraph("Os 3 eventos mais relevantes do mês com impacto direto nos resultados financeiros, operacionais ou estratégicos da empresa.", self.styles['SectionDesc']))
-        story.append(Spacer(1, 0.2*cm))
         
         # Eventos (cards)
         eventos = [
@@ -185,33 +542,20 @@ class ExecutivePDFGenerator:
         ]
         
         for evento in eventos:
-            evento_data = [[
-                Paragraph(f"<para fontSize=12 textColor=white><b>{evento['titulo']}</b></para>", self.styles['BodyText']),
-            ], [
-                Paragraph(f"<para fontSize=10 textColor=#2c3e50>{evento['desc']}</para>", self.styles['BodyText'])
-            ]]
-            
-            evento_table = Table(evento_data, colWidths=[17*cm])
-            evento_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), evento['cor']),
-                ('BACKGROUND', (0, 1), (-1, 1), colors.white),
-                ('TOPPADDING', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                ('TOPPADDING', (0, 1), (-1, 1), 12),
-                ('BOTTOMPADDING', (0, 1), (-1, 1), 12),
-                ('LEFTPADDING', (0, 0), (-1, -1), 12),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-                ('BOX', (0, 0), (-1, -1), 1, colors.lightgrey),
-            ]))
-            story.append(evento_table)
-            story.append(Spacer(1, 0.25*cm))
+            story.append(_Card(
+                Paragraph(f"<b>{evento['titulo']}</b>", self.styles['EventTitle']),
+                Paragraph(f"{evento['desc']}", self.styles['EventBody']),
+                header_color=evento['cor'], body_color=colors.white,
+                header_padding=(10, 10), body_padding=(12, 12),
+                border_width=1, border_color=colors.lightgrey,
+                space_after=0.25*cm
+            ))
         
         story.append(PageBreak())
         
         # ===== 2. MAPA DE RECEITAS =====
         self._add_section_title(story, "💰 MAPA DE RECEITAS")
         story.append(Paragraph("Análise detalhada da evolução das receitas com comparativos mensais, anuais e diagnóstico de sazonalidade.", self.styles['SectionDesc']))
-        story.append(Spacer(1, 0.2*cm))
         
         self._add_subsection(story, "Mensal (mês vs mês anterior)", 
             "A receita total cresceu 15,3% em relação ao mês anterior, passando de R$ 850.000 para R$ 980.000. O crescimento foi impulsionado principalmente pelo aumento nas vendas de produtos premium (+22%) e pela captação de 3 novos clientes corporativos de grande porte.")
@@ -231,7 +575,6 @@ class ExecutivePDFGenerator:
         # ===== 3. MAPA DE CUSTOS =====
         self._add_section_title(story, "📦 MAPA DE CUSTOS")
         story.append(Paragraph("Análise dos custos diretos relacionados à produção e operação do negócio.", self.styles['SectionDesc']))
-        story.append(Spacer(1, 0.2*cm))
         
         self._add_subsection(story, "Mensal (mês vs mês anterior)",
             "Os custos totais aumentaram 8,2% em relação ao mês anterior, passando de R$ 420.000 para R$ 454.440. Este aumento foi impulsionado principalmente pela elevação de 12% nos custos de matéria-prima devido à variação cambial e aumento da demanda no mercado de commodities.")
@@ -251,7 +594,6 @@ class ExecutivePDFGenerator:
         # ===== 4. MAPA DE DESPESAS =====
         self._add_section_title(story, "💸 MAPA DE DESPESAS")
         story.append(Paragraph("Análise detalhada das despesas operacionais, administrativas e comerciais da empresa.", self.styles['SectionDesc']))
-        story.append(Spacer(1, 0.2*cm))
         
         self._add_subsection(story, "Mensal (mês vs mês anterior)",
             "As despesas totais tiveram aumento de 6,5% comparado ao mês anterior, passando de R$ 280.000 para R$ 298.200. O crescimento concentrou-se em despesas comerciais (+15%) devido a investimentos em marketing digital e campanhas promocionais que impulsionaram as vendas.")
@@ -271,7 +613,6 @@ class ExecutivePDFGenerator:
         # ===== 5. DEPRECIAÇÃO & AMORTIZAÇÃO =====
         self._add_section_title(story, "📉 DEPRECIAÇÃO & AMORTIZAÇÃO")
         story.append(Paragraph("Avaliação contábil e financeira dos impactos da depreciação e amortização no resultado.", self.styles['SectionDesc']))
-        story.append(Spacer(1, 0.2*cm))
         
         self._add_subsection(story, "🔵 Controle Contábil",
             "A depreciação mensal totaliza R$ 45.000, incluindo maquinário (R$ 28.000), veículos (R$ 12.000) e equipamentos de TI (R$ 5.000). Todos os ativos estão corretamente registrados e as taxas seguem as normas contábeis vigentes. Recomenda-se revisão anual do imobilizado para baixa de itens obsoletos.")
@@ -287,7 +628,6 @@ class ExecutivePDFGenerator:
         # ===== 6. TRIBUTOS =====
         self._add_section_title(story, "🏛️ TRIBUTOS")
         story.append(Paragraph("Análise do impacto tributário no mês e oportunidades de otimização fiscal.", self.styles['SectionDesc']))
-        story.append(Spacer(1, 0.2*cm))
         
         self._add_subsection(story, "🔵 Análise Interna",
             "A carga tributária total foi de R$ 147.000, representando 15% da receita bruta. Composição: impostos sobre vendas (R$ 98.000 - 10%), contribuições sociais (R$ 29.400 - 3%) e IR/CSLL (R$ 19.600 - 2%). Este percentual está dentro do esperado para o regime tributário atual (Lucro Real). Não foram identificados picos anormais ou inconsistências nos recolhimentos.")
@@ -300,7 +640,6 @@ class ExecutivePDFGenerator:
         # ===== 7. FLUXO DE CAIXA =====
         self._add_section_title(story, "💵 MAPA DO FLUXO DE CAIXA")
         story.append(Paragraph("Análises do fluxo operacional, de financiamento e movimentação entre contas.", self.styles['SectionDesc']))
-        story.append(Spacer(1, 0.2*cm))
         
         self._add_subsection(story, "Mensal (mês vs mês anterior)",
             "O fluxo de caixa operacional foi positivo em R$ 135.000, crescimento de 22% vs mês anterior.")
@@ -320,63 +659,25 @@ class ExecutivePDFGenerator:
         # ===== 8. PARECER DA TAG =====
         self._add_section_title(story, "🎯 PARECER DA TAG")
         story.append(Paragraph("Análise SWOT, alertas e pontos de atenção considerando números do mês, fundamentos de negócios e segmento.", self.styles['SectionDesc']))
-        story.append(Spacer(1, 0.3*cm))
         
         # SWOT
-        story.append(Paragraph("<para fontSize=13 textColor=#101D43><b>📊 Análise SWOT</b></para>", self.styles['BodyText']))
-        story.append(Spacer(1, 0.3*cm))
+        story.append(self._swot_title_para)
         
-        swot_data = [
-            [
-                Paragraph("<para fontSize=11 textColor=white><b>💪 FORÇAS</b></para>", self.styles['BodyText']),
-                Paragraph("<para fontSize=11 textColor=white><b>⚠️ FRAQUEZAS</b></para>", self.styles['BodyText'])
-            ],
+        story.append(_SwotGrid(
+            self._swot_header_paras,
             [
-                Paragraph("<para fontSize=9 textColor=#2c3e50 leading=12>Crescimento consistente de receitas (+15% MoM, +28% YoY), melhoria na eficiência operacional (despesas/receita de 30,4%), forte geração de caixa operacional (R$ 135k) e estrutura comercial consolidada com ROI positivo em marketing digital.</para>", self.styles['BodyText']),
-                Paragraph("<para fontSize=9 textColor=#2c3e50 leading=12>Aumento da inadimplência (12% no período), dependência de fornecedores sujeitos à variação cambial, pressão nos custos operacionais (+8,2%) impactando margem bruta, e necessidade de modernização do controle patrimonial.</para>", self.styles['BodyText'])
+                Paragraph("Crescimento consistente de receitas (+15% MoM, +28% YoY), melhoria na eficiência operacional (despesas/receita de 30,4%), forte geração de caixa operacional (R$ 135k) e estrutura comercial consolidada com ROI positivo em marketing digital.", self.styles['CardBody']),
+                Paragraph("Aumento da inadimplência (12% no período), dependência de fornecedores sujeitos à variação cambial, pressão nos custos operacionais (+8,2%) impactando margem bruta, e necessidade de modernização do controle patrimonial.", self.styles['CardBody']),
+                Paragraph("Expansão para novos mercados regionais, implementação de produtos/serviços complementares (cross-selling), otimização tributária com créditos de PIS/COFINS (economia de 1,2%), e digitalização do processo de vendas para aumentar conversão.", self.styles['CardBody']),
+                Paragraph("Volatilidade cambial impactando custos de insumos importados, concorrência agressiva em preços no segmento, possível recessão econômica afetando poder de compra dos clientes, e mudanças regulatórias no setor.", self.styles['CardBody']),
             ],
-            [
-                Paragraph("<para fontSize=11 textColor=white><b>🌟 OPORTUNIDADES</b></para>", self.styles['BodyText']),
-                Paragraph("<para fontSize=11 textColor=white><b>⚡ AMEAÇAS</b></para>", self.styles['BodyText'])
-            ],
-            [
-                Paragraph("<para fontSize=9 textColor=#2c3e50 leading=12>Expansão para novos mercados regionais, implementação de produtos/serviços complementares (cross-selling), otimização tributária com créditos de PIS/COFINS (economia de 1,2%), e digitalização do processo de vendas para aumentar conversão.</para>", self.styles['BodyText']),
-                Paragraph("<para fontSize=9 textColor=#2c3e50 leading=12>Volatilidade cambial impactando custos de insumos importados, concorrência agressiva em preços no segmento, possível recessão econômica afetando poder de compra dos clientes, e mudanças regulatórias no setor.</para>", self.styles['BodyText'])
-            ]
-        ]
-        
-        swot_table = Table(swot_data, colWidths=[8.5*cm, 8.5*cm], rowHeights=[0.8*cm, None, 0.8*cm, None])
-        swot_table.setStyle(TableStyle([
-            # Headers
-            ('BACKGROUND', (0, 0), (0, 0), self.COLOR_SUCCESS),
-            ('BACKGROUND', (1, 0), (1, 0), self.COLOR_DANGER),
-            ('BACKGROUND', (0, 2), (0, 2), self.COLOR_INFO),
-            ('BACKGROUND', (1, 2), (1, 2), self.COLOR_WARNING),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
-            # Content
-            ('BACKGROUND', (0, 1), (-1, 1), colors.white),
-            ('BACKGROUND', (0, 3), (-1, 3), colors.white),
-            ('TOPPADDING', (0, 0), (-1, 0), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('TOPPADDING', (0, 1), (-1, 1), 10),
-            ('BOTTOMPADDING', (0, 1), (-1, 1), 10),
-            ('TOPPADDING', (0, 2), (-1, 2), 8),
-            ('BOTTOMPADDING', (0, 2), (-1, 2), 8),
-            ('TOPPADDING', (0, 3), (-1, 3), 10),
-            ('BOTTOMPADDING', (0, 3), (-1, 3), 10),
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
-        story.append(swot_table)
+            [self.COLOR_SUCCESS, self.COLOR_DANGER, self.COLOR_INFO, self.COLOR_WARNING]
+        ))
         
         story.append(PageBreak())
         
         # PLANOS DE AÇÃO
-        story.append(Paragraph("<para fontSize=13 textColor=#101D43><b>📋 Planos de Ação</b></para>", self.styles['BodyText']))
-        story.append(Spacer(1, 0.3*cm))
+        story.append(self._planos_title_para)
         
         # Ação Urgente
         self._add_action_plan(story, "🚨 AÇÃO URGENTE: Gestão de Inadimplência",
@@ -411,73 +712,32 @@ class ExecutivePDFGenerator:
             "• Automatizar processos de apuração de créditos tributários",
             self.COLOR_INFO)
         
-        # Rodapé
-        story.append(Spacer(1, 1*cm))
-        story.append(HRFlowable(width="100%", thickness=1, color=colors.lightgrey, spaceBefore=5, spaceAfter=10))
-        story.append(Paragraph('<para align=center fontSize=9 textColor=#636e72><b>Relatório Executivo Gerado Automaticamente</b></para>', self.styles['BodyText']))
-        story.append(Paragraph(f'<para align=center fontSize=8 textColor=#636e72>Gerado em {datetime.now().strftime("%d/%m/%Y às %H:%M")}</para>', self.styles['BodyText']))
-        story.append(Paragraph('<para align=center fontSize=8 textColor=#636e72>Sistema de Classificação Financeira com IA</para>', self.styles['BodyText']))
-        
-        # Gera o PDF
-        doc.build(story)
-        print(f"✅ Relatório executivo gerado com sucesso!")
+        return story
     
     def _add_section_title(self, story, title: str):
         """Adiciona título de seção com estilo destacado"""
-        title_data = [[Paragraph(f"<para align=center fontSize=16 textColor=white><b>{title}</b></para>", self.styles['BodyText'])]]
-        title_table = Table(title_data, colWidths=[17*cm])
-        title_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), self.COLOR_PRIMARY),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('TOPPADDING', (0, 0), (-1, -1), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 14),
-        ]))
-        story.append(title_table)
-        story.append(Spacer(1, 0.5*cm))
+        story.append(_SectionBanner(title, self.COLOR_PRIMARY, space_after=0.5*cm))
     
     def _add_subsection(self, story, title: str, content: str, highlight: bool = False):
         """Adiciona subseção com título e conteúdo"""
         bg_color = self.COLOR_LIGHT_GOLD if highlight else colors.white
         
-        subsection_data = [[
-            Paragraph(f"<para fontSize=11 textColor=#101D43><b>{title}</b></para>", self.styles['BodyText']),
-        ], [
-            Paragraph(f"<para fontSize=10 textColor=#2c3e50 align=justify leading=13>{content}</para>", self.styles['BodyText'])
-        ]]
-        
-        subsection_table = Table(subsection_data, colWidths=[17*cm])
-        subsection_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), bg_color),
-            ('TOPPADDING', (0, 0), (-1, 0), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-            ('TOPPADDING', (0, 1), (-1, 1), 8),
-            ('BOTTOMPADDING', (0, 1), (-1, 1), 10),
-            ('LEFTPADDING', (0, 0), (-1, -1), 12),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-            ('BOX', (0, 0), (-1, -1), 1, colors.lightgrey),
-        ]))
-        story.append(subsection_table)
-        story.append(Spacer(1, 0.25*cm))
+        story.append(_Card(
+            Paragraph(f"<b>{title}</b>", self.styles['SubsectionCardTitle']),
+            Paragraph(content, self.styles['SubsectionCardBody']),
+            header_color=bg_color, body_color=bg_color,
+            header_padding=(8, 6), body_padding=(8, 10),
+            border_width=1, border_color=colors.lightgrey,
+            space_after=0.25*cm
+        ))
     
     def _add_action_plan(self, story, title: str, content: str, color):
         """Adiciona card de plano de ação"""
-        action_data = [[
-            Paragraph(f"<para fontSize=11 textColor=white><b>{title}</b></para>", self.styles['BodyText']),
-        ], [
-            Paragraph(f"<para fontSize=9 textColor=#2c3e50 leading=12>{content}</para>", self.styles['BodyText'])
-        ]]
-        
-        action_table = Table(action_data, colWidths=[17*cm])
-        action_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), color),
-            ('BACKGROUND', (0, 1), (-1, 1), colors.white),
-            ('TOPPADDING', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('TOPPADDING', (0, 1), (-1, 1), 12),
-            ('BOTTOMPADDING', (0, 1), (-1, 1), 12),
-            ('LEFTPADDING', (0, 0), (-1, -1), 12),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-            ('BOX', (0, 0), (-1, -1), 2, color),
-        ]))
-        story.append(action_table)
-        story.append(Spacer(1, 0.3*cm))
+        story.append(_Card(
+            Paragraph(f"<b>{title}</b>", self.styles['CardTitleWhite']),
+            Paragraph(content, self.styles['CardBody']),
+            header_color=color, body_color=colors.white,
+            header_padding=(10, 10), body_padding=(12, 12),
+            border_width=2, border_color=color,
+            space_after=0.3*cm
+        ))
@@ -28,9 +28,54 @@ from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.platypus.flowables import HRFlowable
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY, TA_RIGHT
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List
+import functools
+import os
+from typing import Dict, Any, List, Optional, Tuple
 from src.utils.ai_decision_logger import get_logger
+from src.utils.executive_pdf_generator import _Card
+
+# Troca os separadores do formato americano (1,234.56) pelo brasileiro (1.234,56)
+# em uma única passada
+_SEPARADORES_BRL = str.maketrans(',.', '.,')
+
+
+def _ellipsize(texto: str, limite: int = 40) -> str:
+    """Corta o texto em `limite` caracteres, indicando o corte com reticências"""
+    return texto if len(texto) <= limite else f"{texto[:limite]}…"
+
+
+def _bullet_list(itens) -> str:
+    """Formata itens como lista com marcadores (uma linha por item, markup de Paragraph)"""
+    return "<br/>".join([f"• {item}" for item in itens])
+
+
+def _metrics_table_style(column_colors, border_color) -> TableStyle:
+    """
+    Estilo do grid de métricas da capa (receita, despesa e resultado)
+    
+    Args:
+        column_colors: Cores de fundo das 3 colunas
+        border_color: Cor da borda externa
+        
+    Returns:
+        TableStyle do grid
+    """
+    receita_color, despesa_color, resultado_color = column_colors
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), receita_color),
+        ('BACKGROUND', (1, 0), (1, -1), despesa_color),
+        ('BACKGROUND', (2, 0), (2, -1), resultado_color),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, 0), 15),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('TOPPADDING', (0, 1), (-1, 1), 8),
+        ('BOTTOMPADDING', (0, 1), (-1, 1), 12),
+        ('BOX', (0, 0), (-1, -1), 2, border_color),
+        ('INNERGRID', (0, 0), (-1, -1), 1, colors.white),
+    ])
 
 
 class ExecutivePDFGeneratorV2:
@@ -54,11 +99,114 @@ class ExecutivePDFGeneratorV2:
     COLOR_LIGHT_BG = colors.HexColor('#f8f9fa')
     COLOR_BORDER = colors.HexColor('#dee2e6')
     COLOR_TEXT_LIGHT = colors.HexColor('#6c757d')
+    COLOR_TEXT_STRONG = colors.HexColor('#1a1a1a')
+    COLOR_FOOTER = colors.HexColor('#636e72')
     
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
+    # ESTILOS DE PARÁGRAFO (nome -> atributos que diferem do BodyText)
+    _TEXT_STYLES = {
+        'CoverTitle': dict(fontSize=36, textColor=colors.white, alignment=TA_CENTER, leading=42),
+        'CoverSubtitle': dict(fontSize=16, textColor=COLOR_GOLD, alignment=TA_CENTER, leading=20),
+        'PeriodBanner': dict(fontSize=12, textColor=COLOR_TEXT_STRONG, alignment=TA_CENTER, leading=16),
+        'MetricPositive': dict(fontSize=18, textColor=COLOR_SUCCESS, alignment=TA_CENTER),
+        'MetricNegative': dict(fontSize=18, textColor=COLOR_DANGER, alignment=TA_CENTER),
+        'MetricCaption': dict(fontSize=10, textColor=COLOR_TEXT_LIGHT, alignment=TA_CENTER),
+        'CoverFooter': dict(fontSize=8, textColor=COLOR_TEXT_LIGHT, alignment=TA_CENTER),
+        'SectionBanner': dict(fontSize=16, textColor=colors.white, alignment=TA_CENTER),
+        'EventTitle': dict(fontSize=12, textColor=colors.white),
+        'EventBody': dict(fontSize=10, textColor=COLOR_DARK),
+        'MetricsCard': dict(fontSize=11, textColor=COLOR_TEXT_STRONG, leading=14),
+        'BlockTitle': dict(fontSize=12, textColor=COLOR_PRIMARY),
+        # Uma linha por item; leading 18 = 12 de entrelinha + 6 de espaço entre itens
+        'TopList': dict(fontSize=9, leading=18),
+        'CardTitleWhite': dict(fontSize=11, textColor=colors.white),
+        'CardBody': dict(fontSize=9, textColor=COLOR_DARK, leading=12),
+        'FooterTitle': dict(fontSize=9, textColor=COLOR_FOOTER, alignment=TA_CENTER),
+        'FooterSmall': dict(fontSize=8, textColor=COLOR_FOOTER, alignment=TA_CENTER),
+    }
+    
+    # ESTILOS DE TABELA (montados uma única vez e compartilhados entre os elementos)
+    _COVER_HEADER_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), COLOR_PRIMARY),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (0, 0), 30),
+        ('BOTTOMPADDING', (0, 0), (0, 0), 10),
+        ('TOPPADDING', (0, 1), (0, 1), 10),
+        ('BOTTOMPADDING', (0, 1), (0, 1), 30),
+        ('LEFTPADDING', (0, 0), (-1, -1), 20),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 20),
+    ])
+    _PERIODO_HEADER_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('BOX', (0, 0), (-1, -1), 1, COLOR_BORDER),
+    ])
+    # Chave: saldo >= 0
+    _METRICS_STYLES = {
+        True: _metrics_table_style((COLOR_SUCCESS_LIGHT, COLOR_DANGER_LIGHT, COLOR_WARNING_LIGHT), COLOR_BORDER),
+        False: _metrics_table_style((COLOR_SUCCESS_LIGHT, COLOR_DANGER_LIGHT, COLOR_DANGER_LIGHT), COLOR_BORDER),
+    }
+    _SECTION_TITLE_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), COLOR_PRIMARY),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('TOPPADDING', (0, 0), (-1, -1), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 14),
+    ])
+    _FINANCIAL_METRICS_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), COLOR_LIGHT_GOLD),
+        ('TOPPADDING', (0, 0), (-1, -1), 15),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+        ('LEFTPADDING', (0, 0), (-1, -1), 15),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+        ('BOX', (0, 0), (-1, -1), 2, COLOR_PRIMARY),
+    ])
+    _COMP_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.white),
+        ('TOPPADDING', (0, 0), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('LEFTPADDING', (0, 0), (-1, -1), 12),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+        ('BOX', (0, 0), (-1, -1), 1, colors.lightgrey),
+    ])
+    _SWOT_STYLE = TableStyle([
+        # Headers
+        ('BACKGROUND', (0, 0), (0, 0), COLOR_SUCCESS),
+        ('BACKGROUND', (1, 0), (1, 0), COLOR_DANGER),
+        ('BACKGROUND', (0, 2), (0, 2), COLOR_INFO),
+        ('BACKGROUND', (1, 2), (1, 2), COLOR_WARNING),
+        # Content
+        ('BACKGROUND', (0, 1), (-1, 1), colors.white),
+        ('BACKGROUND', (0, 3), (-1, 3), colors.white),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ])
+    
+    # Folha de estilos (padrão + customizados), montada na primeira instância
+    # e compartilhada pelas seguintes
+    _styles_cache = None
+    
+    def __init__(self, verbose: bool = False):
+        """
+        Args:
+            verbose: Exibe o progresso da geração no console (desligado por
+                padrão para não disputar o stdout em gerações em lote)
+        """
+        self.verbose = verbose
+        cls = type(self)
+        if cls._styles_cache is None:
+            self.styles = getSampleStyleSheet()
+            self._setup_custom_styles()
+            cls._styles_cache = self.styles
+        self.styles = cls._styles_cache
+        self._build_static_paragraphs()
         self.logger = get_logger()
-        self._setup_custom_styles()
     
     def _setup_custom_styles(self):
         """Configura estilos customizados profissionais"""
@@ -145,13 +293,43 @@ class ExecutivePDFGeneratorV2:
                 fontName='Helvetica',
                 leading=11
             ))
+        
+        # Estilos dos parágrafos dos cards, capa e rodapé: derivados do BodyText
+        # só com o que muda, no lugar de um <para ...> reinterpretado a cada chamada
+        for name, overrides in self._TEXT_STYLES.items():
+            if name not in self.styles:
+                self.styles.add(ParagraphStyle(name=name, parent=self.styles['BodyText'], **overrides))
     
-    def _format_currency(self, value: float) -> str:
-        """Formata valor em moeda"""
-        return f"R$ {abs(value):,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+    def _build_static_paragraphs(self):
+        """Monta uma única vez os parágrafos de texto fixo (capa, títulos, SWOT e rodapé)"""
+        self._cover_title_para = Paragraph("<b>📊 RELATÓRIO EXECUTIVO</b>", self.styles['CoverTitle'])
+        self._cover_subtitle_para = Paragraph("<b>Análise Financeira e Estratégica</b>", self.styles['CoverSubtitle'])
+        self._receita_caption_para = Paragraph("<b>💰 RECEITA TOTAL</b>", self.styles['MetricCaption'])
+        self._despesa_caption_para = Paragraph("<b>💸 DESPESA TOTAL</b>", self.styles['MetricCaption'])
+        # Chave: saldo >= 0
+        self._resultado_caption_paras = {
+            True: Paragraph("<b>📈 RESULTADO</b>", self.styles['MetricCaption']),
+            False: Paragraph("<b>📉 RESULTADO</b>", self.styles['MetricCaption']),
+        }
+        self._top_receitas_title_para = Paragraph("<b>📈 TOP 5 RECEITAS</b>", self.styles['BlockTitle'])
+        self._top_despesas_title_para = Paragraph("<b>📉 TOP 5 DESPESAS</b>", self.styles['BlockTitle'])
+        self._swot_header_paras = [
+            Paragraph(f"<b>{rotulo}</b>", self.styles['CardTitleWhite'])
+            for rotulo in ("💪 FORÇAS", "⚠️ FRAQUEZAS", "🌟 OPORTUNIDADES", "⚡ AMEAÇAS")
+        ]
+        self._footer_title_para = Paragraph('<b>Relatório Executivo Gerado com Dados Reais</b>', self.styles['FooterTitle'])
+        self._footer_system_para = Paragraph('Sistema de Classificação Financeira com IA - Versão 2.0', self.styles['FooterSmall'])
     
-    def _format_percent(self, value: float) -> str:
-        """Formata percentual"""
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _format_currency(value: float) -> str:
+        """Formata valor em moeda (memoizado: totais se repetem entre as seções)"""
+        return f"R$ {abs(value):,.2f}".translate(_SEPARADORES_BRL)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _format_percent(value: float) -> str:
+        """Formata percentual (memoizado)"""
         return f"{value:+.1f}%"
     
     def generate_executive_report(self, 
@@ -166,7 +344,8 @@ class ExecutivePDFGeneratorV2:
             strategic_report: Relatório estratégico do StrategicAnalyzer
             output_path: Caminho para salvar o PDF
         """
-        print("\n📄 [PDF GENERATOR V2] Gerando relatório executivo...")
+        if self.verbose:
+            print("\n📄 [PDF GENERATOR V2] Gerando relatório executivo...")
         
         doc = SimpleDocTemplate(
             output_path,
@@ -179,36 +358,45 @@ class ExecutivePDFGeneratorV2:
         
         story = []
         
+        # Data de geração, a mesma na capa e no rodapé
+        gerado_em = datetime.now().strftime("%d/%m/%Y às %H:%M")
+        
         # ===== CAPA =====
-        self._add_cover(story, financial_report)
-        story.append(PageBreak())
+        self._add_cover(story, financial_report, gerado_em)
+        
+        # Cada seção abre a própria página; as que ficariam vazias (ex: IA sem
+        # eventos, SWOT ou planos) são omitidas, sem montar título nem página
         
         # ===== 1. SUMÁRIO EXECUTIVO =====
-        self._add_executive_summary(story, strategic_report)
-        story.append(PageBreak())
+        if strategic_report.get('key_events'):
+            story.append(PageBreak())
+            self._add_executive_summary(story, strategic_report)
         
         # ===== 2. ANÁLISE FINANCEIRA =====
-        self._add_financial_overview(story, financial_report)
         story.append(PageBreak())
+        self._add_financial_overview(story, financial_report)
         
         # ===== 3. COMPARAÇÕES MENSAIS =====
         if financial_report.get('comparacoes_mensais'):
-            self._add_monthly_comparisons(story, financial_report['comparacoes_mensais'])
             story.append(PageBreak())
+            self._add_monthly_comparisons(story, financial_report['comparacoes_mensais'])
         
         # ===== 4. ANÁLISE SWOT =====
-        self._add_swot_analysis(story, strategic_report)
-        story.append(PageBreak())
+        if any(strategic_report.get('swot', {}).values()):
+            story.append(PageBreak())
+            self._add_swot_analysis(story, strategic_report)
         
         # ===== 5. PLANOS DE AÇÃO =====
-        self._add_action_plans(story, strategic_report)
+        if strategic_report.get('action_plans'):
+            story.append(PageBreak())
+            self._add_action_plans(story, strategic_report)
         
         # ===== RODAPÉ =====
         story.append(Spacer(1, 1*cm))
         story.append(HRFlowable(width="100%", thickness=1, color=colors.lightgrey, spaceBefore=5, spaceAfter=10))
-        story.append(Paragraph('<para align=center fontSize=9 textColor=#636e72><b>Relatório Executivo Gerado com Dados Reais</b></para>', self.styles['BodyText']))
-        story.append(Paragraph(f'<para align=center fontSize=8 textColor=#636e72>Gerado em {datetime.now().strftime("%d/%m/%Y às %H:%M")}</para>', self.styles['BodyText']))
-        story.append(Paragraph('<para align=center fontSize=8 textColor=#636e72>Sistema de Classificação Financeira com IA - Versão 2.0</para>', self.styles['BodyText']))
+        story.append(self._footer_title_para)
+        story.append(Paragraph(f'Gerado em {gerado_em}', self.styles['FooterSmall']))
+        story.append(self._footer_system_para)
         
         # Gera o PDF
         doc.build(story)
@@ -222,38 +410,61 @@ class ExecutivePDFGeneratorV2:
             calculations=None
         )
         
-        print(f"✅ Relatório executivo salvo: {output_path}")
+        if self.verbose:
+            print(f"✅ Relatório executivo salvo: {output_path}")
     
-    def _add_cover(self, story: List, financial_report: Dict[str, Any]):
-        """Adiciona capa elegante do relatório"""
-        story.append(Spacer(1, 1.5*cm))
-
-        # Título principal com design profissional
-        title_text = """
-        <para align=center fontSize=36 textColor=white leading=42>
-        <b>📊 RELATÓRIO EXECUTIVO</b>
-        </para>
+    @staticmethod
+    def generate_single(job: Tuple[Dict[str, Any], Dict[str, Any], str]) -> str:
+        """
+        Gera um relatório a partir de uma tupla (financial_report, strategic_report, output_path)
+        
+        Pode ser enviado para outro processo (ex: ProcessPoolExecutor), pois
+        não depende de estado da instância.
+        
+        Args:
+            job: Tupla (financial_report, strategic_report, output_path)
+            
+        Returns:
+            Caminho do PDF gerado
+        """
+        financial_report, strategic_report, output_path = job
+        ExecutivePDFGeneratorV2().generate_executive_report(financial_report, strategic_report, output_path)
+        return output_path
+    
+    @classmethod
+    def generate_many(cls, jobs: List[Tuple[Dict[str, Any], Dict[str, Any], str]],
+                      max_workers: Optional[int] = None) -> List[str]:
         """
-        subtitle_text = """
-        <para align=center fontSize=16 textColor=#D6BC71 leading=20>
-        <b>Análise Financeira e Estratégica</b>
-        </para>
+        Gera vários relatórios executivos (ex: um por cliente)
+        
+        Cada relatório é independente e o doc.build é CPU-bound: com mais de
+        um, cada um vai para um processo (ProcessPoolExecutor), contornando o
+        GIL. Cada processo monta a folha de estilos uma única vez
+        (_styles_cache) e a reaproveita nos próximos.
+        
+        Args:
+            jobs: Lista de tuplas (financial_report, strategic_report, output_path)
+            max_workers: Número máximo de processos (padrão: nº de CPUs)
+            
+        Returns:
+            Caminhos dos PDFs gerados, na ordem de jobs
         """
+        if len(jobs) > 1:
+            max_workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(cls.generate_single, jobs, chunksize=1))
+        
+        return [cls.generate_single(job) for job in jobs]
+    
+    def _add_cover(self, story: List, financial_report: Dict[str, Any], gerado_em: str):
+        """Adiciona capa elegante do relatório (gerado_em: data/hora de geração já formatada)"""
+        story.append(Spacer(1, 1.5*cm))
 
-        header_data = [[Paragraph(title_text, self.styles['BodyText'])],
-                       [Paragraph(subtitle_text, self.styles['BodyText'])]]
+        # Título principal com design profissional
+        header_data = [[self._cover_title_para],
+                       [self._cover_subtitle_para]]
         header_table = Table(header_data, colWidths=[17*cm])
-        header_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), self.COLOR_PRIMARY),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (0, 0), 30),
-            ('BOTTOMPADDING', (0, 0), (0, 0), 10),
-            ('TOPPADDING', (0, 1), (0, 1), 10),
-            ('BOTTOMPADDING', (0, 1), (0, 1), 30),
-            ('LEFTPADDING', (0, 0), (-1, -1), 20),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 20),
-        ]))
+        header_table.setStyle(self._COVER_HEADER_STYLE)
         story.append(header_table)
         story.append(Spacer(1, 0.4*cm))
 
@@ -265,80 +476,49 @@ class ExecutivePDFGeneratorV2:
         ultimo_mes = periodo.get('ultimo_mes_analisado', periodo.get('mes_fim', 'N/A'))
 
         # Header do período
-        periodo_header = f"""
-        <para align=center fontSize=12 textColor=#1a1a1a leading=16>
-            <b>📅 Período Analisado:</b> {periodo.get('inicio', 'N/A')} até {periodo.get('fim', 'N/A')}<br/>
-            <b>🗓️ Último Mês:</b> {ultimo_mes}
-        </para>
-        """
+        periodo_header = (
+            f"<b>📅 Período Analisado:</b> {periodo.get('inicio', 'N/A')} até {periodo.get('fim', 'N/A')}<br/>"
+            f"<b>🗓️ Último Mês:</b> {ultimo_mes}"
+        )
 
-        periodo_header_data = [[Paragraph(periodo_header, self.styles['BodyText'])]]
+        periodo_header_data = [[Paragraph(periodo_header, self.styles['PeriodBanner'])]]
         periodo_header_table = Table(periodo_header_data, colWidths=[17*cm])
-        periodo_header_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('BOX', (0, 0), (-1, -1), 1, self.COLOR_BORDER),
-        ]))
+        periodo_header_table.setStyle(self._PERIODO_HEADER_STYLE)
         story.append(periodo_header_table)
         story.append(Spacer(1, 0.4*cm))
 
         # Cards de métricas principais em grid
         saldo = totais.get('saldo', 0)
-        saldo_color = self.COLOR_SUCCESS if saldo >= 0 else self.COLOR_DANGER
-        saldo_icon = "📈" if saldo >= 0 else "📉"
+        saldo_style = self.styles['MetricPositive'] if saldo >= 0 else self.styles['MetricNegative']
 
         metrics_data = [
             [
-                Paragraph(f"<para align=center fontSize=18 textColor=#28a745><b>{self._format_currency(totais.get('receita', 0))}</b></para>", self.styles['BodyText']),
-                Paragraph(f"<para align=center fontSize=18 textColor=#dc3545><b>{self._format_currency(totais.get('despesa', 0))}</b></para>", self.styles['BodyText']),
-                Paragraph(f"<para align=center fontSize=18 textColor={saldo_color.hexval()}><b>{self._format_currency(saldo)}</b></para>", self.styles['BodyText'])
+                Paragraph(f"<b>{self._format_currency(totais.get('receita', 0))}</b>", self.styles['MetricPositive']),
+                Paragraph(f"<b>{self._format_currency(totais.get('despesa', 0))}</b>", self.styles['MetricNegative']),
+                Paragraph(f"<b>{self._format_currency(saldo)}</b>", saldo_style)
             ],
             [
-                Paragraph("<para align=center fontSize=10 textColor=#6c757d><b>💰 RECEITA TOTAL</b></para>", self.styles['BodyText']),
-                Paragraph("<para align=center fontSize=10 textColor=#6c757d><b>💸 DESPESA TOTAL</b></para>", self.styles['BodyText']),
-                Paragraph(f"<para align=center fontSize=10 textColor=#6c757d><b>{saldo_icon} RESULTADO</b></para>", self.styles['BodyText'])
+                self._receita_caption_para,
+                self._despesa_caption_para,
+                self._resultado_caption_paras[saldo >= 0]
             ]
         ]
 
         metrics_table = Table(metrics_data, colWidths=[5.5*cm, 5.5*cm, 5.5*cm])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), self.COLOR_SUCCESS_LIGHT),
-            ('BACKGROUND', (1, 0), (1, -1), self.COLOR_DANGER_LIGHT),
-            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#fff3cd') if saldo >= 0 else self.COLOR_DANGER_LIGHT),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('TOPPADDING', (0, 0), (-1, 0), 15),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 1), (-1, 1), 8),
-                ('BOTTOMPADDING', (0, 1), (-1, 1), 12),
-                ('BOX', (0, 0), (-1, -1), 2, self.COLOR_BORDER),
-                ('INNERGRID', (0, 0), (-1, -1), 1, colors.white),
-            ]))
+        metrics_table.setStyle(self._METRICS_STYLES[saldo >= 0])
         story.append(metrics_table)
 
         story.append(Spacer(1, 0.3*cm))
 
         # Rodapé da capa
-        footer_text = f"""
-        <para align=center fontSize=8 textColor=#6c757d>
-        📄 Gerado em {datetime.now().strftime('%d/%m/%Y às %H:%M')} | Baseado em dados reais dos arquivos OFX
-        </para>
-        """
-        story.append(Paragraph(footer_text, self.styles['BodyText']))
+        footer_text = f"📄 Gerado em {gerado_em} | Baseado em dados reais dos arquivos OFX"
+        story.append(Paragraph(footer_text, self.styles['CoverFooter']))
     
     def _add_section_title(self, story: List, title: str):
         """Adiciona título de seção"""
-        title_data = [[Paragraph(f"<para align=center fontSize=16 textColor=white><b>{title}</b></para>", self.styles['BodyText'])]]
+        title_data = [[Paragraph(f"<b>{title}</b>", self.styles['SectionBanner'])]]
         title_table = Table(title_data, colWidths=[17*cm])
-        title_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), self.COLOR_PRIMARY),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('TOPPADDING', (0, 0), (-1, -1), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 14),
-        ]))
+        title_table.setStyle(self._SECTION_TITLE_STYLE)
         story.append(title_table)
         story.append(Spacer(1, 0.5*cm))
     
@@ -363,26 +543,14 @@ class ExecutivePDFGeneratorV2:
                 cor = self.COLOR_WARNING
                 icone = "🟡"
             
-            evento_data = [[
-                Paragraph(f"<para fontSize=12 textColor=white><b>{icone} {evento.get('titulo', 'Evento')}</b></para>", self.styles['BodyText']),
-            ], [
-                Paragraph(f"<para fontSize=10 textColor=#2c3e50>{evento.get('descricao', 'Sem descrição')}</para>", self.styles['BodyText'])
-            ]]
-            
-            evento_table = Table(evento_data, colWidths=[17*cm])
-            evento_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), cor),
-                ('BACKGROUND', (0, 1), (-1, 1), colors.white),
-                ('TOPPADDING', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                ('TOPPADDING', (0, 1), (-1, 1), 12),
-                ('BOTTOMPADDING', (0, 1), (-1, 1), 12),
-                ('LEFTPADDING', (0, 0), (-1, -1), 12),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-                ('BOX', (0, 0), (-1, -1), 1, colors.lightgrey),
-            ]))
-            story.append(evento_table)
-            story.append(Spacer(1, 0.25*cm))
+            story.append(_Card(
+                Paragraph(f"<b>{icone} {evento.get('titulo', 'Evento')}</b>", self.styles['EventTitle']),
+                Paragraph(f"{evento.get('descricao', 'Sem descrição')}", self.styles['EventBody']),
+                header_color=cor, body_color=colors.white,
+                header_padding=(10, 10), body_padding=(12, 12),
+                border_width=1, border_color=colors.lightgrey,
+                space_after=0.25*cm
+            ))
     
     def _add_financial_overview(self, story: List, financial_report: Dict[str, Any]):
         """Adiciona visão geral financeira"""
@@ -394,7 +562,6 @@ class ExecutivePDFGeneratorV2:
         
         # Card de métricas principais
         metrics_text = f"""
-        <para fontSize=11 textColor=#1a1a1a leading=14>
         <b>📊 MÉTRICAS PRINCIPAIS</b><br/><br/>
         <b>Receita Total:</b> {self._format_currency(totais.get('receita', 0))}<br/>
         <b>Despesa Total:</b> {self._format_currency(totais.get('despesa', 0))}<br/>
@@ -403,41 +570,34 @@ class ExecutivePDFGeneratorV2:
         <b>Total de Transações:</b> {transacoes.get('total', 0)}<br/>
         <b>Ticket Médio Receita:</b> {self._format_currency(transacoes.get('ticket_medio_receita', 0))}<br/>
         <b>Ticket Médio Despesa:</b> {self._format_currency(transacoes.get('ticket_medio_despesa', 0))}
-        </para>
         """
         
-        metrics_data = [[Paragraph(metrics_text, self.styles['BodyText'])]]
+        metrics_data = [[Paragraph(metrics_text, self.styles['MetricsCard'])]]
         metrics_table = Table(metrics_data, colWidths=[17*cm])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), self.COLOR_LIGHT_GOLD),
-            ('TOPPADDING', (0, 0), (-1, -1), 15),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-            ('LEFTPADDING', (0, 0), (-1, -1), 15),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-            ('BOX', (0, 0), (-1, -1), 2, self.COLOR_PRIMARY),
-        ]))
+        metrics_table.setStyle(self._FINANCIAL_METRICS_STYLE)
         story.append(metrics_table)
         story.append(Spacer(1, 0.5*cm))
         
         # Top 5 Receitas e Despesas
-        story.append(Paragraph("<para fontSize=12 textColor=#101D43><b>📈 TOP 5 RECEITAS</b></para>", self.styles['BodyText']))
+        story.append(self._top_receitas_title_para)
         story.append(Spacer(1, 0.2*cm))
         
-        top_receitas = sumario.get('top_receitas', [])[:5]
-        if top_receitas:
-            for item in top_receitas:
-                item_text = f"<para fontSize=9>{item['data']}: {item['descricao'][:40]}... - {self._format_currency(item['valor'])}</para>"
-                story.append(Paragraph(item_text, self.styles['BodyText']))
+        self._add_top_items(story, sumario.get('top_receitas', [])[:5])
         
         story.append(Spacer(1, 0.3*cm))
-        story.append(Paragraph("<para fontSize=12 textColor=#101D43><b>📉 TOP 5 DESPESAS</b></para>", self.styles['BodyText']))
+        story.append(self._top_despesas_title_para)
         story.append(Spacer(1, 0.2*cm))
         
-        top_despesas = sumario.get('top_despesas', [])[:5]
-        if top_despesas:
-            for item in top_despesas:
-                item_text = f"<para fontSize=9>{item['data']}: {item['descricao'][:40]}... - {self._format_currency(item['valor'])}</para>"
-                story.append(Paragraph(item_text, self.styles['BodyText']))
+        self._add_top_items(story, sumario.get('top_despesas', [])[:5])
+    
+    def _add_top_items(self, story: List, itens: List[Dict[str, Any]]):
+        """Adiciona uma lista de top transações como um único parágrafo (uma linha por item)"""
+        if itens:
+            linhas = [
+                f"{item['data']}: {_ellipsize(item['descricao'])} - {self._format_currency(item['valor'])}"
+                for item in itens
+            ]
+            story.append(Paragraph("<br/>".join(linhas), self.styles['TopList']))
     
     def _add_monthly_comparisons(self, story: List, comparacoes: List[Dict[str, Any]]):
         """Adiciona comparações mensais"""
@@ -456,7 +616,6 @@ class ExecutivePDFGeneratorV2:
             sinal_saldo = "+" if var['saldo_pct'] > 0 else ""
             
             comp_text = f"""
-            <para fontSize=11 textColor=#1a1a1a leading=14>
             <b>📅 {period_a['mes']} vs {period_b['mes']}</b><br/><br/>
             <b>Receita:</b> {self._format_currency(period_a['receita'])} → {self._format_currency(period_b['receita'])} 
             ({sinal_receita}{var['receita_pct']:.1f}%)<br/>
@@ -464,19 +623,11 @@ class ExecutivePDFGeneratorV2:
             ({sinal_despesa}{var['despesa_pct']:.1f}%)<br/>
             <b>Resultado:</b> {self._format_currency(period_a['saldo'])} → {self._format_currency(period_b['saldo'])} 
             ({sinal_saldo}{var['saldo_pct']:.1f}%)
-            </para>
             """
             
-            comp_data = [[Paragraph(comp_text, self.styles['BodyText'])]]
+            comp_data = [[Paragraph(comp_text, self.styles['MetricsCard'])]]
             comp_table = Table(comp_data, colWidths=[17*cm])
-            comp_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.white),
-                ('TOPPADDING', (0, 0), (-1, -1), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('LEFTPADDING', (0, 0), (-1, -1), 12),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-                ('BOX', (0, 0), (-1, -1), 1, colors.lightgrey),
-            ]))
+            comp_table.setStyle(self._COMP_STYLE)
             story.append(comp_table)
             story.append(Spacer(1, 0.3*cm))
     
@@ -488,46 +639,22 @@ class ExecutivePDFGeneratorV2:
         
         swot = strategic_report.get('swot', {})
         
-        # Formata listas em texto
-        def format_list(items):
-            return "<br/>".join([f"• {item}" for item in items])
-        
+        forcas_para, fraquezas_para, oportunidades_para, ameacas_para = self._swot_header_paras
         swot_data = [
+            [forcas_para, fraquezas_para],
             [
-                Paragraph("<para fontSize=11 textColor=white><b>💪 FORÇAS</b></para>", self.styles['BodyText']),
-                Paragraph("<para fontSize=11 textColor=white><b>⚠️ FRAQUEZAS</b></para>", self.styles['BodyText'])
+                Paragraph(_bullet_list(swot.get('forcas', ['Nenhuma força identificada'])), self.styles['CardBody']),
+                Paragraph(_bullet_list(swot.get('fraquezas', ['Nenhuma fraqueza identificada'])), self.styles['CardBody'])
             ],
+            [oportunidades_para, ameacas_para],
             [
-                Paragraph(f"<para fontSize=9 textColor=#2c3e50 leading=12>{format_list(swot.get('forcas', ['Nenhuma força identificada']))}</para>", self.styles['BodyText']),
-                Paragraph(f"<para fontSize=9 textColor=#2c3e50 leading=12>{format_list(swot.get('fraquezas', ['Nenhuma fraqueza identificada']))}</para>", self.styles['BodyText'])
-            ],
-            [
-                Paragraph("<para fontSize=11 textColor=white><b>🌟 OPORTUNIDADES</b></para>", self.styles['BodyText']),
-                Paragraph("<para fontSize=11 textColor=white><b>⚡ AMEAÇAS</b></para>", self.styles['BodyText'])
-            ],
-            [
-                Paragraph(f"<para fontSize=9 textColor=#2c3e50 leading=12>{format_list(swot.get('oportunidades', ['Nenhuma oportunidade identificada']))}</para>", self.styles['BodyText']),
-                Paragraph(f"<para fontSize=9 textColor=#2c3e50 leading=12>{format_list(swot.get('ameacas', ['Nenhuma ameaça identificada']))}</para>", self.styles['BodyText'])
+                Paragraph(_bullet_list(swot.get('oportunidades', ['Nenhuma oportunidade identificada'])), self.styles['CardBody']),
+                Paragraph(_bullet_list(swot.get('ameacas', ['Nenhuma ameaça identificada'])), self.styles['CardBody'])
             ]
         ]
         
         swot_table = Table(swot_data, colWidths=[8.5*cm, 8.5*cm], rowHeights=[0.8*cm, None, 0.8*cm, None])
-        swot_table.setStyle(TableStyle([
-            # Headers
-            ('BACKGROUND', (0, 0), (0, 0), self.COLOR_SUCCESS),
-            ('BACKGROUND', (1, 0), (1, 0), self.COLOR_DANGER),
-            ('BACKGROUND', (0, 2), (0, 2), self.COLOR_INFO),
-            ('BACKGROUND', (1, 2), (1, 2), self.COLOR_WARNING),
-            # Content
-            ('BACKGROUND', (0, 1), (-1, 1), colors.white),
-            ('BACKGROUND', (0, 3), (-1, 3), colors.white),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
+        swot_table.setStyle(self._SWOT_STYLE)
         story.append(swot_table)
     
     def _add_action_plans(self, story: List, strategic_report: Dict[str, Any]):
@@ -552,7 +679,7 @@ class ExecutivePDFGeneratorV2:
                 icone = "👀"
             
             # Formata ações
-            acoes_text = "<br/>".join([f"• {acao}" for acao in plano.get('acoes', [])])
+            acoes_text = _bullet_list(plano.get('acoes', []))
             
             plano_text = f"""
             <b>Situação:</b> {plano.get('situacao', 'N/A')}<br/><br/>
@@ -560,23 +687,11 @@ class ExecutivePDFGeneratorV2:
             <b>Ações Recomendadas:</b><br/>{acoes_text}
             """
             
-            action_data = [[
-                Paragraph(f"<para fontSize=11 textColor=white><b>{icone} {prioridade}: {plano.get('titulo', 'Plano')}</b></para>", self.styles['BodyText']),
-            ], [
-                Paragraph(f"<para fontSize=9 textColor=#2c3e50 leading=12>{plano_text}</para>", self.styles['BodyText'])
-            ]]
-            
-            action_table = Table(action_data, colWidths=[17*cm])
-            action_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), cor),
-                ('BACKGROUND', (0, 1), (-1, 1), colors.white),
-                ('TOPPADDING', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                ('TOPPADDING', (0, 1), (-1, 1), 12),
-                ('BOTTOMPADDING', (0, 1), (-1, 1), 12),
-                ('LEFTPADDING', (0, 0), (-1, -1), 12),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-                ('BOX', (0, 0), (-1, -1), 2, cor),
-            ]))
-            story.append(action_table)
-            story.append(Spacer(1, 0.3*cm))
+            story.append(_Card(
+                Paragraph(f"<b>{icone} {prioridade}: {plano.get('titulo', 'Plano')}</b>", self.styles['CardTitleWhite']),
+                Paragraph(plano_text, self.styles['CardBody']),
+                header_color=cor, body_color=colors.white,
+                header_padding=(10, 10), body_padding=(12, 12),
+                border_width=2, border_color=cor,
+                space_after=0.3*cm
+            ))
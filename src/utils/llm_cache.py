@@ -0,0 +1,95 @@
+"""
+LLM CACHE - Cache persistente de respostas da IA
+Guarda em SQLite as classificações já feitas para não repetir chamadas à API
+"""
+
+import json
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class LLMResponseCache:
+    """Cache em disco (SQLite) de decisões da IA, indexado por chave de hash"""
+    
+    def __init__(self, db_path: str = "./src/cache/llm_cache.sqlite"):
+        """
+        Inicializa o cache
+        
+        Args:
+            db_path: Caminho do arquivo SQLite
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS respostas (chave TEXT PRIMARY KEY, decisao TEXT NOT NULL)"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(*partes: Any) -> str:
+        """
+        Gera a chave do cache a partir das partes que determinam a resposta
+        
+        Args:
+            partes: Valores que identificam a chamada (modelo, descrição, origem...)
+            
+        Returns:
+            Hash hexadecimal da chave
+        """
+        texto = "|".join(str(p) for p in partes)
+        return hashlib.blake2b(texto.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def get(self, chave: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca uma decisão no cache
+        
+        Args:
+            chave: Chave gerada por make_key
+            
+        Returns:
+            Decisão armazenada ou None se não existir
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT decisao FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def set(self, chave: str, decisao: Dict[str, Any]) -> None:
+        """
+        Armazena uma decisão no cache
+        
+        Args:
+            chave: Chave gerada por make_key
+            decisao: Decisão da IA (classificação e explicação)
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas (chave, decisao) VALUES (?, ?)",
+                (chave, json.dumps(decisao, ensure_ascii=False))
+            )
+            self._conn.commit()
+    
+    def set_many(self, itens: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Armazena várias decisões no cache em uma única transação
+        
+        Args:
+            itens: Pares (chave, decisão)
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO respostas (chave, decisao) VALUES (?, ?)",
+                [(chave, json.dumps(decisao, ensure_ascii=False)) for chave, decisao in itens]
+            )
+            self._conn.commit()
+    
+    def close(self) -> None:
+        """Fecha a conexão com o SQLite (pode ser chamado mais de uma vez)"""
+        with self._lock:
+            self._conn.close()
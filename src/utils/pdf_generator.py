@@ -19,6 +19,10 @@ matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 
+# Troca os separadores do formato americano (1,234.56) pelo brasileiro (1.234,56)
+# em uma única passada
+_SEPARADORES_BRL = str.maketrans(',.', '.,')
+
 
 class FinancialPDFGenerator:
     """Gera PDFs de relatórios financeiros com design """
@@ -146,7 +150,7 @@ class FinancialPDFGenerator:
     
     def _format_currency(self, value: float) -> str:
         """Formata valor em moeda"""
-        return f"R$ {value:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+        return f"R$ {value:,.2f}".translate(_SEPARADORES_BRL)
     
     def _create_chart_image(self, data: list, labels: list, title: str, chart_type: str = 'bar') -> Image:
         """